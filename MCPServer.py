@@ -1,31 +1,59 @@
 # adk_mcp_server.py
+import time
+_STARTED = time.perf_counter()  # startup budget is measured from here
+
 import asyncio
 import json
+import logging
+import os
+import sys
 from dotenv import load_dotenv
 
+# --- Load Environment Variables (before the utils modules read their settings) ---
+load_dotenv()
+
 # MCP Server Imports
 from mcp import types as mcp_types # Use alias to avoid conflict with genai.types
 from mcp.server.lowlevel import Server, NotificationOptions
 from mcp.server.models import InitializationOptions
 import mcp.server.stdio
 
-# ADK Tool Imports
-from google.adk.tools.function_tool import FunctionTool
-from google.adk.tools.load_web_page import load_web_page # Example ADK tool
-# ADK <-> MCP Conversion Utility
-from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+# Tool registry (ADK is imported lazily, after the handshake has started)
+from utils.mcp_tool_registry import ToolRegistry
+from utils.append_writer import AppendWriter
+# Structured tracing to stderr/file (stdout is the protocol stream on stdio)
+from utils.server_trace import tracer
+from utils.tool_batch import BatchCall, BatchError, is_error_result, run_batch
+# Large results are sent in pages with a continuation cursor
+from utils.result_pager import ResultTooLargeError, result_pager
 
-# --- Load Environment Variables (If ADK tools need them) ---
-load_dotenv()
+# Time allowed from interpreter start to "ready for the handshake"
+MCP_STARTUP_BUDGET_MS = float(os.getenv("MCP_STARTUP_BUDGET_MS", 1000))
 
-import os
+# Blocking (sync) tools run in this pool so they don't stall the event loop; with
+# "process" only stateless tools go to the (spawned) worker processes
+MCP_TOOL_POOL = os.getenv("MCP_TOOL_POOL", "thread")  # "thread" or "process"
+MCP_TOOL_WORKERS = int(os.getenv("MCP_TOOL_WORKERS", 8))
+# Converted tool schemas are kept here so a restart can skip importing ADK (empty disables)
+MCP_SCHEMA_CACHE = os.getenv("MCP_SCHEMA_CACHE", os.path.join(".mcp_cache", "tool_schemas.json"))
+
+registry = ToolRegistry(pool=MCP_TOOL_POOL, max_workers=MCP_TOOL_WORKERS, schema_cache=MCP_SCHEMA_CACHE or None)
+
+# load_web_page (ADK's extraction behind a disk cache with ETag/Last-Modified
+# revalidation, see utils/web_page_cache.py) is imported on first use; its cache
+# statistics live in this process, so it stays on the thread pool
+registry.register_lazy("utils.web_page_cache:load_web_page", max_concurrency=4, thread_only=True)
+
+# Open handles are kept and flushed in groups (see utils/append_writer.py)
+append_writer = AppendWriter()
 
+# Appends are buffered by the process-wide append_writer
+@registry.tool(thread_only=True)
 def append_to_file(directory: str, file_path: str, text: str) -> dict:
 
     try:
-        full_path = directory + "\\" + file_path
-        with open(full_path, "a", encoding="utf-8", errors="replace") as f:
-            f.write(text + "\n")
+        full_path = os.path.join(directory, file_path)
+        append_writer.append(full_path, text + "\n")
 
         return {
             "status": "success",
@@ -42,12 +70,14 @@ def append_to_file(directory: str, file_path: str, text: str) -> dict:
         }
 
 # --- Define Additional ADK Tool: add_numbers ---
+@registry.tool()
 def add_numbers(a: int, b: int) -> dict:
     """Toplama işlemi yapan basit bir ADK aracı."""
     return {"result": a + b + 1}
 
 from datetime import datetime
 
+@registry.tool()
 def get_current_datetime(dummy: str) -> dict:
     try:
         dummy = len(dummy)
@@ -64,37 +94,95 @@ def get_current_datetime(dummy: str) -> dict:
             "message": f"Hata olustu: {str(e)}",
         }
     
-print ("datetime = ", get_current_datetime("DUMMY"))
-# --- End Additional Tool Definition ---
+@registry.tool(thread_only=True)
+def server_stats(tool: str = "") -> dict:
+    """
+    Sunucu tarafı istatistikleri: araç başına çağrı/hata sayıları ve gecikme histogramları.
+
+    Args:
+        tool: Yalnızca bu aracın istatistikleri istenirse adı; boşsa hepsi.
+    """
+    stats = tracer.stats()
+    if tool:
+        stats["tools"] = {name: value for name, value in stats["tools"].items() if name == tool}
+    stats["append_writer"] = {
+        "appends": append_writer.appends, "commits": append_writer.commits, "errors": append_writer.errors,
+    }
+    # Web sayfası önbelleği yalnızca load_web_page ilk kez çağrıldığında yüklenir
+    web_cache_module = sys.modules.get("utils.web_page_cache")
+    if web_cache_module is not None:
+        stats["web_page_cache"] = web_cache_module.web_page_cache.stats()
+    stats["result_pager"] = result_pager.stats()
+    return stats
+
+@registry.tool(thread_only=True)
+def read_result_page(cursor: str) -> dict:
+    """
+    Büyük bir araç sonucunun sonraki sayfasını döndürür.
+
+    Sonuç tek yanıta sığmadığında yanıtta bir next_cursor bulunur; bu aracı
+    o değerle, next_cursor null olana kadar tekrar çağırın. "text"
+    parçaları sırayla birleştirildiğinde aracın tam çıktısı elde edilir.
+    """
+    try:
+        text, continuation = result_pager.read(cursor)
+    except (KeyError, ValueError, TypeError) as e:
+        # ResultTooLargeError is a ValueError; TypeError comes from a value JSON can't encode
+        return {"status": "error", "error": e.args[0] if e.args else str(e)}
+    return {"text": text, **continuation}
 
-# --- Prepare the ADK Tools ---
-print("Initializing ADK tools...")
-adk_web_tool = FunctionTool(load_web_page)
-print(f"ADK tool '{adk_web_tool.name}' initialized.")
-adk_add_tool = FunctionTool(add_numbers)
-print(f"ADK tool '{adk_add_tool.name}' initialized.")
-adk_append_tool = FunctionTool(append_to_file)
-print(f"ADK tool '{adk_append_tool.name}' initialized.")
-adk_datetime_tool = FunctionTool(get_current_datetime)
-print(f"ADK tool '{adk_datetime_tool.name}' initialized.")
-# --- End ADK Tool Prep ---
+@registry.tool()
+async def batch_call(calls: list[BatchCall]) -> dict:
+    """
+    Birden fazla aracı tek istekte çağırır; sonuçlar çağrı sırasıyla döner.
+
+    Her çağrı {"tool": "<araç adı>", "arguments": {...}} biçimindedir ve
+    isteğe bağlı "depends_on": [<önceki çağrı sırası>] alabilir. Metin
+    argümanlarında önceki bir çağrının sonucu {{i.alan}} ile kullanılabilir,
+    ör. "{{0.current_datetime}} metin". Birbirine bağlı olmayan çağrılar
+    aynı anda çalışır.
+    """
+    try:
+        results = await run_batch(calls, _run_tool, lambda name: name in registry and name != "batch_call")
+    except BatchError as e:
+        return {"status": "error", "error": str(e)}
+    failed = sum(1 for result in results if result["status"] != "success")
+    return {"status": "success" if not failed else "partial", "failed": failed, "results": results}
+
+tracer.info("tools_registered", tools=registry.names())
+# --- End Additional Tool Definition ---
 
 # --- MCP Server Setup ---
-print("Creating MCP Server instance...")
-app = Server("adk-web-tool-mcp-server")
+# The version changes with the tool set, so clients can key their cached tool catalog on it
+app = Server("adk-web-tool-mcp-server", version=f"0.1.0+{registry.fingerprint()[:12]}")
 
 # Implement the MCP server's @app.list_tools handler
 @app.list_tools()
 async def list_tools() -> list[mcp_types.Tool]:
     """MCP handler to list available tools."""
-    print("MCP Server: Received list_tools request.")
-    mcp_web_tool_schema = adk_to_mcp_tool_type(adk_web_tool)
-    mcp_add_tool_schema = adk_to_mcp_tool_type(adk_add_tool)
-    mcp_datetime_tool_schema = adk_to_mcp_tool_type(adk_datetime_tool)
-    mcp_append_tool_schema = adk_to_mcp_tool_type(adk_append_tool)
-    
-    print(f"MCP Server: Advertising tools: {mcp_web_tool_schema.name}, {mcp_add_tool_schema.name}, {mcp_append_tool_schema}, {mcp_datetime_tool_schema}")
-    return [mcp_web_tool_schema, mcp_add_tool_schema, mcp_datetime_tool_schema, mcp_append_tool_schema]
+    tracer.debug("list_tools")
+    # Schemas are converted once (in the background warm-up) and cached by the registry
+    return await registry.list_tools_async()
+
+async def _run_tool(name: str, arguments: dict):
+    """Runs one registered tool and records its latency; used by call_tool and batch_call."""
+    started = time.perf_counter()
+    try:
+        # Sync tools run in the worker pool, async tools on the event loop
+        adk_response = await registry.call(name, arguments)
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        tracer.record_call(name, elapsed, error=True)
+        tracer.warning("call_tool_failed", tool=name, ms=round(elapsed * 1000, 3), error=str(e))
+        raise
+    elapsed = time.perf_counter() - started
+    # Araç hata sözlüğü döndürdüyse de hata olarak say
+    failed = is_error_result(adk_response)
+    tracer.record_call(name, elapsed, error=failed)
+    if tracer.enabled(logging.DEBUG):
+        tracer.debug("call_tool", tool=name, ms=round(elapsed * 1000, 3), error=failed,
+                     args=tracer.preview(arguments))
+    return adk_response
 
 # Implement the MCP server's @app.call_tool handler
 @app.call_tool()
@@ -102,61 +190,120 @@ async def call_tool(
     name: str, arguments: dict
 ) -> list[mcp_types.TextContent | mcp_types.ImageContent | mcp_types.EmbeddedResource]:
     """MCP handler to execute a tool call."""
-    print(f"MCP Server: Received call_tool request for '{name}' with args: {arguments}")
-
     try:
-        if name == adk_web_tool.name:
-            adk_response = await adk_web_tool.run_async(args=arguments, tool_context=None)
-        elif name == adk_add_tool.name:
-            adk_response = await adk_add_tool.run_async(args=arguments, tool_context=None)
-        elif name == adk_datetime_tool.name:
-            adk_response = await adk_datetime_tool.run_async(args=arguments, tool_context=None)
-        elif name == adk_append_tool.name:
-            try:
-                adk_response = await adk_append_tool.run_async(args=arguments, tool_context=None)
-                print(f"append_to_file response: {adk_response}")
-                response_text = json.dumps(adk_response, indent=2)
-                return [mcp_types.TextContent(type="text", text=response_text)]
-            except Exception as e:
-                print(f"append_to_file EXCEPTION: {e}")
-                return [mcp_types.TextContent(type="text", text=f"Tool exception: {str(e)}")]
-        else:
+        if name not in registry:
+            # Bilinmeyen araç adları istatistik tablosunu şişirmesin
+            tracer.record_call("<unknown>", 0.0, error=True)
             raise ValueError(f"Tool '{name}' not implemented.")
 
-        response_text = json.dumps(adk_response, indent=2)
-        return [mcp_types.TextContent(type="text", text=response_text)]
+        adk_response = await _run_tool(name, arguments)
+        if name == "read_result_page":
+            response_text = json.dumps(adk_response, ensure_ascii=False, separators=(",", ":"))
+            return [mcp_types.TextContent(type="text", text=response_text)]
+        # Compact JSON, encoded lazily; results over MCP_RESULT_PAGE_CHARS go out page by page
+        try:
+            page, continuation = result_pager.paginate(adk_response)
+        except ResultTooLargeError as e:
+            return [mcp_types.TextContent(type="text", text=json.dumps({"status": "error", "error": str(e)}))]
+        contents = [mcp_types.TextContent(type="text", text=page)]
+        if continuation is not None:
+            continuation["hint"] = "Output truncated; call read_result_page with next_cursor for the rest."
+            contents.append(mcp_types.TextContent(type="text", text=json.dumps(continuation)))
+        return contents
 
     except Exception as e:
-        print(f"MCP Server: Error executing tool '{name}': {e}")
         error_text = json.dumps({"error": f"Failed to execute tool '{name}': {str(e)}"})
         return [mcp_types.TextContent(type="text", text=error_text)]
 
 # --- MCP Server Runner ---
+def _report_startup(transport: str) -> None:
+    """Logs the time to handshake readiness and warns when it is over the budget."""
+    elapsed_ms = round((time.perf_counter() - _STARTED) * 1000, 1)
+    level = logging.WARNING if elapsed_ms > MCP_STARTUP_BUDGET_MS else logging.INFO
+    tracer.event(level, "handshake_start", transport=transport, startup_ms=elapsed_ms,
+                 budget_ms=MCP_STARTUP_BUDGET_MS)
+
 async def run_server():
     """Runs the MCP server over standard input/output."""
+    registry.start_pool()
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        print("MCP Server starting handshake...")
+        # ADK import and schema conversion run in the background while the client connects
+        registry.warm()
+        _report_startup("stdio")
         await app.run(
             read_stream,
             write_stream,
             InitializationOptions(
                 server_name=app.name,
-                server_version="0.1.0",
+                server_version=app.version,
                 capabilities=app.get_capabilities(
                     notification_options=NotificationOptions(),
                     experimental_capabilities={},
                 ),
             ),
         )
-        print("MCP Server run loop finished.")
+        tracer.info("run_loop_finished", transport="stdio")
+
+# Streamable HTTP settings; clients connect to http://<host>:<port>/mcp
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")  # "stdio" or "http"
+MCP_HTTP_HOST = os.getenv("MCP_HTTP_HOST", "127.0.0.1")
+MCP_HTTP_PORT = int(os.getenv("MCP_HTTP_PORT", 8765))
+
+async def run_http_server(host: str = MCP_HTTP_HOST, port: int = MCP_HTTP_PORT):
+    """Runs the MCP server over streamable HTTP, so many clients share one warm server."""
+    import contextlib
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+    # One server instance, one MCP session per connected client
+    session_manager = StreamableHTTPSessionManager(app=app, json_response=False, stateless=False)
+
+    async def handle_streamable_http(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        registry.start_pool()
+        async with session_manager.run():
+            registry.warm()
+            _report_startup("http")
+            tracer.info("listening", transport="http", url=f"http://{host}:{port}/mcp")
+            yield
+
+    starlette_app = Starlette(
+        routes=[Mount("/mcp", app=handle_streamable_http)],
+        lifespan=lifespan,
+    )
+    server = uvicorn.Server(uvicorn.Config(starlette_app, host=host, port=port, log_level="warning"))
+    await server.serve()
+    tracer.info("run_loop_finished", transport="http")
 
 if __name__ == "__main__":
-    print("Launching MCP Server exposing ADK tools...")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MCP Server exposing ADK tools")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=MCP_HTTP_HOST)
+    parser.add_argument("--port", type=int, default=MCP_HTTP_PORT)
+    cli_args = parser.parse_args()
+
+    # Clients stop a stdio server with SIGTERM; exit normally so the pools and buffers below are closed
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    tracer.info("server_launch", transport=cli_args.transport)
     try:
-        asyncio.run(run_server())
+        if cli_args.transport == "http":
+            asyncio.run(run_http_server(cli_args.host, cli_args.port))
+        else:
+            asyncio.run(run_server())
     except KeyboardInterrupt:
-        print("\nMCP Server stopped by user.")
+        tracer.info("server_stopped", reason="keyboard_interrupt")
     except Exception as e:
-        print(f"MCP Server encountered an error: {e}")
+        tracer.error("server_error", error=str(e))
     finally:
-        print("MCP Server process exiting.")
+        registry.shutdown()
+        append_writer.close()
+        tracer.info("server_exit", **tracer.stats())
@@ -1,7 +1,6 @@
-from google.adk.agents import LlmAgent, SequentialAgent, ParallelAgent
+from google.adk.agents import LlmAgent, ParallelAgent
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
-from google.adk.artifacts import InMemoryArtifactService
 from google.adk.tools import google_search
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmResponse, LlmRequest
@@ -11,13 +10,17 @@ from google import genai
 from google.genai import types
 from PIL import Image
 from io import BytesIO
+import base64
 import unicodedata
 import os
+import asyncio
+import time
+import uuid
+import weakref
 import logging
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Image as PlatypusImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.base import MIMEBase
 from dotenv import load_dotenv
 
 class NoToolNoiseFilter(logging.Filter):
@@ -31,11 +34,43 @@ logging.getLogger("google_genai.types").addFilter(NoToolNoiseFilter())
 
 # Set Gemini API Key and Brevo settings
 load_dotenv()
+from utils.llm_cache import response_cache, make_key  # reads its settings from .env
+from utils.pdf_renderer import fix_turkish_chars, render_report_pdf_async
+from utils import pdf_renderer
+from utils.mail_queue import mail_queue
+from utils.pipeline_agents import ShortCircuitSequentialAgent, ToolStepAgent
+from utils.disk_artifact_service import DiskArtifactService
+from utils.pipeline_profiler import profiler
+# Önbellekten dönen yanıtlar after_model callback'lerine ulaşmaz; profiler'a ayrıca bildir
+response_cache.hit_listeners.append(profiler.record_cache_hit)
 # --- Constants ---
 APP_NAME = "create_document"
 USER_ID = "user1234"
-SESSION_ID = "1234"
 GEMINI_2_FLASH = "gemini-2.0-flash-lite"
+IMAGE_MODEL = "gemini-2.0-flash-exp-image-generation"
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "reports")  # Toplu çalıştırmada her oturumun dosyaları buraya yazılır
+MAX_CONCURRENT_TOPICS = int(os.getenv("MAX_CONCURRENT_TOPICS", 3))
+IMAGE_GENERATION_TIMEOUT_SECONDS = float(os.getenv("IMAGE_GENERATION_TIMEOUT_SECONDS", 90))
+IMAGE_GENERATION_CONCURRENCY = int(os.getenv("IMAGE_GENERATION_CONCURRENCY", 2))
+
+_genai_client = None
+# Event loop -> semaphore; asyncio primitives are bound to the loop they are first used on
+_image_semaphores = weakref.WeakKeyDictionary()
+
+def get_genai_client():
+    """Returns the process-wide genai client (created on first use)."""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client()
+    return _genai_client
+
+def get_image_semaphore():
+    """Returns the image generation semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _image_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _image_semaphores[loop] = asyncio.Semaphore(IMAGE_GENERATION_CONCURRENCY)
+    return semaphore
 
 def to_ascii(text):
     """Convert text to ASCII-only characters."""
@@ -54,52 +89,91 @@ async def create_image(tool_context: ToolContext):
     prompt = tool_context.state['summary_search_result']
     #print(f"Özete dayalı görsel oluşturuluyor: {prompt}")
     
-    client = genai.Client()
-    
     try:
         # Türkçe karakter sorunu engellemek için UTF-8 encoding kullanılıyor
         contents = prompt + " cümlesindeki ana fikri kullanarak bir görsel üret"
-        
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-exp-image-generation",
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_modalities=['TEXT', 'IMAGE']
+        filename = "summarized_search_result.png"
+
+        # Aynı özet için daha önce görsel üretildiyse önbellekten kullan
+        cache_key = make_key("image", IMAGE_MODEL, contents)
+        img_data = response_cache.get_bytes(cache_key)
+        if img_data is not None:
+            print("💾 [Cache] Hit for image generation")
+            await tool_context.save_artifact(
+                filename,
+                types.Part.from_bytes(data=img_data, mime_type="image/png"),
+            )
+            tool_context.state["created_image"] = filename
+            return filename
+
+        # Paylaşılan async istemci: event loop bloklanmaz, eşzamanlı istek sayısı sınırlıdır
+        async with get_image_semaphore():
+            response = await asyncio.wait_for(
+                get_genai_client().aio.models.generate_content(
+                    model=IMAGE_MODEL,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        response_modalities=['TEXT', 'IMAGE']
+                    )
+                ),
+                timeout=IMAGE_GENERATION_TIMEOUT_SECONDS,
             )
-        )
 
         for part in response.candidates[0].content.parts:
             if part.text is not None:
                 print(f"🤖 [Image Agent] {part.text}")
             elif part.inline_data is not None:
-                image = Image.open(BytesIO(part.inline_data.data))
-                
-                # Görseli bir dosyaya kaydet (önce belleğe)
-                img_buffer = BytesIO()
-                image.save(img_buffer, format="PNG")
-                img_data = img_buffer.getvalue()
+                img_data = part.inline_data.data
+                if part.inline_data.mime_type != "image/png":
+                    # Görseli PNG'ye dönüştür (bellekte)
+                    img_buffer = BytesIO()
+                    Image.open(BytesIO(img_data)).save(img_buffer, format="PNG")
+                    img_data = img_buffer.getvalue()
+                response_cache.put_bytes(cache_key, img_data)
                 
                 # Görseli bir artifact olarak kaydet
-                filename = "summarized_search_result.png"
-                
                 await tool_context.save_artifact(
                     filename,
                     types.Part.from_bytes(data=img_data, mime_type="image/png"),
                 )
                 
-                # Ayrıca dosya olarak da kaydet
-                with open(filename, "wb") as f:
-                    f.write(img_data)
-                
                 tool_context.state["created_image"] = filename
                 return filename
                 
+    except asyncio.TimeoutError:
+        print(f"Görsel oluşturma {IMAGE_GENERATION_TIMEOUT_SECONDS} sn içinde tamamlanamadı.")
+        return None
     except Exception as e:
         print(f"Görsel oluşturma hatası: {e}")
         import traceback
         print(traceback.format_exc())
         return None
 
+async def load_artifact_data(tool_context: ToolContext, filename: str):
+    """
+    Artifact içeriğini döndürür.
+
+    DiskArtifactService ile içerik kopyalanmadan, blob'un memory map'i üzerinden
+    bir memoryview olarak döner; diğer servislerde Part'taki bytes döner.
+
+    Args:
+        tool_context: Durum bilgilerini içeren araç bağlamı.
+        filename: Artifact adı.
+
+    Returns:
+        Artifact içeriği (bytes veya memoryview) ya da artifact yoksa None.
+    """
+    ctx = tool_context._invocation_context
+    if isinstance(ctx.artifact_service, DiskArtifactService):
+        return ctx.artifact_service.open_artifact_view(
+            app_name=ctx.app_name,
+            user_id=ctx.user_id,
+            session_id=ctx.session.id,
+            filename=filename,
+        )
+    artifact = await tool_context.load_artifact(filename)
+    return artifact.inline_data.data if artifact else None
+
 async def create_document(tool_context: ToolContext):
     """
     Görsel ve arama sonuçlarıyla bir PDF belgesi oluşturur.
@@ -113,108 +187,23 @@ async def create_document(tool_context: ToolContext):
     """
     try:
         # Görseli ve metni al
-        image_artifact = await tool_context.load_artifact(tool_context.state['created_image'])
+        image_data = await load_artifact_data(tool_context, tool_context.state['created_image'])
         report_text = tool_context.state["search_result"]
 
-        # Görsel verilerini BytesIO nesnesine yükle
-        img_buffer = BytesIO(image_artifact.inline_data.data)
-        img = Image.open(img_buffer)
-
-        # PDF belgesi oluştur
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            leftMargin=50,
-            rightMargin=50,
-            topMargin=50,
-            bottomMargin=50
-        )
-
-        # --- Türkçe karakter desteği için font çözümü ve metin ön işleme ---
-        # Base-14 fontları (Helvetica) kullanılarak Türkçe karakterler Latin-1 karşılıklarına dönüştürülüyor.
-        def fix_turkish_chars(text):
-            replacements = {
-                'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G',
-                'ü': 'u', 'Ü': 'U', 'ş': 's', 'Ş': 'S',
-                'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'
-            }
-            for tr_char, latin_char in replacements.items():
-                text = text.replace(tr_char, latin_char)
-            return text
-
         processed_report_text = fix_turkish_chars(report_text)
         processed_topic = fix_turkish_chars(tool_context.state.get("topic", "Rapor"))
 
         tool_context.state["processed_topic"] = processed_topic
 
-        # --- Sayfa düzeni ve stilleri ---
-        styles = getSampleStyleSheet()
-
-        # Metin stili - Sola hizalı (TA_LEFT)
-        left_aligned_style = ParagraphStyle(
-            name='LeftAlignedStyle',
-            parent=styles['Normal'],
-            fontName='Helvetica', # Sabit font Helvetica
-            alignment=TA_LEFT,
-            fontSize=12,
-            leading=14,
-            firstLineIndent=0, # İlk satır girintisi kaldırıldı
-        )
-
-        # Başlık stili
-        title_style = ParagraphStyle(
-            name='TitleStyle',
-            parent=styles['Heading1'],
-            fontName='Helvetica', # Sabit font Helvetica
-            alignment=TA_LEFT, # Başlık da sola hizalı
-            fontSize=16,
-            leading=20,
-        )
-
-        # --- PDF içeriğini oluştur ---
-        flowables = []
-
-        # Başlık ekle
-        flowables.append(Paragraph(processed_topic, title_style))
-        flowables.append(Spacer(1, 20))
-
-        # Görseli ekle
-        width, height = A4
-        max_img_width = width - 100
-        scale_factor = min(1, max_img_width / img.width)
-        img_width = img.width * scale_factor
-        img_height = img.height * scale_factor
-
-        img_path = "temp_image.png"
-        img.save(img_path)
-        flowables.append(PlatypusImage(img_path, width=img_width, height=img_height))
-        flowables.append(Spacer(1, 20))
-
-        # Metni paragraf olarak ekle
-        paragraphs = processed_report_text.split('\n\n')
-        if len(paragraphs) == 1:
-            paragraphs = processed_report_text.split('\n')
-
-        for paragraph in paragraphs:
-            if paragraph.strip():
-                p = Paragraph(paragraph, left_aligned_style)
-                flowables.append(p)
-                flowables.append(Spacer(1, 10))
-
-        # PDF'i oluştur
-        doc.build(flowables)
-        buffer.seek(0)
-
-        # Geçici dosyayı temizle
-        if os.path.exists(img_path):
-            os.remove(img_path)
+        # PDF'i bellekte, worker havuzunda oluştur (geçici dosya yok, event loop bloklanmaz;
+        # reportlab'in ihtiyaç duyduğu görsel kopyası da worker'da yapılır)
+        pdf_data = await render_report_pdf_async(processed_topic, processed_report_text, image_data)
 
         # Artifact olarak kaydet
         filename = "report.pdf"
         await tool_context.save_artifact(
             filename,
-            types.Part.from_bytes(data=buffer.getvalue(), mime_type="application/pdf"),
+            types.Part.from_bytes(data=pdf_data, mime_type="application/pdf"),
         )
 
         tool_context.state["created_document"] = filename
@@ -239,12 +228,26 @@ async def save_document_to_disk(tool_context: ToolContext):
     #print("PDF belgesi diske kaydediliyor...")
     
     try:
-        # PDF içeriğini al
         filename = tool_context.state["created_document"]
+        destination = os.path.join(tool_context.state.get("output_dir", ""), filename)
+
+        ctx = tool_context._invocation_context
+        if isinstance(ctx.artifact_service, DiskArtifactService):
+            # Artifact dosyası doğrudan kopyalanır, PDF içeriği belleğe alınmaz
+            await ctx.artifact_service.export_artifact(
+                app_name=ctx.app_name,
+                user_id=ctx.user_id,
+                session_id=ctx.session.id,
+                filename=filename,
+                destination=destination,
+            )
+            return filename
+
+        # PDF içeriğini al
         pdf_artifact = await tool_context.load_artifact(filename)
         
-        # PDF'i dosyaya kaydet
-        with open(filename, "wb") as f:
+        # PDF'i dosyaya kaydet (oturumun çıktı klasörüne)
+        with open(destination, "wb") as f:
             f.write(pdf_artifact.inline_data.data)
         
         return filename
@@ -256,18 +259,18 @@ async def save_document_to_disk(tool_context: ToolContext):
         return None
     
 async def send_mail(tool_context:ToolContext):
-    
-    import smtplib
-    from email.mime.multipart import MIMEMultipart
-    from email.mime.text import MIMEText
-    from email.mime.base import MIMEBase
-    from email import encoders
-
-    # E-posta gönderim bilgileri
-    smtp_server = os.getenv("SMTP_SERVER")  # Brevo SMTP sunucusu
-    smtp_port = os.getenv("SMTP_PORT") # Brevo SMTP port (587 TLS, 465 SSL)
-    smtp_user = os.getenv("SMTP_USER")  # Brevo'da tanımlı mail adresi
-    smtp_password = os.getenv("SMTP_PASSWORD")  # Brevo API
+    """
+    Oluşturulan PDF belgesini e-posta ile gönderilmek üzere kuyruğa ekler.
+
+    Gönderim utils.mail_queue içindeki havuzlu SMTP bağlantıları üzerinden
+    arka planda yapılır; akış SMTP gecikmesini beklemez.
+
+    Args:
+        tool_context: Durum bilgilerini içeren araç bağlamı.
+
+    Returns:
+        Kuyruğa alınma durumu.
+    """
     # Gönderici ve alıcı bilgileri
     from_email = tool_context.state["mail_address"]
     to_email = tool_context.state["mail_address"]  # Göndereceğiniz alıcının e-posta adresi
@@ -285,36 +288,21 @@ async def send_mail(tool_context:ToolContext):
 
     # Eklenecek PDF dosyasının yolu
 
-    pdf_artifact = await tool_context.load_artifact(tool_context.state['created_document'])
+    pdf_data = await load_artifact_data(tool_context, tool_context.state['created_document'])
     pdf_filename = "report.pdf"
 
-    # PDF dosyasını MIMEBase ile ekleyelim
+    # PDF dosyasını MIMEBase ile ekleyelim; Base64 doğrudan artifact'in memory map'inden kodlanır
     part = MIMEBase('application', 'pdf')
-    part.set_payload(pdf_artifact.inline_data.data)
-    encoders.encode_base64(part)  # Base64 kodlama
+    part.set_payload(base64.encodebytes(pdf_data).decode("ascii"))
+    part['Content-Transfer-Encoding'] = 'base64'
     part.add_header('Content-Disposition', f'attachment; filename={pdf_filename}')
 
     # E-postaya PDF dosyasını ekleyelim
     msg.attach(part)
 
-    # SMTP sunucusuna bağlan ve e-posta gönder
-    try:
-        # SMTP sunucusuna bağlan
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()  # TLS şifrelemesi başlat
-        server.login(smtp_user, smtp_password)  # Giriş yap
-
-        # E-posta gönder
-        text = msg.as_string()
-        server.sendmail(from_email, to_email, text)
-
-    except Exception as e:
-        print(f"E-posta gönderme sırasında bir hata oluştu: {e}")
-
-    finally:
-        # Bağlantıyı kapat
-        server.quit()
-    return
+    # Gönderim kuyruğuna ekle; bağlantı, yeniden deneme ve toplu gönderim mail_queue tarafından yapılır
+    mail_queue.enqueue(msg, from_email, [to_email])
+    return {"status": "queued", "to": to_email}
 
 def before_search_agent_model(callback_context: CallbackContext, llm_request: LlmRequest):
     """Inspects/modifies the LLM request or skips the call."""
@@ -341,20 +329,9 @@ def before_search_agent_model(callback_context: CallbackContext, llm_request: Ll
         )
     else:
         print("🔄 [Callback] Proceeding with LLM call.")
-        # Return None to allow the (modified) request to go to the LLM
-        return None
+        # Return a cached response for a repeated topic, or None to let the request go to the LLM
+        return response_cache.before_model(callback_context, llm_request)
     
-def before_all_agent_model(callback_context: CallbackContext, llm_request: LlmRequest):
-    # Eğer BLOCK yakalandıysa veya stop_sequential bayrağı varsa, agent'ı atla
-    if callback_context.state["stop_sequential"]:
-        return LlmResponse(
-            content=types.Content(
-                role="model",
-                parts=[types.Part(text="Bu adım atlandı çünkü akış BLOCK ile durduruldu.")]
-            )
-        )
-    return None
-
 search_agent = LlmAgent(
     name="search",
     model=GEMINI_2_FLASH,
@@ -362,7 +339,12 @@ search_agent = LlmAgent(
         Bağlamdaki {topic} hakkında bilgi aramak için google_search aracını kullan.
         Arama sonuçlarını durum değişkenine kaydet.
     """,
-    before_model_callback=before_search_agent_model,
+    before_model_callback=[before_search_agent_model, profiler.before_model],
+    after_model_callback=[profiler.after_model, response_cache.after_model],
+    before_tool_callback=profiler.before_tool,
+    after_tool_callback=profiler.after_tool,
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
     tools=[google_search],
     output_key="search_result"
 )
@@ -375,7 +357,10 @@ summary_search_agent = LlmAgent(
         Özet, temel bilgileri yakalamalıdır.
         Özeti durum değişkenine kaydet.
     """,
-    before_model_callback=before_all_agent_model,
+    before_model_callback=[response_cache.before_model, profiler.before_model],
+    after_model_callback=[profiler.after_model, response_cache.after_model],
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
     output_key="summary_search_result"
 )
 
@@ -388,75 +373,86 @@ create_image_agent = LlmAgent(
         Görseli oluşturmak için create_image aracını kullan.
         Kullanıcıdan herhangi bir onay ya da ek bir bilgi bekleme!
     """,
-    before_model_callback=before_all_agent_model,
+    before_model_callback=[response_cache.before_model, profiler.before_model],
+    after_model_callback=[profiler.after_model, response_cache.after_model],
+    before_tool_callback=profiler.before_tool,
+    after_tool_callback=profiler.after_tool,
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
     tools=[create_image]
 )
 
-create_document_agent = LlmAgent(
+# Aşağıdaki adımlar tek bir aracı argümansız çağırır; model çağrısı yapmadan doğrudan çalıştırılır.
+create_document_agent = ToolStepAgent(
     name="create_document",
-    model=GEMINI_2_FLASH,
-    instruction="""
-        Şunları kullanarak bir PDF belgesi oluştur:
-        1. {created_image} içindeki görsel
-        2. {search_result} içindeki arama sonuçları
-        
-        PDF'i oluşturmak için create_document aracını kullan.
-        PDF'i sadece artifact olarak kaydet, disk kaydetme işlemi ayrı bir agent tarafından yapılacak.
-        Kullanıcıdan herhangi bir onay bekleme.
-    """,
-    before_model_callback=before_all_agent_model,
-    tools=[create_document]
+    func=create_document,
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
 )
 
-save_document_to_disk_agent = LlmAgent(
+save_document_to_disk_agent = ToolStepAgent(
     name="save_document_to_disk",
-    model=GEMINI_2_FLASH,
-    instruction="""
-        {created_document} içindeki PDF belgesini diske kaydet.
-        
-        PDF'i diske kaydetmek için save_document_to_disk aracını kullan.
-        Kullanıcıdan herhangi bir onay bekleme.
-    """,
-    before_model_callback=before_all_agent_model,
-    tools=[save_document_to_disk]
+    func=save_document_to_disk,
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
 )
 
-send_mail_agent = LlmAgent(
+send_mail_agent = ToolStepAgent(
     name="send_mail",
-    model=GEMINI_2_FLASH,
-    instruction="""
-        {created_document} içindeki pdf belgesini mail olarak gönder.
-
-        Mail gönderebilmek için send_mail aracını kullan. Mail göndermek için gerekli bütün bilgiler bu aracın içinde olacak.
-        
-        Kullanıcıdan herhangi bir onay ya da ek bir bilgi bekleme!
-    """,
-    before_model_callback=before_all_agent_model,
-    tools=[send_mail],
+    func=send_mail,
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
 )
 
 parallel_agents = ParallelAgent(
     name="parallel_tasks",
-    sub_agents=[save_document_to_disk_agent, send_mail_agent]
+    sub_agents=[save_document_to_disk_agent, send_mail_agent],
+    before_agent_callback=profiler.before_agent,
+    after_agent_callback=profiler.after_agent,
 )
 
 session_service = InMemorySessionService()
-artifact_service = InMemoryArtifactService()
+# PNG/PDF artifact'leri diskte, içerik adresli olarak tutulur (bkz. utils/disk_artifact_service.py)
+artifact_service = DiskArtifactService()
 
 #from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams, StdioServerParameters
-from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
+from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters, StreamableHTTPServerParams
 from utils.custom_adk_patches import CustomMCPToolset as MCPToolset
+from utils.shared_toolset import SharedMCPToolset
 
-async def get_agent_async():
-    """Creates an ADK Agent equipped with tools from the MCP Server."""
-    tools = MCPToolset (
+# Paylaşılan bir MCP sunucusu varsa (python MCPServer.py --transport http) ona bağlan
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
+
+# mcp_client yalnızca kullandığı araçları görür (server_stats gibi operatör araçları hariç)
+MCP_AGENT_TOOLS = ["append_to_file", "get_current_datetime", "batch_call"]
+
+def create_mcp_toolset():
+    if MCP_SERVER_URL:
+        return MCPToolset(
+            connection_params=StreamableHTTPServerParams(url=MCP_SERVER_URL, timeout=30),
+            tool_filter=MCP_AGENT_TOOLS,
+        )
+    return MCPToolset (
         # Use StdioServerParameters for local process communication
         connection_params=StdioServerParameters(
             command='python', # Command to run the server
             args=[
                 "C:\Zafer\Kod\Agents\MCPServer.py"],
-        )
+        ),
+        tool_filter=MCP_AGENT_TOOLS,
     )
+
+# MCP sunucusu süreç boyunca bir kez başlatılır ve bütün çalıştırmalar tarafından paylaşılır
+shared_toolset = SharedMCPToolset(create_mcp_toolset)
+
+async def get_agent_async():
+    """
+    Creates an ADK Agent equipped with tools from the shared MCP Server toolset.
+
+    The toolset is not connected here: the MCP server is started when the
+    agent first lists its tools, so runs stopped earlier never start it.
+    """
+    tools = shared_toolset.toolset
     # print(f"Fetched {len(tools.get_tools().)} tools from MCP server.")
     # print([tool.name for tool in tools])
     mcp_client_agent = LlmAgent(
@@ -471,34 +467,86 @@ async def get_agent_async():
                 Always prepend the returned date and time in the format [YYYY.MM.DD HH:MM] before the text. For example: [2025.05.22 18:02] {processed_topic}
                 Do not perform any other operation, do not look at or process any other information.
                 IMPORTANT: Never generate the date and time yourself. Always use the value returned by the get_current_datetime tool.
+                Do both steps in ONE batch_call tool call: first get_current_datetime, then append_to_file with the text
+                "{{0.current_datetime}} {processed_topic}" - batch_call replaces {{0.current_datetime}} with the returned date and time.
                 """,
-        before_model_callback=before_all_agent_model,
+        before_model_callback=profiler.before_model,
+        after_model_callback=profiler.after_model,
+        before_tool_callback=profiler.before_tool,
+        after_tool_callback=profiler.after_tool,
+        before_agent_callback=profiler.before_agent,
+        after_agent_callback=profiler.after_agent,
         tools=[tools],
     )
     return mcp_client_agent, tools
 
-async def call_agent(query):
+_runner = None
+_tools = None
+
+async def get_runner_async():
     """
-    Aracıyı bir sorguyla çağır.
-    
-    Args:
-        query: Kullanıcının arama yapacağı konu/sorgu.
+    document_creator akışını ve Runner'ı süreç başına bir kez oluşturur.
+
+    ADK agent'ları yalnızca tek bir üst agent'a bağlanabildiği için akış her
+    çağrıda yeniden kurulamaz; tekil ve toplu çağrılar aynı Runner'ı paylaşır.
+    Oturumlar (ve dolayısıyla artifact'ler) her konu için ayrıdır. MCP
+    sunucusu burada başlatılmaz; ilk MCP adımında bağlanılır ve sağlık
+    kontrolü oturum yöneticisi tarafından yapılır.
+
+    Returns:
+        (runner, tools) ikilisi.
     """
-    
-    mcp_client_agent, tools = await get_agent_async()
+    global _runner, _tools
+    if _runner is not None and _tools is not shared_toolset.toolset:
+        # Yeni bir event loop: paylaşılan toolset yenilendi, eskisini tutan Runner da yeniden kurulur
+        reset_runner()
+    if _runner is None:
+        mcp_client_agent, _tools = await get_agent_async()
+
+        # BLOCK ile durdurulan isteklerde kalan agent'lar (MCP adımı dahil) hiç çalıştırılmaz
+        main_agent = ShortCircuitSequentialAgent(
+            name="document_creator",
+            sub_agents=[search_agent, summary_search_agent, create_image_agent, create_document_agent, parallel_agents, mcp_client_agent],
+            before_agent_callback=profiler.before_agent,
+            after_agent_callback=profiler.after_agent,
+        )
 
-    main_agent = SequentialAgent(
-        name="document_creator",
-        sub_agents=[search_agent, summary_search_agent, create_image_agent, create_document_agent, parallel_agents, mcp_client_agent]
-    )
+        _runner = Runner(
+            agent=main_agent,
+            app_name=APP_NAME,
+            session_service=session_service,
+            artifact_service=artifact_service,
+        )
+    return _runner, _tools
 
-    runner = Runner(
-        agent=main_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
-        artifact_service=artifact_service,
-    )
+def reset_runner():
+    """
+    Önbellekteki Runner'ı bırakır; sonraki get_runner_async akışı yeniden kurar.
+
+    Paylaşılan MCP toolset'i kapatıldığında eski Runner kapalı toolset'i
+    tutmaya devam eder, bu yüzden ikisi birlikte sıfırlanır.
+    """
+    global _runner, _tools
+    if _runner is not None:
+        # Alt agent'lar yalnızca tek bir üst agent'a bağlanabilir; yeni akışa eklenebilmeleri için ayır
+        for sub_agent in _runner.agent.sub_agents:
+            sub_agent.parent_agent = None
+    _runner = None
+    _tools = None
+
+async def run_topic(runner, query, session_id, output_dir=""):
+    """
+    Tek bir konu için akışı kendi oturumunda çalıştırır.
+
+    Args:
+        runner: get_runner_async ile alınan Runner.
+        query: Kullanıcının arama yapacağı konu/sorgu.
+        session_id: Bu çalıştırmaya ait oturum kimliği.
+        output_dir: Diske yazılan dosyaların klasörü.
 
+    Returns:
+        Konu, oturum, süre ve sonuçları içeren sözlük.
+    """
     initial_state = {
         "mail_address": os.getenv("MAIL_ADDRESS"),
         "topic": query,
@@ -508,30 +556,124 @@ async def call_agent(query):
         "created_image": "",
         "created_document": "",
         "stop_sequential":False,
+        "output_dir": output_dir,
     }
     
     await session_service.create_session(
         app_name=APP_NAME,
         user_id=USER_ID,
-        session_id=SESSION_ID,
+        session_id=session_id,
         state=initial_state
     )
 
     # Kullanıcı içeriğini oluştur
     content = types.Content(role='user', parts=[types.Part(text=query)])
+
+    started = time.perf_counter()
+    responses = []
+    error = None
+    invocation_id = None
+    try:
+        # Aracıyı çalıştır
+        events = runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content)
+
+        # Olayları işle
+        async for event in events:
+            invocation_id = event.invocation_id
+            if event.is_final_response() and event.content and event.content.parts:
+                response = event.content.parts[0].text
+                print(f"🤖 [Agent] {event.author}: {response}")
+                responses.append({"author": event.author, "text": response})
+    except Exception as e:
+        import traceback
+        error = str(e)
+        print(f"Akış hatası ({query}): {e}")
+        print(traceback.format_exc())
+    elapsed = time.perf_counter() - started
+
+    session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    # Aşama süreleri ve token sayıları: profiles/run_<invocation_id>.json ve profiles/metrics.prom
+    profiler.finish_run(invocation_id, topic=query, session_id=session_id, error=error)
+    response_cache.finish_run(invocation_id)
+    return {
+        "topic": query,
+        "session_id": session_id,
+        "output_dir": output_dir,
+        "created_document": session.state.get("created_document") if session else None,
+        "stopped": bool(session.state.get("stop_sequential")) if session else False,
+        "elapsed_seconds": round(elapsed, 3),
+        "responses": responses,
+        "error": error,
+    }
+
+async def call_agent(query):
+    """
+    Aracıyı bir sorguyla çağır.
     
-    # Aracıyı çalıştır
-    events = runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content)
-    
-    # Olayları işle
-    async for event in events:
-        if event.is_final_response() and event.content and event.content.parts:
-            response = event.content.parts[0].text
-            print(f"🤖 [Agent] {event.author}: {response}")
+    Args:
+        query: Kullanıcının arama yapacağı konu/sorgu.
+    """
+    runner, _ = await get_runner_async()
+    result = await run_topic(runner, query, session_id=uuid.uuid4().hex)
+    # Kuyruktaki e-postaların gönderilmesini bekle
+    await mail_queue.drain()
+    print(f"💾 [Cache] {response_cache.stats()}")
+    print(f"📧 [Mail] {mail_queue.stats()}")
+    return result
+
+async def call_agent_batch(queries, max_concurrency=MAX_CONCURRENT_TOPICS):
+    """
+    Birden fazla konuyu sınırlı eşzamanlılıkla işler.
+
+    Her konu kendi oturumunda (ayrı state ve artifact alanı) ve OUTPUT_DIR
+    altındaki kendi klasöründe çalışır.
 
-    await tools.close()
+    Args:
+        queries: İşlenecek konuların listesi.
+        max_concurrency: Aynı anda çalışacak en fazla akış sayısı.
+
+    Returns:
+        Her konu için run_topic sonucu, queries ile aynı sırada.
+    """
+    runner, _ = await get_runner_async()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(query):
+        async with semaphore:
+            session_id = uuid.uuid4().hex
+            output_dir = os.path.join(OUTPUT_DIR, session_id)
+            os.makedirs(output_dir, exist_ok=True)
+            return await run_topic(runner, query, session_id, output_dir)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_one(query) for query in queries))
+    elapsed = time.perf_counter() - started
+    # Kuyruğu ve MCP oturumlarını bu event loop kapanmadan kapat; sonraki asyncio.run kendi kaynaklarını kurar
+    await mail_queue.close()
+    await shared_toolset.close()
+
+    sequential = sum(result["elapsed_seconds"] for result in results)
+    print(f"📊 [Batch] {len(results)} konu {elapsed:.1f} sn içinde işlendi (ardışık toplam: {sequential:.1f} sn)")
+    print(f"💾 [Cache] {response_cache.stats()}")
+    print(f"📧 [Mail] {mail_queue.stats()}")
+    return results
+
+async def shutdown():
+    """Süreç kapanırken paylaşılan kaynakları kapatır."""
+    await mail_queue.close()
+    await shared_toolset.close()
+    reset_runner()
+    artifact_service.close()
+
+async def main(query):
+    try:
+        return await call_agent(query)
+    finally:
+        await shutdown()
 
 if __name__ == "__main__":
-    import asyncio
-    #asyncio.run(call_agent("Yapay zekanin gelecekte getirecegi olasi tehditler"))
-    asyncio.run(call_agent("Kuresel iklimdeki degisikliklerin gelecekte olusturacagi tehditler"))
\ No newline at end of file
+    try:
+        #asyncio.run(main("Yapay zekanin gelecekte getirecegi olasi tehditler"))
+        asyncio.run(main("Kuresel iklimdeki degisikliklerin gelecekte olusturacagi tehditler"))
+    finally:
+        pdf_renderer.shutdown()
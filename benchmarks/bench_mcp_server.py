@@ -0,0 +1,272 @@
+"""
+Benchmark: MCPServer throughput and latency under load.
+
+Starts MCPServer.py as a subprocess (stdio, or streamable HTTP with
+--transport http) and drives it with synthetic MCP clients. Each of the
+`--clients` sessions keeps `--concurrency` calls in flight, choosing tools
+from a weighted mix:
+
+    add_numbers, get_current_datetime, append_to_file (into a temp dir),
+    load_web_page (against a local http.server stand-in)
+
+Prints p50/p95/p99 latency and calls per second per tool and overall. With
+--json the results, the settings and the current git commit are written to
+a file, so runs can be compared across commits.
+
+Usage:
+    python benchmarks/bench_mcp_server.py [--transport stdio|http] [--clients 1]
+        [--concurrency 8] [--calls 2000] [--mix add_numbers=4,get_current_datetime=2,append_to_file=2,load_web_page=1]
+        [--json bench_output.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "MCPServer.py")
+DEFAULT_MIX = "add_numbers=4,get_current_datetime=2,append_to_file=2,load_web_page=1"
+
+PAGE = (
+    "<html><body>"
+    + "".join(f"<p>Paragraph {i} of the benchmark page with enough words to be kept.</p>" for i in range(200))
+    + "</body></html>"
+).encode("utf-8")
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"bench"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"bench"')
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_page_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def tool_arguments(tool: str, index: int, work_dir: str, page_url: str) -> dict:
+    if tool == "add_numbers":
+        return {"a": index, "b": 1}
+    if tool == "get_current_datetime":
+        return {"dummy": "now"}
+    if tool == "append_to_file":
+        return {"directory": work_dir, "file_path": f"bench_{index % 8}.txt", "text": f"line {index}"}
+    if tool == "load_web_page":
+        return {"url": page_url}
+    raise ValueError(f"No synthetic arguments for tool '{tool}'")
+
+
+async def drive_session(session: ClientSession, plan: List[str], concurrency: int,
+                        work_dir: str, page_url: str, latencies: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+    queue = iter(enumerate(plan))
+
+    async def worker():
+        for index, tool in queue:
+            started = time.perf_counter()
+            try:
+                result = await session.call_tool(tool, tool_arguments(tool, index, work_dir, page_url))
+                text = result.content[0].text if result.content else ""
+                # MCPServer reports tool failures as JSON error dicts, not isError
+                failed = result.isError or text.startswith('{"error"') or '"status":"error"' in text
+            except Exception:
+                failed = True
+            latencies[tool].append(time.perf_counter() - started)
+            if failed:
+                errors[tool] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_clients(args, server_env: dict, work_dir: str, page_url: str) -> dict:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    tools, weights = list(mix), list(mix.values())
+    latencies = {tool: [] for tool in tools}
+    errors = {tool: 0 for tool in tools}
+    per_client = args.calls // args.clients
+
+    async def one_client(client_index: int) -> None:
+        plan = rng.choices(tools, weights, k=per_client)
+        if args.transport == "http":
+            connection = streamablehttp_client(args.url)
+        else:
+            connection = stdio_client(StdioServerParameters(
+                command=sys.executable, args=[SERVER], cwd=ROOT, env=server_env,
+            ))
+        async with connection as streams:
+            async with ClientSession(streams[0], streams[1]) as session:
+                await session.initialize()
+                await session.list_tools()
+                # Warm-up (imports, caches) is not measured
+                for tool in tools:
+                    await session.call_tool(tool, tool_arguments(tool, 0, work_dir, page_url))
+                connected.append(client_index)
+                if len(connected) == args.clients:
+                    all_connected.set()
+                await start.wait()
+                await drive_session(session, plan, args.concurrency, work_dir, page_url, latencies, errors)
+
+    connected: List[int] = []
+    all_connected = asyncio.Event()
+    start = asyncio.Event()
+    clients = [asyncio.ensure_future(one_client(i)) for i in range(args.clients)]
+    # Ölçüm, tüm istemciler bağlanıp ısındıktan sonra başlar
+    waiter = asyncio.ensure_future(all_connected.wait())
+    await asyncio.wait([waiter, *clients], return_when=asyncio.FIRST_COMPLETED)
+    if not waiter.done():
+        waiter.cancel()
+        await asyncio.gather(*clients)  # raises the failed client's error
+    start.set()
+    started = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "latencies": latencies, "errors": errors}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(run: dict) -> dict:
+    summary = {}
+    everything = []
+    for tool, values in run["latencies"].items():
+        if not values:
+            continue
+        everything.extend(values)
+        summary[tool] = _stats(values, run["errors"][tool], run["elapsed"])
+    summary["all"] = _stats(everything, sum(run["errors"].values()), run["elapsed"])
+    return summary
+
+
+def _stats(values: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "calls": len(values),
+        "errors": errors,
+        "calls_per_second": round(len(values) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio")
+    parser.add_argument("--clients", type=int, default=1, help="MCP sessions (one server process each on stdio)")
+    parser.add_argument("--concurrency", type=int, default=8, help="calls in flight per session")
+    parser.add_argument("--calls", type=int, default=2000, help="total measured calls")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight,...")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    page_server = start_page_server()
+    page_url = f"http://127.0.0.1:{page_server.server_port}/page.html"
+    with tempfile.TemporaryDirectory() as work_dir:
+        server_env = {
+            **os.environ,
+            "MCP_LOG_LEVEL": "WARNING",
+            # Keep the benchmark's caches out of the working tree
+            "WEB_CACHE_DIR": os.path.join(work_dir, "web_cache"),
+        }
+        http_server = None
+        if args.transport == "http":
+            port = free_port()
+            args.url = f"http://127.0.0.1:{port}/mcp"
+            http_server = subprocess.Popen(
+                [sys.executable, SERVER, "--transport", "http", "--port", str(port)],
+                cwd=ROOT, env=server_env,
+            )
+            deadline = time.time() + 60
+            while time.time() < deadline:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            run = asyncio.run(run_clients(args, server_env, work_dir, page_url))
+        finally:
+            if http_server is not None:
+                http_server.terminate()
+                http_server.wait(timeout=10)
+            page_server.shutdown()
+
+    summary = summarize(run)
+    print(f"transport={args.transport} clients={args.clients} concurrency={args.concurrency} "
+          f"elapsed={run['elapsed']:.2f}s")
+    print(f"{'tool':>22} {'calls':>7} {'errors':>6} {'calls/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for tool, stats in summary.items():
+        print(f"{tool:>22} {stats['calls']:>7} {stats['errors']:>6} {stats['calls_per_second']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "settings": {k: v for k, v in vars(args).items() if k != "json"},
+                "elapsed_seconds": round(run["elapsed"], 3),
+                "results": summary,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: MCPServer cold start.
+
+Spawns MCPServer.py over stdio several times and measures, from the client
+side, the time from spawn to the `initialize` response (handshake ready),
+to the first `tools/list` response, and to the first `add_numbers` result.
+Also reports the bare module import time of MCPServer in a fresh
+interpreter.
+
+Usage:
+    python benchmarks/bench_mcp_startup.py [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "MCPServer.py")
+
+
+async def cold_start() -> dict:
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[SERVER],
+        cwd=ROOT,
+        env={**os.environ, "MCP_LOG_LEVEL": "WARNING"},
+    )
+    started = time.perf_counter()
+    timings = {}
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            timings["handshake"] = time.perf_counter() - started
+            await session.list_tools()
+            timings["list_tools"] = time.perf_counter() - started
+            await session.call_tool("add_numbers", {"a": 1, "b": 2})
+            timings["first_call"] = time.perf_counter() - started
+    return timings
+
+
+def import_time() -> float:
+    code = (
+        "import sys, time; sys.argv = ['MCPServer']; t = time.perf_counter(); "
+        "import MCPServer; print(time.perf_counter() - t)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "MCP_LOG_LEVEL": "WARNING"},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.repeat)]
+    print(f"{'import MCPServer':>18}: median {statistics.median(imports) * 1000:8.1f} ms  min {min(imports) * 1000:8.1f} ms")
+
+    runs = [asyncio.run(cold_start()) for _ in range(args.repeat)]
+    for phase in ("handshake", "list_tools", "first_call"):
+        values = [run[phase] for run in runs]
+        print(f"{'spawn -> ' + phase:>18}: median {statistics.median(values) * 1000:8.1f} ms  min {min(values) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: PDF build time against report length.
+
+Renders synthetic reports of increasing length with utils.pdf_renderer, first
+serially and then concurrently through the worker pool, and prints the
+timings as a table.
+
+Usage:
+    python benchmarks/bench_pdf_render.py [--repeat 5] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import pdf_renderer  # noqa: E402
+
+PARAGRAPH = (
+    "Kuresel iklimdeki degisiklikler, deniz seviyesinin yukselmesi, asiri hava olaylari "
+    "ve tarimsal verimdeki dususler gibi bircok tehdidi beraberinde getirmektedir. "
+) * 4
+PARAGRAPH_COUNTS = [1, 10, 50, 200, 500]
+
+
+def make_image(size=(1024, 1024)) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, (40, 120, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bench_serial(image_data: bytes, repeat: int) -> None:
+    print(f"{'paragraphs':>10} {'chars':>8} {'median ms':>10} {'min ms':>8} {'pdf KB':>8}")
+    for count in PARAGRAPH_COUNTS:
+        text = "\n\n".join([PARAGRAPH] * count)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pdf = pdf_renderer.render_report_pdf("Benchmark", text, image_data)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{count:>10} {len(text):>8} {statistics.median(timings):>10.1f} {min(timings):>8.1f} {len(pdf) / 1024:>8.1f}")
+
+
+async def bench_pool(image_data: bytes, concurrency: int) -> None:
+    text = "\n\n".join([PARAGRAPH] * 50)
+    # İlk çağrı havuzu ısıtır
+    await pdf_renderer.render_report_pdf_async("Benchmark", text, image_data)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        pdf_renderer.render_report_pdf_async("Benchmark", text, image_data)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n{concurrency} concurrent builds (50 paragraphs, pool={pdf_renderer.PDF_RENDER_POOL}, "
+        f"workers={pdf_renderer.PDF_RENDER_WORKERS}): {elapsed * 1000:.1f} ms total"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    image_data = make_image()
+    bench_serial(image_data, args.repeat)
+    try:
+        asyncio.run(bench_pool(image_data, args.concurrency))
+    finally:
+        pdf_renderer.shutdown()
+
+
+if __name__ == "__main__":
+    main()
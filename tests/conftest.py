@@ -0,0 +1,23 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Tests import the application modules (MCPServer, utils.*) from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The caches and the artifact store are created when the modules are imported (and by
+# the MCPServer subprocesses, which inherit the environment); keep them out of the tree
+_STATE_DIR = tempfile.mkdtemp(prefix="gadk-tests-")
+os.environ.update({
+    "LLM_CACHE_DIR": os.path.join(_STATE_DIR, "llm_cache"),
+    "ARTIFACT_DIR": os.path.join(_STATE_DIR, "artifacts"),
+    "MCP_SCHEMA_CACHE": os.path.join(_STATE_DIR, "mcp_cache", "tool_schemas.json"),
+    "WEB_CACHE_DIR": os.path.join(_STATE_DIR, "web_cache"),
+    "PROFILE_DIR": os.path.join(_STATE_DIR, "profiles"),
+    "OUTPUT_DIR": os.path.join(_STATE_DIR, "reports"),
+})
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
@@ -0,0 +1,155 @@
+import errno
+import multiprocessing
+import time
+
+import pytest
+
+from utils import append_writer
+from utils.append_writer import AppendWriter
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    calls = []
+    real_fsync = append_writer.os.fsync
+    monkeypatch.setattr(append_writer.os, "fsync", lambda fd: calls.append(fd) or real_fsync(fd))
+    return calls
+
+
+@pytest.fixture
+def failing_writes(monkeypatch):
+    """Makes the next `failing_writes["left"]` os.write calls fail with ENOSPC."""
+    state = {"left": 0}
+    real_write = append_writer.os.write
+
+    def write(fd, data):
+        if state["left"] > 0:
+            state["left"] -= 1
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return real_write(fd, data)
+
+    monkeypatch.setattr(append_writer.os, "write", write)
+    return state
+
+
+def test_close_flushes_buffered_appends(tmp_path):
+    path = tmp_path / "out.txt"
+    writer = AppendWriter(flush_interval=60)
+    for i in range(3):
+        writer.append(str(path), f"line {i}\n")
+    assert path.read_bytes() == b""  # still buffered, the next group commit is a minute away
+    writer.close()
+    assert path.read_text(encoding="utf-8").splitlines() == ["line 0", "line 1", "line 2"]
+
+
+def test_flush_interval_commits_in_the_background(tmp_path):
+    path = tmp_path / "out.txt"
+    writer = AppendWriter(flush_interval=0.01)
+    writer.append(str(path), "line\n")
+    writer._stop.wait(0.2)
+    assert path.read_text(encoding="utf-8") == "line\n"
+    assert writer.commits >= 1
+    writer.close()
+
+
+def test_fsync_always_syncs_every_append(tmp_path, fsyncs):
+    writer = AppendWriter(flush_interval=60, fsync="always")
+    for i in range(3):
+        writer.append(str(tmp_path / "out.txt"), f"line {i}\n")
+    assert len(fsyncs) == 3
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8").count("\n") == 3
+    writer.close()
+
+
+def test_fsync_interval_syncs_on_group_commit_only(tmp_path, fsyncs):
+    writer = AppendWriter(flush_interval=60, fsync="interval")
+    for i in range(3):
+        writer.append(str(tmp_path / "out.txt"), f"line {i}\n")
+    assert fsyncs == []
+    writer.flush()
+    assert len(fsyncs) == 1
+    writer.close()
+
+
+def test_fsync_never_does_not_sync(tmp_path, fsyncs):
+    writer = AppendWriter(flush_interval=60, fsync="never")
+    writer.append(str(tmp_path / "out.txt"), "line\n")
+    writer.close()
+    assert fsyncs == []
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "line\n"
+
+
+def test_unknown_fsync_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AppendWriter(fsync="sometimes")
+
+
+def test_failed_group_commit_keeps_the_flusher_alive_and_retries(tmp_path, failing_writes):
+    path = tmp_path / "out.txt"
+    writer = AppendWriter(flush_interval=0.01)
+    failing_writes["left"] = 3
+    writer.append(str(path), "line 0\n")
+    writer.append(str(path), "line 1\n")
+
+    deadline = time.monotonic() + 5
+    while path.read_bytes() == b"" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer._flusher.is_alive()
+    assert writer.errors == 3
+    writer.append(str(path), "line 2\n")
+    writer.close()
+    assert path.read_text(encoding="utf-8").splitlines() == ["line 0", "line 1", "line 2"]
+
+
+def test_records_of_an_evicted_file_are_retried_after_a_failed_commit(tmp_path, failing_writes):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    writer = AppendWriter(max_open_files=1, flush_interval=60)
+    writer.append(str(first), "kept\n")
+    failing_writes["left"] = 1
+    writer.append(str(second), "other\n")  # evicts first.txt; committing it fails and its fd is closed
+    assert writer.errors == 1 and first.read_bytes() == b""
+
+    writer.flush()  # reopens first.txt instead of writing to the closed descriptor
+    assert first.read_text(encoding="utf-8") == "kept\n"
+    writer.close()
+    assert second.read_text(encoding="utf-8") == "other\n"
+
+
+def test_fsync_always_raises_and_drops_the_failed_append(tmp_path, failing_writes):
+    path = tmp_path / "out.txt"
+    writer = AppendWriter(flush_interval=60, fsync="always")
+    failing_writes["left"] = 1
+    with pytest.raises(OSError):
+        writer.append(str(path), "failed\n")
+    writer.append(str(path), "line\n")
+    writer.close()
+    assert path.read_text(encoding="utf-8") == "line\n"
+
+
+def _append_from_process(path: str, name: str, count: int, barrier) -> None:
+    writer = AppendWriter(flush_interval=60)
+    barrier.wait()  # both processes append at the same time
+    for i in range(count):
+        writer.append(path, f"{name} {i:05d} " + "x" * 200 + "\n")
+    writer.close()
+
+
+def test_processes_appending_to_one_file_do_not_interleave_records(tmp_path):
+    path = str(tmp_path / "shared.txt")
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(2)
+    processes = [
+        context.Process(target=_append_from_process, args=(path, name, 20000, barrier)) for name in ("a", "b")
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert len(lines) == 40000
+    for name in ("a", "b"):
+        own = [line for line in lines if line.startswith(f"{name} ")]
+        # every record is whole and each process's records keep their order
+        assert [int(line.split()[1]) for line in own] == list(range(20000))
+        assert all(line.endswith("x" * 200) and len(line) == 208 for line in own)
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import bench_mcp_server  # noqa: E402
+
+
+def test_parse_mix_defaults_weights_to_one():
+    assert bench_mcp_server.parse_mix("add_numbers=4, load_web_page") == {"add_numbers": 4, "load_web_page": 1}
+
+
+def test_summarize_reports_per_tool_and_overall_percentiles():
+    run = {
+        "latencies": {"add_numbers": [0.001 * i for i in range(1, 101)], "append_to_file": [], "x": [0.5]},
+        "errors": {"add_numbers": 2, "append_to_file": 0, "x": 1},
+        "elapsed": 2.0,
+    }
+    summary = bench_mcp_server.summarize(run)
+
+    assert set(summary) == {"add_numbers", "x", "all"}  # tools without calls are left out
+    assert summary["add_numbers"]["p50_ms"] == 51.0 and summary["add_numbers"]["p99_ms"] == 100.0
+    assert summary["add_numbers"]["calls_per_second"] == 50.0
+    assert summary["all"]["calls"] == 101 and summary["all"]["errors"] == 3
+
+
+def test_unknown_tool_in_the_mix_is_rejected():
+    with pytest.raises(ValueError):
+        bench_mcp_server.tool_arguments("send_mail", 0, "tmp", "http://localhost")
+
+
+def test_small_run_writes_comparable_json(tmp_path):
+    output = tmp_path / "bench.json"
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "bench_mcp_server.py"),
+         "--calls", "40", "--concurrency", "4", "--json", str(output)],
+        cwd=ROOT, check=True, capture_output=True, timeout=120,
+    )
+    result = json.loads(output.read_text(encoding="utf-8"))
+
+    assert result["settings"]["calls"] == 40 and result["commit"]
+    assert result["results"]["all"]["calls"] == 40
+    assert result["results"]["all"]["errors"] == 0
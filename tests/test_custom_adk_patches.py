@@ -0,0 +1,241 @@
+import asyncio
+
+from datetime import timedelta
+
+import anyio
+import pytest
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioServerParameters
+from google.adk.tools.mcp_tool.mcp_toolset import StreamableHTTPServerParams
+from mcp import types as mcp_types
+from mcp.shared.exceptions import McpError
+
+from utils import custom_adk_patches
+from utils.custom_adk_patches import CustomMCPToolset, CustomMcpSessionManager, ToolCatalog
+from utils.tool_call_cache import ToolCallCache
+
+
+class FakeSession:
+    """Stands in for a ClientSession; `alive=False` makes every request fail like a dead transport."""
+
+    def __init__(self, name):
+        self.name = name
+        self.alive = True
+        self.hang = False
+        self.calls = []
+
+    async def call_tool(self, name, arguments=None, read_timeout_seconds=None, **kwargs):
+        if not self.alive:
+            raise anyio.ClosedResourceError()
+        self.calls.append((name, read_timeout_seconds))
+        if self.hang:
+            # What ClientSession raises when read_timeout_seconds runs out
+            raise McpError(mcp_types.ErrorData(code=408, message="Timed out while waiting for response"))
+        return f"{self.name}:{name}"
+
+    async def send_ping(self):
+        if not self.alive:
+            raise anyio.ClosedResourceError()
+        return "pong"
+
+    async def list_tools(self):
+        self.calls.append(("tools/list", None))
+        return mcp_types.ListToolsResult(tools=[
+            mcp_types.Tool(name=name, inputSchema={"type": "object", "properties": {}})
+            for name in ("add_numbers", "get_current_datetime")
+        ])
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(custom_adk_patches, "MCP_RECONNECT_BACKOFF_SECONDS", 0)
+
+
+def _manager(params=None, **kwargs):
+    params = params or StdioServerParameters(command="python", args=["MCPServer.py"])
+    manager = CustomMcpSessionManager(params, **kwargs)
+    manager.connects = []
+    manager.failing_connects = 0
+    manager.connect_delay = 0.01  # lets concurrent callers overlap
+
+    async def connect(member):
+        if manager.connect_delay:
+            await asyncio.sleep(manager.connect_delay)
+        if manager.failing_connects > 0:
+            manager.failing_connects -= 1
+            raise OSError("server did not start")
+        member.session = FakeSession(f"s{len(manager.connects)}")
+        manager.connects.append(member.index)
+
+    async def disconnect(member):
+        member.session = None
+
+    manager._connect = connect
+    manager._disconnect = disconnect
+    return manager
+
+
+def test_concurrent_first_calls_open_one_pool():
+    manager = _manager(pool_size=2)
+
+    async def first_steps():
+        return await asyncio.gather(*(manager.create_session() for _ in range(5)))
+
+    sessions = asyncio.run(first_steps())
+    assert all(session is sessions[0] for session in sessions)
+    assert manager.connects == [0, 1]  # one connection per member, not one pool per caller
+
+
+def test_call_fails_over_when_a_member_cannot_reconnect():
+    manager = _manager(pool_size=2, reconnect_attempts=2)
+
+    async def scenario():
+        pool = await manager.create_session()
+        first, second = pool._members
+        first.session.alive = False
+        manager.failing_connects = 10
+        result = await pool.call_tool("add_numbers", {"a": 1, "b": 2})
+        # The member without a session is no longer picked, and ping skips it
+        later = [await pool.call_tool("get_current_datetime", {"dummy": str(i)}) for i in range(3)]
+        pong = await pool.send_ping()
+        return first, second, result, later, pong
+
+    first, second, result, later, pong = asyncio.run(scenario())
+    assert first.session is None
+    assert result == "s1:add_numbers"
+    assert later == ["s1:get_current_datetime"] * 3
+    assert pong == "pong"
+    assert len(second.session.calls) == 4
+
+
+def test_health_check_reconnects_a_member_left_out():
+    manager = _manager(pool_size=2, reconnect_attempts=1, health_check_interval=0)
+
+    async def scenario():
+        pool = await manager.create_session()
+        first = pool._members[0]
+        first.session.alive = False
+        manager.failing_connects = 1
+        await manager.create_session()  # ping fails, the reconnect fails too, the pool stays usable
+        left_out = first.session
+        await manager.create_session()  # next check: no session, so reconnect straight away
+        return left_out, first
+
+    left_out, first = asyncio.run(scenario())
+    assert left_out is None
+    assert first.session is not None and first.session.alive
+    assert first.reconnects == 1
+
+
+def test_call_raises_the_connect_error_when_no_member_can_reconnect():
+    manager = _manager(pool_size=1, reconnect_attempts=2)
+
+    async def scenario():
+        pool = await manager.create_session()
+        pool._members[0].session.alive = False
+        manager.failing_connects = 10
+        with pytest.raises(OSError):
+            await pool.call_tool("add_numbers", {"a": 1, "b": 2})
+        with pytest.raises(OSError):  # not AttributeError on the missing session
+            await pool.call_tool("add_numbers", {"a": 1, "b": 2})
+
+    asyncio.run(scenario())
+
+
+def test_default_read_timeout_depends_on_the_transport():
+    stdio = _manager()
+    http = _manager(StreamableHTTPServerParams(url="http://127.0.0.1:8765/mcp"))
+
+    async def call(manager):
+        pool = await manager.create_session()
+        await pool.call_tool("add_numbers", {"a": 1, "b": 2})
+        return pool._members[0].session.calls[0][1]
+
+    assert asyncio.run(call(stdio)) == timedelta(seconds=custom_adk_patches.CUSTOM_STDIO_TIMEOUT_SECONDS)
+    assert asyncio.run(call(http)) is None  # HTTP sessions had no read timeout and still don't
+
+
+def test_timeout_records_the_callers_timeout_not_the_adaptive_deadline():
+    manager = _manager(idempotent_tools=set())
+    manager.timeouts.overrides["slow_tool"] = 5
+
+    async def scenario():
+        pool = await manager.create_session()
+        pool._members[0].session.hang = True
+        with pytest.raises(McpError):
+            await pool.call_tool("slow_tool", {}, read_timeout_seconds=timedelta(seconds=42))
+        return pool._members[0].session.calls
+
+    calls = asyncio.run(scenario())
+    assert calls == [("slow_tool", timedelta(seconds=42))]
+    assert list(manager.timeouts._latencies["slow_tool"]) == [42]
+    assert manager.timeouts.timeouts == {"slow_tool": 1}
+
+
+def test_reconnect_backs_off_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(custom_adk_patches, "MCP_RECONNECT_BACKOFF_SECONDS", 0.5)
+    monkeypatch.setattr(custom_adk_patches, "MCP_RECONNECT_MAX_BACKOFF_SECONDS", 1.5)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    manager = _manager(pool_size=1, reconnect_attempts=5, call_cache=ToolCallCache(ttls={}))
+
+    async def scenario():
+        pool = await manager.create_session()
+        member = pool._members[0]
+        member.session.alive = False
+        manager.failing_connects = 3
+        manager.connect_delay = 0
+        monkeypatch.setattr(custom_adk_patches.asyncio, "sleep", fake_sleep)
+        try:
+            result = await pool.call_tool("add_numbers", {"a": 1, "b": 2})
+        finally:
+            monkeypatch.undo()
+        return member, result
+
+    member, result = asyncio.run(scenario())
+    assert sleeps == [0.5, 1.0, 1.5]
+    assert result == "s1:add_numbers"
+    assert member.reconnects == 1
+
+
+def test_tool_catalog_is_shared_until_the_server_reports_list_changed(monkeypatch):
+    monkeypatch.setattr(custom_adk_patches, "tool_catalog", ToolCatalog())
+    params = StdioServerParameters(command="python", args=["MCPServer.py"])
+    manager = _manager(params)
+
+    def toolset(**kwargs):
+        toolset = CustomMCPToolset(params, **kwargs)
+        toolset._mcp_session_manager = manager
+        return toolset
+
+    def lists():
+        return sum(call[0] == "tools/list" for member in manager._members for call in member.session.calls)
+
+    async def scenario():
+        first = [tool.name for tool in await toolset().get_tools()]
+        filtered = [tool.name for tool in await toolset(tool_filter=["add_numbers"]).get_tools()]
+        before = lists()
+        await manager._handle_message(mcp_types.ServerNotification(
+            mcp_types.ToolListChangedNotification(method="notifications/tools/list_changed")
+        ))
+        await toolset().get_tools()
+        return first, filtered, before, lists()
+
+    first, filtered, before, after = asyncio.run(scenario())
+    assert first == ["add_numbers", "get_current_datetime"]
+    assert filtered == ["add_numbers"]
+    assert before == 1  # the second toolset was served from the catalog
+    assert after == 2
+    assert custom_adk_patches.tool_catalog.stats() == {"entries": 1, "hits": 1, "misses": 2, "invalidations": 1}
+
+
+def test_tool_catalog_drops_entries_of_a_different_server_version():
+    catalog = ToolCatalog()
+    catalog.put("stdio:python MCPServer.py", "mcp-server/1.0", [])
+    catalog.observe_server("stdio:python MCPServer.py", "mcp-server/1.0")
+    assert catalog.get("stdio:python MCPServer.py") == []
+    catalog.observe_server("stdio:python MCPServer.py", "mcp-server/1.1")
+    assert catalog.get("stdio:python MCPServer.py") is None
+    assert catalog.invalidations == 1
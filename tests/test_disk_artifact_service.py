@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+
+from google.genai import types
+
+from utils.disk_artifact_service import DiskArtifactService
+
+SCOPE = {"app_name": "app", "user_id": "user", "session_id": "session"}
+
+
+def test_prune_between_blob_write_and_ref_update_keeps_the_blob(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path))
+    store_blob = service._store_blob
+    prunes = []
+
+    def store_blob_then_prune(data):
+        digest = store_blob(data)
+        # A prune from another thread lands right after the blob is written
+        thread = threading.Thread(target=lambda: prunes.append(service.prune()))
+        thread.start()
+        thread.join(timeout=0.5)
+        prunes.append(thread)
+        return digest
+
+    service._store_blob = store_blob_then_prune
+    part = types.Part.from_bytes(data=b"png bytes", mime_type="image/png")
+    version = asyncio.run(service.save_artifact(filename="image.png", artifact=part, **SCOPE))
+    thread = next(item for item in prunes if isinstance(item, threading.Thread))
+    thread.join()
+
+    loaded = asyncio.run(service.load_artifact(filename="image.png", **SCOPE))
+    assert version == 0
+    assert loaded.inline_data.data == b"png bytes"
+    assert all(result["blobs"] == 0 for result in prunes if isinstance(result, dict))
+    service.close()
+
+
+def test_prune_removes_unreferenced_blobs(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path), max_versions=1)
+    for data in (b"v0", b"v1"):
+        asyncio.run(service.save_artifact(
+            filename="report.pdf", artifact=types.Part.from_bytes(data=data, mime_type="application/pdf"), **SCOPE
+        ))
+    removed = service.prune()
+    blobs = [name for _, _, names in os.walk(tmp_path / "blobs") for name in names]
+    assert removed == {"refs": 0, "versions": 1, "blobs": 1}
+    assert len(blobs) == 1
+
+
+def _save(service, filename, part):
+    return asyncio.run(service.save_artifact(filename=filename, artifact=part, **SCOPE))
+
+
+def test_saving_the_same_bytes_returns_the_existing_version(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path))
+    pdf = types.Part.from_bytes(data=b"%PDF same", mime_type="application/pdf")
+    assert _save(service, "report.pdf", pdf) == 0
+    assert _save(service, "report.pdf", pdf) == 0
+    assert _save(service, "copy.pdf", pdf) == 0
+
+    blobs = [name for _, _, names in os.walk(tmp_path / "blobs") for name in names]
+    assert len(blobs) == 1  # stored once for both artifacts
+    assert asyncio.run(service.list_versions(filename="report.pdf", **SCOPE)) == [0]
+
+
+def test_versions_are_listed_and_loaded_by_number(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path))
+    for data in (b"v0", b"v1", b"v2"):
+        _save(service, "report.pdf", types.Part.from_bytes(data=data, mime_type="application/pdf"))
+
+    assert asyncio.run(service.list_versions(filename="report.pdf", **SCOPE)) == [0, 1, 2]
+    loaded = asyncio.run(service.load_artifact(filename="report.pdf", version=1, **SCOPE))
+    assert loaded.inline_data.data == b"v1"
+    assert asyncio.run(service.load_artifact(filename="report.pdf", version=7, **SCOPE)) is None
+    service.close()
+
+
+def test_text_and_binary_artifacts_round_trip(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path))
+    _save(service, "notes.txt", types.Part(text="Kediler ğüşıöç"))
+    _save(service, "image.png", types.Part.from_bytes(data=b"\x89PNG\x00\xff", mime_type="image/png"))
+
+    text = asyncio.run(service.load_artifact(filename="notes.txt", **SCOPE))
+    image = asyncio.run(service.load_artifact(filename="image.png", **SCOPE))
+    assert text.text == "Kediler ğüşıöç" and text.inline_data is None
+    assert image.inline_data.data == b"\x89PNG\x00\xff"
+    assert image.inline_data.mime_type == "image/png"
+    assert asyncio.run(service.list_artifact_keys(**SCOPE)) == ["image.png", "notes.txt"]
+    service.close()
+
+
+def test_open_artifact_view_maps_the_blob_without_copying(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path))
+    _save(service, "report.pdf", types.Part.from_bytes(data=b"%PDF body", mime_type="application/pdf"))
+
+    view = service.open_artifact_view(filename="report.pdf", **SCOPE)
+    again = service.open_artifact_view(filename="report.pdf", **SCOPE)
+    assert isinstance(view, memoryview) and view.readonly
+    assert view == b"%PDF body"
+    assert view.obj is again.obj  # both views share the cached memory map
+    assert service.open_artifact_view(filename="missing.pdf", **SCOPE) is None
+    del view, again
+    service.close()
+
+
+def test_prune_cannot_delete_a_blob_between_ref_lookup_and_open(tmp_path):
+    service = DiskArtifactService(root=str(tmp_path), max_versions=1)
+    _save(service, "report.pdf", types.Part.from_bytes(data=b"old", mime_type="application/pdf"))
+    entry = service._entry
+    threads = []
+
+    def entry_then_replace_and_prune(*args):
+        found = entry(*args)
+        # Another thread saves a new version and prunes the old blob right after the lookup
+        new = types.Part.from_bytes(data=b"new", mime_type="application/pdf")
+        thread = threading.Thread(target=lambda: (_save(service, "report.pdf", new), service.prune()))
+        thread.start()
+        thread.join(timeout=0.5)
+        threads.append(thread)
+        return found
+
+    service._entry = entry_then_replace_and_prune
+    view = service.open_artifact_view(filename="report.pdf", **SCOPE)
+    threads[0].join()
+
+    assert view == b"old"
+    del view
+    service.close()
@@ -0,0 +1,28 @@
+import os
+
+from utils.disk_lru import DiskLRUStore
+
+
+def test_scan_orders_by_last_use_and_sums_all_files(tmp_path):
+    store = DiskLRUStore(str(tmp_path), suffixes=(".txt", ".json"))
+    for i, key in enumerate(["a", "b", "c"]):
+        store.write(key, "x" * 10, ".txt")
+        store.write_json(key, {"n": i}, ".json")
+        os.utime(store.path(key), (i + 1, i + 1))
+    store.touch("a")
+
+    entries = store.scan()
+    assert [key for _, _, key in entries] == ["b", "c", "a"]
+    assert entries[0][1] == 10 + len('{"n": 1}')
+
+
+def test_write_reports_size_change_and_remove_frees_every_file(tmp_path):
+    store = DiskLRUStore(str(tmp_path / "cache"), suffixes=(".txt", ".json"))
+    assert store.write("k", "abc", ".txt") == 3
+    assert store.write("k", "abcdef", ".txt") == 3
+    store.write_json("k", [1], ".json")
+    assert store.read_text("k", ".txt") == "abcdef" and store.read_json("k", ".json") == [1]
+
+    assert store.remove("k") == 6 + 3
+    assert store.remove("k") is None
+    assert os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,87 @@
+import os
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from utils import llm_cache
+from utils.llm_cache import ResponseCache
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(model="m", contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+
+def _response(text: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_writes_do_not_rescan_directory_and_keep_lru_bound(tmp_path, monkeypatch):
+    cache = ResponseCache(directory=str(tmp_path), max_entries=5, sweep_every=100)
+    listdir_calls = []
+    real_listdir = os.listdir
+    monkeypatch.setattr(llm_cache.os, "listdir", lambda path: listdir_calls.append(path) or real_listdir(path))
+
+    for i in range(20):
+        cache.put_bytes(f"k{i}", b"x")
+    cache.get_bytes("k15")  # most recently used now
+    cache.put_bytes("k20", b"x")
+
+    assert listdir_calls == []
+    assert len(real_listdir(tmp_path)) == 5
+    assert cache.get_bytes("k15") == b"x"
+    assert cache.get_bytes("k16") is None
+
+
+def test_sweep_every_n_writes(tmp_path, monkeypatch):
+    cache = ResponseCache(directory=str(tmp_path), max_entries=50, sweep_every=4)
+    listdir_calls = []
+    real_listdir = os.listdir
+    monkeypatch.setattr(llm_cache.os, "listdir", lambda path: listdir_calls.append(path) or real_listdir(path))
+    for i in range(8):
+        cache.put_bytes(f"k{i}", b"x")
+    assert len(listdir_calls) == 2
+
+
+def test_cache_hit_is_reported_to_listeners(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    hits = []
+    cache.hit_listeners.append(lambda context, response: hits.append((context.agent_name, response)))
+    context = SimpleNamespace(invocation_id="inv", agent_name="summary_search")
+
+    assert cache.before_model(context, _request("topic")) is None
+    cache.after_model(context, _response("answer"))
+    cached = cache.before_model(context, _request("topic"))
+
+    assert cached.content.parts[0].text == "answer"
+    assert hits == [("summary_search", cached)]
+
+
+def test_finish_run_forgets_keys_of_unanswered_model_calls(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    failed = SimpleNamespace(invocation_id="inv1", agent_name="summary_search")
+    other = SimpleNamespace(invocation_id="inv2", agent_name="summary_search")
+    cache.before_model(failed, _request("topic 1"))  # the model call fails, after_model never runs
+    cache.before_model(other, _request("topic 2"))
+
+    cache.finish_run("inv1")
+    assert list(cache._pending) == [("inv2", "summary_search")]
+    cache.after_model(failed, _response("late"))
+    assert cache.before_model(failed, _request("topic 1")) is None  # nothing was stored
+
+
+def test_replayed_function_calls_get_new_ids(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    context = SimpleNamespace(invocation_id="inv", agent_name="file_agent")
+    call = types.Part(function_call=types.FunctionCall(id="adk-first", name="append_to_file", args={"text": "x"}))
+    cache.before_model(context, _request("topic"))
+    cache.after_model(context, LlmResponse(content=types.Content(role="model", parts=[call])))
+
+    first = cache.before_model(context, _request("topic"))
+    second = cache.before_model(context, _request("topic"))
+    ids = [response.content.parts[0].function_call.id for response in (first, second)]
+
+    assert first.content.parts[0].function_call.name == "append_to_file"
+    assert len({"adk-first", *ids}) == 3
+    assert all(call_id.startswith("adk-") for call_id in ids)
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
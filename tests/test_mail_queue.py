@@ -0,0 +1,185 @@
+import asyncio
+import socketserver
+import threading
+from email.mime.text import MIMEText
+
+import pytest
+
+from utils.mail_queue import MailQueue, SMTPConnectionPool
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/HELO, NOOP, MAIL, RCPT, DATA, RSET, QUIT."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections.append(self.connection)
+        self.reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 stand-in")
+            elif command == "NOOP":
+                server.noops += 1
+                self.reply("250 OK")
+            elif command.startswith(("MAIL", "RCPT", "RSET")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    body.append(data)
+                with server.lock:
+                    if server.reject_data > 0:
+                        server.reject_data -= 1
+                        self.reply("451 Try again later")
+                        continue
+                    server.messages.append(b"".join(body))
+                self.reply("250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = []
+        self.noops = 0
+        self.reject_data = 0
+
+    def drop_connections(self):
+        """Closes every client connection from the server side (idle timeout)."""
+        with self.lock:
+            for connection in self.connections:
+                try:
+                    connection.shutdown(2)
+                except OSError:
+                    pass
+            self.connections = []
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _queue(server, **kwargs):
+    pool = SMTPConnectionPool("127.0.0.1", server.server_address[1], starttls=False, size=1, timeout=5)
+    return MailQueue(pool, **kwargs)
+
+
+def _message(i):
+    message = MIMEText(f"report {i}")
+    message["Subject"] = f"Report {i}"
+    return message
+
+
+def test_idle_connection_is_checked_with_noop_and_reopened_when_dropped(smtp_server):
+    async def scenario():
+        queue = _queue(smtp_server)
+        assert await queue.enqueue(_message(1), "a@example.com", ["b@example.com"])
+        assert await queue.enqueue(_message(2), "a@example.com", ["b@example.com"])
+        reused = queue.pool.connects
+        smtp_server.drop_connections()
+        assert await queue.enqueue(_message(3), "a@example.com", ["b@example.com"])
+        await queue.close()
+        return reused, queue.pool.connects
+
+    reused, total = asyncio.run(scenario())
+    assert reused == 1  # the second mail went over the pooled connection
+    assert total == 2  # NOOP found the dropped connection and a new one was opened
+    assert smtp_server.noops == 1  # answered before the drop; the NOOP after it failed
+    assert len(smtp_server.messages) == 3
+
+
+def test_transient_failures_are_retried_with_backoff(smtp_server):
+    smtp_server.reject_data = 2
+
+    async def scenario():
+        queue = _queue(smtp_server, max_retries=3, retry_backoff_seconds=0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = await queue.enqueue(_message(1), "a@example.com", ["b@example.com"])
+        elapsed = loop.time() - started
+        await queue.close()
+        return sent, elapsed, queue.stats()
+
+    sent, elapsed, stats = asyncio.run(scenario())
+    assert sent is True
+    assert stats["retried"] == 2 and stats["sent"] == 1 and stats["failed"] == 0
+    assert elapsed >= 0.05 + 0.1  # backoff doubles: 0.05 s, then 0.1 s
+
+
+def test_gives_up_after_max_retries(smtp_server):
+    smtp_server.reject_data = 10
+
+    async def scenario():
+        queue = _queue(smtp_server, max_retries=2, retry_backoff_seconds=0.01)
+        sent = await queue.enqueue(_message(1), "a@example.com", ["b@example.com"])
+        await queue.close()
+        return sent, queue.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent is False
+    assert stats["failed"] == 1 and stats["retried"] == 2
+    assert smtp_server.messages == []
+
+
+def test_close_drains_queue_and_pending_retries(smtp_server):
+    smtp_server.reject_data = 1
+
+    async def scenario():
+        queue = _queue(smtp_server, batch_size=10, retry_backoff_seconds=0.05)
+        futures = [queue.enqueue(_message(i), "a@example.com", ["b@example.com"]) for i in range(5)]
+        await queue.close()  # returns only after every mail, including the retried one, is delivered
+        return [future.result() for future in futures], queue.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [True] * 5
+    assert len(smtp_server.messages) == 5
+    assert stats["batches"] == 2  # one batch of five, then the retried mail
+
+
+def test_queue_is_recreated_on_a_new_event_loop(smtp_server):
+    queue = _queue(smtp_server)
+
+    async def send_and_drain(i):
+        future = queue.enqueue(_message(i), "a@example.com", ["b@example.com"])
+        await queue.drain()  # no close(): the workers stay bound to this loop
+        return future.result()
+
+    assert asyncio.run(send_and_drain(1)) is True
+    assert asyncio.run(send_and_drain(2)) is True  # used to fail: Event bound to a different loop
+    asyncio.run(queue.close())
+    assert len(smtp_server.messages) == 2
+    assert queue.stats()["sent"] == 2
+
+
+def test_messages_left_on_a_finished_loop_are_sent_from_the_next_one(smtp_server):
+    queue = _queue(smtp_server)
+
+    async def enqueue_only():
+        queue.enqueue(_message(1), "a@example.com", ["b@example.com"])  # the loop ends before a worker runs
+
+    asyncio.run(enqueue_only())
+    asyncio.run(queue.close())
+    assert len(smtp_server.messages) == 1
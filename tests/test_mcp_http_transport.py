@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+from google.adk.tools.mcp_tool.mcp_toolset import StreamableHTTPServerParams
+
+from utils.custom_adk_patches import CustomMcpSessionManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    """MCPServer.py --transport http in a subprocess; yields its /mcp URL."""
+    port = _free_port()
+    env = {**os.environ, "MCP_LOG_LEVEL": "WARNING", "MCP_SCHEMA_CACHE": str(tmp_path / "schemas.json")}
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "MCPServer.py"), "--transport", "http", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                pytest.fail("MCPServer did not start listening")
+            time.sleep(0.2)
+    yield f"http://127.0.0.1:{port}/mcp"
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def test_several_clients_share_one_warm_http_server(http_server):
+    params = StreamableHTTPServerParams(url=http_server)
+
+    async def client(a):
+        manager = CustomMcpSessionManager(params, pool_size=2)
+        try:
+            session = await manager.create_session()
+            tools = await session.list_tools()
+            results = await asyncio.gather(*(session.call_tool("add_numbers", {"a": a, "b": b}) for b in range(3)))
+            return manager.server, {tool.name for tool in tools.tools}, [result.content[0].text for result in results]
+        finally:
+            await manager.close()
+
+    async def scenario():
+        clients = await asyncio.gather(client(10), client(20))
+        manager = CustomMcpSessionManager(params, pool_size=1)
+        try:
+            stats = await (await manager.create_session()).call_tool("server_stats", {})
+        finally:
+            await manager.close()
+        return clients, json.loads(stats.content[0].text)
+
+    clients, stats = asyncio.run(scenario())
+    for (server, tools, results), a in zip(clients, (10, 20)):
+        assert server is not None
+        assert {"add_numbers", "batch_call", "read_result_page"} <= tools
+        assert results == [json.dumps({"result": a + b + 1}, separators=(",", ":")) for b in range(3)]
+    # Five sessions, one process: every call was counted by the same server
+    assert stats["tools"]["add_numbers"]["calls"] == 6
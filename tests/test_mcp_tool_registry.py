@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from utils.mcp_tool_registry import ToolRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_calls = []
+
+
+def add(a: int, b: int) -> dict:
+    return {"result": a + b, "pid": os.getpid()}
+
+
+def remember(value: str) -> dict:
+    # Uses module state, so it has to run in the server process
+    _calls.append(value)
+    return {"calls": len(_calls), "pid": os.getpid()}
+
+
+def returns_none(value: str):
+    return None
+
+
+def returns_zero(value: str) -> int:
+    return 0
+
+
+def returns_empty(value: str, suffix: str = "") -> str:
+    return suffix
+
+
+def returns_list(a: int, b: int = 2) -> list:
+    return [a, b]
+
+
+def with_context(value: str, tool_context=None) -> dict:
+    return {"value": value, "has_context": tool_context is not None}
+
+
+async def async_echo(value: str) -> dict:
+    return {"value": value}
+
+
+async def async_with_context(value: str, tool_context=None) -> dict:
+    return {"value": value, "has_context": tool_context is not None}
+
+
+@pytest.mark.parametrize("func, arguments", [
+    (returns_none, {"value": "x"}),
+    (returns_zero, {"value": "x"}),
+    (returns_empty, {"value": "x"}),
+    (returns_list, {"a": 1}),
+    (returns_list, {"a": 1, "b": 5}),
+    (returns_list, {"b": 5}),  # missing mandatory argument
+    (with_context, {"value": "x"}),
+    (async_echo, {"value": "x"}),
+    (async_echo, {}),  # async, missing mandatory argument
+    (async_with_context, {"value": "x"}),
+])
+def test_fast_path_matches_function_tool(func, arguments):
+    registry = ToolRegistry(pool="thread", max_workers=1)
+    registry.tool(func)
+
+    async def scenario():
+        fast = await registry.call(func.__name__, dict(arguments))
+        via_tool = await registry.get(func.__name__).run_async(args=dict(arguments), tool_context=None)
+        return fast, via_tool
+
+    try:
+        fast, via_tool = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+    assert fast == via_tool
+    assert type(fast) is type(via_tool)
+
+
+@pytest.mark.parametrize("func, taken", [
+    (returns_list, {"a": 1}),  # sync: the fast path
+    (async_echo, {"value": "x"}),  # async: awaited directly
+])
+def test_arguments_the_tool_does_not_take_are_dropped(func, taken):
+    registry = ToolRegistry(pool="thread", max_workers=1)
+    registry.tool(func)
+
+    async def scenario():
+        result = await registry.call(func.__name__, {"a": 1, "value": "x", "unexpected": True})
+        expected = await registry.get(func.__name__).run_async(args=dict(taken), tool_context=None)
+        return result, expected
+
+    try:
+        result, expected = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+    assert result == expected
+
+
+@pytest.mark.parametrize("func, arguments", [
+    (async_echo, {"value": "x"}),
+    (async_echo, {}),
+    (returns_list, {"b": 5}),
+])
+def test_calls_do_not_build_the_function_tool(func, arguments):
+    registry = ToolRegistry(pool="thread", max_workers=1)
+    registry.tool(func)
+    try:
+        asyncio.run(registry.call(func.__name__, arguments))
+    finally:
+        registry.shutdown()
+    assert registry._entries[func.__name__]._tool is None
+
+
+def test_failed_warm_up_is_retried_by_the_next_listing():
+    registry = ToolRegistry()
+    registry.tool(add)
+    list_tools = registry.list_tools
+    attempts = []
+
+    def flaky_list_tools():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("schema conversion failed")
+        return list_tools()
+
+    registry.list_tools = flaky_list_tools
+
+    async def scenario():
+        with pytest.raises(OSError):
+            await registry.list_tools_async()
+        return await registry.list_tools_async()
+
+    tools = asyncio.run(scenario())
+    assert [tool.name for tool in tools] == ["add"]
+    assert len(attempts) == 2
+
+
+def _registry(pool):
+    registry = ToolRegistry(pool=pool, max_workers=2)
+    registry.tool(add)
+    registry.tool(remember, thread_only=True)
+    return registry
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_call_under_both_pool_kinds(pool):
+    registry = _registry(pool)
+    _calls.clear()
+
+    async def scenario():
+        registry.start_pool()
+        added = await asyncio.gather(*(registry.call("add", {"a": i, "b": 1}) for i in range(4)))
+        remembered = [await registry.call("remember", {"value": str(i)}) for i in range(3)]
+        return added, remembered
+
+    try:
+        added, remembered = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+
+    assert [result["result"] for result in added] == [1, 2, 3, 4]
+    in_worker_processes = all(result["pid"] != os.getpid() for result in added)
+    assert in_worker_processes == (pool == "process")
+    # thread_only tools see the server's state whatever the pool
+    assert [result["calls"] for result in remembered] == [1, 2, 3]
+    assert all(result["pid"] == os.getpid() for result in remembered)
+
+
+def test_unknown_pool_is_rejected():
+    with pytest.raises(ValueError):
+        ToolRegistry(pool="fork")
+
+
+def test_stdio_server_with_process_pool_answers_calls(tmp_path):
+    env = {
+        **os.environ,
+        "MCP_TOOL_POOL": "process",
+        "MCP_LOG_LEVEL": "WARNING",
+        "MCP_SCHEMA_CACHE": str(tmp_path / "schemas.json"),
+    }
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(ROOT, "MCPServer.py")], cwd=ROOT, env=env)
+
+    async def scenario():
+        async with stdio_client(params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                added = await asyncio.wait_for(session.call_tool("add_numbers", {"a": 1, "b": 2}), 60)
+                page = await session.call_tool("read_result_page", {"cursor": "missing:0"})
+                stats = await session.call_tool("server_stats", {"tool": "add_numbers"})
+                schemas = {tool.name: tool.inputSchema for tool in (await session.list_tools()).tools}
+                return added.content[0].text, json.loads(page.content[0].text), json.loads(stats.content[0].text), schemas
+
+    added, page, stats, schemas = asyncio.run(scenario())
+    assert added == '{"result":4}'
+    assert page["status"] == "error"
+    assert list(stats["tools"]) == ["add_numbers"]
+    # Every tool has an object schema with properties, which Gemini function declarations require
+    assert all(schema["type"] == "object" and schema["properties"] for schema in schemas.values())
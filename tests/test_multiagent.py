@@ -0,0 +1,139 @@
+import asyncio
+import os
+
+from google.adk.runners import Runner
+
+import MultiAgent
+from utils.pipeline_agents import ShortCircuitSequentialAgent, ToolStepAgent
+from utils.shared_toolset import SharedMCPToolset
+
+
+def test_image_semaphore_works_on_each_new_event_loop():
+    async def hold():
+        async with MultiAgent.get_image_semaphore():
+            await asyncio.sleep(0.01)
+
+    async def contend():
+        # More holders than slots, so some wait and the semaphore binds to the loop
+        await asyncio.gather(*(hold() for _ in range(MultiAgent.IMAGE_GENERATION_CONCURRENCY + 2)))
+        return MultiAgent.get_image_semaphore()
+
+    first = asyncio.run(contend())
+    second = asyncio.run(contend())  # a module-level semaphore raises "bound to a different event loop" here
+    assert first is not second
+
+
+def test_runner_does_not_start_the_mcp_server():
+    async def build():
+        runner, tools = await MultiAgent.get_runner_async()
+        return tools
+
+    tools = asyncio.run(build())
+    # Connected on the first MCP step only, so a run stopped before it never starts the server
+    assert tools._mcp_session_manager._session is None
+    assert tools.tool_filter == ["append_to_file", "get_current_datetime", "batch_call"]  # no operator tools
+
+
+def test_shutdown_rebuilds_the_runner_with_a_fresh_toolset():
+    async def build():
+        return await MultiAgent.get_runner_async()
+
+    runner, tools = asyncio.run(build())
+    asyncio.run(MultiAgent.shutdown())
+    new_runner, new_tools = asyncio.run(build())
+    # The old runner holds the closed toolset, so both are replaced
+    assert new_runner is not runner and new_tools is not tools
+    assert new_tools is MultiAgent.shared_toolset.toolset
+    assert new_runner.agent.sub_agents[-1].tools == [new_tools]
+
+
+def test_batch_runs_topics_in_their_own_sessions_with_bounded_concurrency(monkeypatch, tmp_path):
+    running = []
+    peak = []
+
+    async def write_report(tool_context):
+        running.append(tool_context.state["topic"])
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.remove(tool_context.state["topic"])
+        path = os.path.join(tool_context.state["output_dir"], "report.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(tool_context.state["topic"])
+        tool_context.state["created_document"] = path
+
+    pipeline = ShortCircuitSequentialAgent(name="document_creator", sub_agents=[
+        ToolStepAgent(name="write_report", func=write_report),
+    ])
+    runner = Runner(agent=pipeline, app_name=MultiAgent.APP_NAME, session_service=MultiAgent.session_service)
+
+    async def get_runner_async():
+        return runner, None
+
+    monkeypatch.setattr(MultiAgent, "get_runner_async", get_runner_async)
+    monkeypatch.setattr(MultiAgent, "OUTPUT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(MultiAgent.profiler, "output_dir", str(tmp_path / "profiles"))
+
+    topics = [f"konu {i}" for i in range(5)]
+    results = asyncio.run(MultiAgent.call_agent_batch(topics, max_concurrency=2))
+
+    assert [result["topic"] for result in results] == topics
+    assert len({result["session_id"] for result in results}) == 5
+    for result in results:
+        assert result["error"] is None
+        assert os.path.dirname(result["created_document"]) == result["output_dir"]
+        with open(result["created_document"], encoding="utf-8") as f:
+            assert f.read() == result["topic"]
+    assert max(peak) == 2
+
+
+def test_runner_is_rebuilt_on_a_new_event_loop():
+    async def build():
+        return await MultiAgent.get_runner_async()
+
+    async def build_twice():
+        return await build(), await build()
+
+    (runner, tools), (same_runner, same_tools) = asyncio.run(build_twice())
+    new_runner, new_tools = asyncio.run(build())
+    assert same_runner is runner and same_tools is tools
+    # The old toolset's sessions belonged to the finished loop
+    assert new_runner is not runner and new_tools is not tools
+    assert new_runner.agent.sub_agents[-1].tools == [new_tools]
+
+
+def test_two_batches_in_a_row_each_get_an_open_toolset(monkeypatch, tmp_path):
+    toolsets = []
+
+    class FakeToolset:
+        def __init__(self):
+            self.closed = False
+            toolsets.append(self)
+
+        async def close(self):
+            self.closed = True
+
+    def use_toolset(tool_context):
+        toolset = MultiAgent.shared_toolset.toolset
+        assert not toolset.closed  # an error here shows up in the batch result
+
+    runner = Runner(
+        agent=ShortCircuitSequentialAgent(name="document_creator", sub_agents=[
+            ToolStepAgent(name="mcp_client", func=use_toolset),
+        ]),
+        app_name=MultiAgent.APP_NAME,
+        session_service=MultiAgent.session_service,
+    )
+
+    async def get_runner_async():
+        return runner, None
+
+    monkeypatch.setattr(MultiAgent, "get_runner_async", get_runner_async)
+    monkeypatch.setattr(MultiAgent, "shared_toolset", SharedMCPToolset(FakeToolset))
+    monkeypatch.setattr(MultiAgent, "OUTPUT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(MultiAgent.profiler, "output_dir", str(tmp_path / "profiles"))
+
+    first = asyncio.run(MultiAgent.call_agent_batch(["a", "b"]))
+    second = asyncio.run(MultiAgent.call_agent_batch(["c"]))
+
+    assert [result["error"] for result in first + second] == [None, None, None]
+    assert len(toolsets) == 2 and all(toolset.closed for toolset in toolsets)
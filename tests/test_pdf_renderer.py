@@ -0,0 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import pdf_renderer
+
+
+def test_default_pool_is_threads_and_renders_pdf():
+    try:
+        pdf = asyncio.run(pdf_renderer.render_report_pdf_async("Title", "First paragraph\n\nSecond paragraph"))
+        assert isinstance(pdf_renderer._get_executor(), ThreadPoolExecutor)
+    finally:
+        pdf_renderer.shutdown()
+    assert pdf.startswith(b"%PDF")
@@ -0,0 +1,87 @@
+import asyncio
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from utils.pipeline_agents import ShortCircuitSequentialAgent, ToolStepAgent
+
+
+def _run(agent, state):
+    """Runs `agent` in a fresh session; returns (event authors, final state)."""
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name="test", session_service=session_service)
+
+    async def scenario():
+        session = await session_service.create_session(app_name="test", user_id="u", state=state)
+        message = types.Content(role="user", parts=[types.Part(text="topic")])
+        authors = [event.author async for event in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+        session = await session_service.get_session(app_name="test", user_id="u", session_id=session.id)
+        return authors, session.state
+
+    return asyncio.run(scenario())
+
+
+def test_tool_step_passes_args_state_and_tool_context():
+    calls = []
+
+    def create_document(title, topic, tool_context):
+        calls.append((title, topic))
+        tool_context.state["created_document"] = f"{title}.pdf"
+        return {"status": "success"}
+
+    agent = ToolStepAgent(
+        name="create_document",
+        func=create_document,
+        args={"title": "rapor"},
+        state_args={"topic": "processed_topic"},
+        output_key="create_document_result",
+    )
+    authors, state = _run(agent, {"processed_topic": "kediler"})
+
+    assert calls == [("rapor", "kediler")]
+    assert authors == ["create_document"]
+    assert state["created_document"] == "rapor.pdf"
+    assert state["create_document_result"] == {"status": "success"}
+
+
+def test_tool_step_awaits_async_functions():
+    async def send_mail():
+        await asyncio.sleep(0)
+        return {"status": "queued"}
+
+    _, state = _run(ToolStepAgent(name="send_mail", func=send_mail, output_key="mail"), {})
+    assert state["mail"] == {"status": "queued"}
+
+
+def _step(name, ran, stop=False):
+    def func(tool_context):
+        ran.append(name)
+        if stop:
+            tool_context.state["stop_sequential"] = True
+
+    func.__name__ = name
+    return ToolStepAgent(name=name, func=func)
+
+
+def test_sequence_stops_after_the_agent_that_sets_stop_key():
+    ran = []
+    pipeline = ShortCircuitSequentialAgent(
+        name="pipeline",
+        sub_agents=[_step("search", ran), _step("block", ran, stop=True), _step("create_document", ran),
+                    _step("send_mail", ran)],
+    )
+    authors, state = _run(pipeline, {"stop_sequential": False})
+
+    assert ran == ["search", "block"]
+    assert authors == ["search", "block"]
+    assert state["stop_sequential"] is True
+
+
+def test_sequence_runs_every_agent_when_stop_key_stays_unset():
+    ran = []
+    pipeline = ShortCircuitSequentialAgent(
+        name="pipeline", stop_key="blocked", sub_agents=[_step("a", ran, stop=True), _step("b", ran)],
+    )
+    _run(pipeline, {})
+    assert ran == ["a", "b"]  # stop_sequential is not this pipeline's key
@@ -0,0 +1,105 @@
+import json
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from utils.llm_cache import ResponseCache
+from utils.pipeline_profiler import PipelineProfiler
+
+
+def _context(agent, invocation_id="inv"):
+    return SimpleNamespace(invocation_id=invocation_id, agent_name=agent)
+
+
+def _response(text, prompt_tokens=0, output_tokens=0):
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=output_tokens
+        ),
+    )
+
+
+def _request(text):
+    return LlmRequest(model="m", contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+
+def _run_pipeline(profiler, invocation_id="inv"):
+    agent = _context("search", invocation_id)
+    tool_context = SimpleNamespace(invocation_id=invocation_id, function_call_id="call-1", agent_name="search")
+    profiler.before_agent(agent)
+    profiler.before_model(agent, _request("topic"))
+    profiler.after_model(agent, _response("answer", prompt_tokens=12, output_tokens=5))
+    profiler.before_tool(SimpleNamespace(name="google_search"), {}, tool_context)
+    profiler.after_tool(SimpleNamespace(name="google_search"), {}, tool_context, {"result": "ok"})
+    profiler.after_agent(agent)
+
+
+def test_finish_run_writes_the_trace_and_totals(tmp_path):
+    profiler = PipelineProfiler(output_dir=str(tmp_path))
+    _run_pipeline(profiler)
+    profiler.before_agent(_context("create_image"))  # never finished, e.g. the run failed here
+
+    path = profiler.finish_run("inv", topic="kediler")
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+
+    assert trace["topic"] == "kediler"
+    assert [(span["kind"], span["name"]) for span in trace["spans"]] == [
+        ("model", "search"), ("tool", "google_search"), ("agent", "search"),
+    ]
+    assert trace["spans"][0]["model"] == "m"
+    assert trace["totals"]["input_tokens"] == 12 and trace["totals"]["output_tokens"] == 5
+    assert set(trace["totals"]["by_stage_ms"]) == {"model:search", "tool:google_search", "agent:search"}
+    assert profiler.finish_run("inv") is None  # the run and its open spans are gone
+    assert profiler._open == {}
+
+
+def test_prometheus_file_aggregates_runs(tmp_path):
+    profiler = PipelineProfiler(output_dir=str(tmp_path))
+    _run_pipeline(profiler, "inv1")
+    _run_pipeline(profiler, "inv2")
+    profiler.finish_run("inv1")
+    profiler.finish_run("inv2")
+
+    text = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+    labels = 'kind="model",name="search"'
+    assert f'pipeline_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"pipeline_stage_duration_seconds_count{{{labels}}} 2" in text
+    assert 'pipeline_model_tokens_total{agent="search",direction="input"} 24' in text
+    assert 'pipeline_model_tokens_total{agent="search",direction="output"} 10' in text
+
+    buckets = [
+        int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+        if line.startswith(f"pipeline_stage_duration_seconds_bucket{{{labels}")
+    ]
+    assert buckets == sorted(buckets)  # cumulative
+
+
+def test_cache_hits_are_recorded_as_cached_model_spans(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path / "cache"))
+    profiler = PipelineProfiler(output_dir=str(tmp_path / "profiles"))
+    cache.hit_listeners.append(profiler.record_cache_hit)
+    context = _context("summary_search")
+
+    assert cache.before_model(context, _request("topic")) is None
+    cache.after_model(context, _response("answer"))
+    profiler.before_model(context, _request("topic"))  # opened before the cache answered
+    assert cache.before_model(context, _request("topic")) is not None
+
+    with open(profiler.finish_run("inv"), encoding="utf-8") as f:
+        trace = json.load(f)
+    assert trace["spans"] == [{
+        "kind": "model", "name": "summary_search", "start_offset_ms": trace["spans"][0]["start_offset_ms"],
+        "duration_ms": 0.0, "cached": True, "input_tokens": 0, "output_tokens": 0,
+    }]
+    assert trace["totals"]["cached_model_calls"] == 1
+    assert 'pipeline_model_cache_hits_total{agent="summary_search"} 1' in profiler.prometheus_text()
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = PipelineProfiler(output_dir=str(tmp_path / "profiles"), enabled=False)
+    _run_pipeline(profiler)
+    assert profiler.finish_run("inv") is None
+    assert not (tmp_path / "profiles").exists()
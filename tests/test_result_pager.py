@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from utils import result_pager as result_pager_module
+from utils.result_pager import ResultPager, ResultTooLargeError
+
+
+def _read_all(pager, page, continuation):
+    pages = [page]
+    while continuation and continuation["next_cursor"]:
+        page, continuation = pager.read(continuation["next_cursor"])
+        pages.append(page)
+    return pages, continuation
+
+
+def test_small_result_is_returned_whole():
+    pager = ResultPager(page_chars=100)
+    page, continuation = pager.paginate({"status": "success", "text": "short"})
+    assert json.loads(page) == {"status": "success", "text": "short"}
+    assert continuation is None
+    assert pager.stats()["pending_results"] == 0
+
+
+def test_pages_join_to_the_compact_json():
+    value = {"status": "success", "items": [{"n": i, "text": "ğüşiöç " * 3} for i in range(200)]}
+    pager = ResultPager(page_chars=500)
+    pages, last = _read_all(pager, *pager.paginate(value))
+
+    expected = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    assert "".join(pages) == expected
+    assert all(len(page) == 500 for page in pages[:-1])
+    assert last["next_cursor"] is None and last["total_chars"] == len(expected)
+
+
+def test_result_known_to_be_too_large_is_rejected_before_encoding(monkeypatch):
+    monkeypatch.setattr(result_pager_module, "_iterencode", None)  # must not be reached
+    pager = ResultPager(page_chars=100, max_chars=1000)
+    with pytest.raises(ResultTooLargeError):
+        pager.paginate({"text": "x" * 5000})
+    assert pager.stats()["too_large"] == 1
+    assert pager.stats()["pending_results"] == 0
+
+
+def test_result_larger_than_max_chars_after_escaping_is_an_error_not_a_dead_cursor():
+    pager = ResultPager(page_chars=100, max_chars=1000)
+    page, continuation = pager.paginate({"text": "\n" * 600})  # 600 characters, 1200 once escaped
+    assert len(page) == 100
+    with pytest.raises(ResultTooLargeError):
+        _read_all(pager, page, continuation)
+    assert pager.stats()["too_large"] == 1
+    with pytest.raises(KeyError):
+        pager.read(continuation["next_cursor"])
+
+
+def test_large_string_result_is_escaped_a_page_at_a_time():
+    value = "kelime \"alıntı\"\n" * 50000
+    pager = ResultPager(page_chars=1000)
+    page, continuation = pager.paginate(value)
+    pending = next(iter(pager._results.values()))
+    assert len(pending.carry) < 2 * 1000  # not the rest of the 850,000 character text
+
+    pages, _ = _read_all(pager, page, continuation)
+    assert "".join(pages) == json.dumps(value, ensure_ascii=False)
+
+
+def test_pages_are_encoded_lazily(monkeypatch):
+    encoded = []
+    real_encoder = result_pager_module._ENCODER
+
+    class CountingEncoder:
+        def iterencode(self, value):
+            for chunk in real_encoder.iterencode(value):
+                encoded.append(len(chunk))
+                yield chunk
+
+    monkeypatch.setattr(result_pager_module, "_ENCODER", CountingEncoder())
+    value = [{"n": i, "text": "y" * 50} for i in range(10000)]
+    pager = ResultPager(page_chars=1000)
+    page, continuation = pager.paginate(value)
+    first_page_cost = sum(encoded)
+
+    assert first_page_cost < 2000  # page 1 went out before the rest of the result was encoded
+    pager.read(continuation["next_cursor"])
+    assert sum(encoded) < 3000
+
+
+def test_repeated_read_returns_the_same_page_and_skipping_ahead_fails():
+    pager = ResultPager(page_chars=100)
+    _, continuation = pager.paginate({"text": "z" * 1000})
+    cursor = continuation["next_cursor"]
+    first = pager.read(cursor)
+    assert pager.read(cursor) == first  # a retried read_result_page call
+    result_id = cursor.split(":")[0]
+    with pytest.raises(KeyError):
+        pager.read(f"{result_id}:900")
+
+
+def test_oldest_pending_results_are_dropped_beyond_max_results():
+    pager = ResultPager(page_chars=10, max_results=2)
+    cursors = [pager.paginate({"text": "w" * 100})[1]["next_cursor"] for _ in range(3)]
+    with pytest.raises(KeyError):
+        pager.read(cursors[0])
+    pager.read(cursors[1])
+    pager.read(cursors[2])
+    assert pager.stats()["expired"] == 1
@@ -0,0 +1,65 @@
+import io
+import json
+import logging
+
+import pytest
+
+from utils.server_trace import ServerTracer, _JsonLineFormatter
+
+
+@pytest.fixture
+def tracer():
+    level = logging.getLogger("mcp_server").level  # the logger is shared with MCPServer's tracer
+    tracer = ServerTracer(level="INFO", max_arg_chars=20)
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(_JsonLineFormatter())
+    handlers = tracer.logger.handlers[:]
+    tracer.logger.handlers = [handler]
+    tracer.output = stream
+    yield tracer
+    tracer.logger.handlers = handlers
+    tracer.logger.setLevel(level)
+
+
+def test_events_are_json_lines_with_their_fields(tracer):
+    tracer.info("tool_call", tool="add_numbers", duration_ms=1.5)
+    tracer.debug("tool_args", args=tracer.preview({"a": 1}))  # below INFO
+
+    lines = tracer.output.getvalue().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["level"] == "INFO" and entry["event"] == "tool_call"
+    assert entry["tool"] == "add_numbers" and entry["duration_ms"] == 1.5
+
+
+def test_fields_below_the_level_are_never_rendered(tracer):
+    class Loud:
+        def __str__(self):
+            raise AssertionError("rendered")
+
+    tracer.debug("tool_args", args=Loud())
+    assert not tracer.enabled(logging.DEBUG)
+    assert tracer.output.getvalue() == ""
+
+
+def test_preview_truncates_long_arguments(tracer):
+    assert tracer.preview({"a": 1}) == '{"a":1}'
+    preview = tracer.preview({"text": "x" * 100})
+    assert preview.startswith('{"text":"xxxxxxxxxxx...')
+    assert preview.endswith("(+91 chars)")
+
+
+def test_tool_stats_count_calls_errors_and_percentiles(tracer):
+    for _ in range(98):
+        tracer.record_call("add_numbers", 0.002)
+    tracer.record_call("add_numbers", 0.2, error=True)
+    tracer.record_call("add_numbers", 120)  # beyond the last bucket
+
+    stats = tracer.stats()
+    tool = stats["tools"]["add_numbers"]
+    assert stats["calls"] == 100 and stats["errors"] == 1
+    assert tool["p50_ms"] == 2.5 and tool["p95_ms"] == 2.5
+    assert tool["p99_ms"] == 250.0
+    assert tool["max_ms"] == 120000.0
+    assert tool["buckets"] == {"0.0025": 98, "0.25": 1}
@@ -0,0 +1,49 @@
+import asyncio
+
+from utils.shared_toolset import SharedMCPToolset
+
+
+class FakeToolset:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_toolset_is_shared_within_a_loop_and_replaced_on_a_new_one():
+    shared = SharedMCPToolset(FakeToolset)
+
+    async def use():
+        first = shared.toolset
+        await asyncio.sleep(0)
+        return first, shared.toolset
+
+    first, again = asyncio.run(use())
+    second, _ = asyncio.run(use())
+    assert first is again
+    assert second is not first
+
+
+def test_toolset_created_outside_a_loop_binds_to_its_first_loop():
+    shared = SharedMCPToolset(FakeToolset)
+    created = shared.toolset  # e.g. agents built at import time
+
+    async def use():
+        return shared.toolset
+
+    assert asyncio.run(use()) is created
+    assert asyncio.run(use()) is not created
+
+
+def test_close_closes_and_forgets_the_toolset():
+    shared = SharedMCPToolset(FakeToolset)
+
+    async def scenario():
+        toolset = shared.toolset
+        await shared.close()
+        return toolset, shared.toolset
+
+    toolset, replacement = asyncio.run(scenario())
+    assert toolset.closed
+    assert replacement is not toolset
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from utils.mcp_tool_registry import ToolRegistry
+from utils.tool_batch import BatchCall, BatchError, run_batch
+
+
+def _runner(results, delays=None):
+    """Fake run_tool: returns `results[name](arguments)` and logs (event, name) pairs."""
+    log = []
+
+    async def run_tool(name, arguments):
+        log.append(("start", name, arguments))
+        await asyncio.sleep((delays or {}).get(name, 0))
+        log.append(("end", name))
+        result = results[name]
+        return result(arguments) if callable(result) else result
+
+    return run_tool, log
+
+
+def _known(name):
+    return name != "batch_call"
+
+
+def test_references_are_replaced_by_earlier_results():
+    run_tool, log = _runner({
+        "get_current_datetime": {"status": "success", "current_datetime": "[2026.10.16 21:00]", "parts": [1, 2]},
+        "append_to_file": lambda arguments: {"status": "success", "text": arguments["text"]},
+        "add_numbers": lambda arguments: {"status": "success", "sum": arguments["a"] + arguments["b"]},
+    })
+    calls = [
+        {"tool": "get_current_datetime", "arguments": {"dummy": "now"}},
+        {"tool": "append_to_file", "arguments": {"text": "{{0.current_datetime}} Konu"}},
+        {"tool": "add_numbers", "arguments": {"a": "{{0.parts.1}}", "b": 3}},
+    ]
+    outcomes = asyncio.run(run_batch(calls, run_tool, _known))
+
+    assert [outcome["status"] for outcome in outcomes] == ["success"] * 3
+    assert outcomes[1]["result"]["text"] == "[2026.10.16 21:00] Konu"
+    assert outcomes[2]["result"]["sum"] == 5  # a whole-string reference keeps the value's type
+
+
+def test_independent_calls_run_concurrently_and_depends_on_orders_them():
+    run_tool, log = _runner({"a": {"status": "success"}, "b": {"status": "success"}, "c": {"status": "success"}},
+                            delays={"a": 0.05})
+    calls = [{"tool": "a"}, {"tool": "b"}, {"tool": "c", "depends_on": [0]}]
+    asyncio.run(run_batch(calls, run_tool, _known))
+
+    events = [(event, name) for event, name, *_ in log]
+    assert events.index(("start", "b")) < events.index(("end", "a"))  # b did not wait for a
+    assert events.index(("end", "a")) < events.index(("start", "c"))
+
+
+def test_failed_call_skips_its_dependents_only():
+    run_tool, log = _runner({
+        "broken": {"status": "error", "error_message": "boom"},
+        "raises": lambda arguments: 1 / 0,
+        "ok": {"status": "success"},
+    })
+    calls = [
+        {"tool": "broken"},
+        {"tool": "ok", "arguments": {"x": "{{0}}"}},
+        {"tool": "raises"},
+        {"tool": "ok", "depends_on": [2]},
+        {"tool": "ok"},
+    ]
+    outcomes = asyncio.run(run_batch(calls, run_tool, _known))
+
+    assert [outcome["status"] for outcome in outcomes] == ["error", "skipped", "error", "skipped", "success"]
+    assert outcomes[1]["error"] == "Dependencies failed: [0]"
+    assert "division by zero" in outcomes[2]["error"]
+
+
+def test_unresolved_reference_is_a_call_error():
+    run_tool, _ = _runner({"a": {"status": "success"}, "b": {"status": "success"}})
+    calls = [{"tool": "a"}, {"tool": "b", "arguments": {"x": "{{0.missing}}"}}]
+    outcomes = asyncio.run(run_batch(calls, run_tool, _known))
+    assert outcomes[1]["status"] == "error"
+    assert outcomes[1]["error"].startswith("Unresolved reference")
+
+
+@pytest.mark.parametrize("calls", [
+    [],
+    [{"arguments": {}}],
+    [{"tool": "batch_call"}],
+    [{"tool": "a", "arguments": "x"}],
+    [{"tool": "a", "depends_on": "0"}],
+    [{"tool": "a", "depends_on": [0]}],
+    [{"tool": "a", "arguments": {"x": "{{1}}"}}, {"tool": "a"}],
+])
+def test_malformed_batch_raises_before_running_anything(calls):
+    run_tool, log = _runner({"a": {"status": "success"}})
+    with pytest.raises(BatchError):
+        asyncio.run(run_batch(calls, run_tool, _known))
+    assert log == []
+
+
+def test_batch_call_schema_declares_the_item_properties():
+    registry = ToolRegistry()
+
+    @registry.tool()
+    async def batch_call(calls: list[BatchCall]) -> dict:
+        return {}
+
+    schema = registry.list_tools()[0].inputSchema
+    items = schema["properties"]["calls"]["items"]
+    assert items["type"] == "object"
+    assert set(items["properties"]) == {"tool", "arguments", "depends_on"}
+    assert items["properties"]["depends_on"] == {"type": "array", "items": {"type": "integer"}}
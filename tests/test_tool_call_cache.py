@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+from mcp import types as mcp_types
+
+from utils import tool_call_cache
+from utils.tool_call_cache import ToolCallCache, parse_ttls
+
+
+def _result(value, is_error=False):
+    return mcp_types.CallToolResult(
+        content=[mcp_types.TextContent(type="text", text=json.dumps(value))], isError=is_error
+    )
+
+
+class _Server:
+    """Counts fetches; each fetch waits `delay` seconds and returns `value`."""
+
+    def __init__(self, value=None, delay=0.0):
+        self.value = value if value is not None else {"status": "success", "sum": 3}
+        self.delay = delay
+        self.fetches = 0
+
+    def fetch(self):
+        async def run():
+            self.fetches += 1
+            await asyncio.sleep(self.delay)
+            return _result(self.value)
+        return run
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(tool_call_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_parse_ttls():
+    assert parse_ttls("add_numbers=3600, get_current_datetime=minute,") == {
+        "add_numbers": 3600.0, "get_current_datetime": "minute",
+    }
+
+
+def test_identical_in_flight_calls_share_one_request():
+    cache = ToolCallCache(ttls={}, coalesce={"load_web_page"})
+    server = _Server(delay=0.05)
+
+    async def scenario():
+        same = [cache.call("load_web_page", {"url": "u"}, server.fetch()) for _ in range(5)]
+        other = cache.call("load_web_page", {"url": "v"}, server.fetch())
+        return await asyncio.gather(*same, other)
+
+    results = asyncio.run(scenario())
+    assert server.fetches == 2
+    assert all(result is results[0] for result in results[:5])
+    assert cache.stats()["tools"]["load_web_page"] == {
+        "hits": 0, "misses": 2, "coalesced": 4, "hit_rate": 0.667, "ttl": None,
+    }
+    assert asyncio.run(cache.call("load_web_page", {"url": "u"}, server.fetch())) is not None
+    assert server.fetches == 3  # not memoized: only coalesced while in flight
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    cache = ToolCallCache(ttls={}, coalesce={"load_web_page"})
+    server = _Server(delay=0.05)
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.call("load_web_page", {"url": "u"}, server.fetch()))
+        second = asyncio.ensure_future(cache.call("load_web_page", {"url": "u"}, server.fetch()))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert json.loads(asyncio.run(scenario()).content[0].text)["sum"] == 3
+    assert server.fetches == 1
+
+
+def test_memoized_result_expires_after_its_ttl(clock):
+    cache = ToolCallCache(ttls={"add_numbers": 60})
+    server = _Server()
+
+    async def call():
+        return await cache.call("add_numbers", {"a": 1, "b": 2}, server.fetch())
+
+    asyncio.run(call())
+    clock[0] += 59
+    asyncio.run(call())
+    assert server.fetches == 1
+    clock[0] += 2
+    asyncio.run(call())
+    assert server.fetches == 2
+    assert cache.stats()["tools"]["add_numbers"]["hits"] == 1
+
+
+def test_wall_clock_ttl_ends_at_the_next_boundary(clock):
+    clock[0] = 60 * 1000 + 50  # 10 seconds before a minute boundary
+    cache = ToolCallCache(ttls={"get_current_datetime": "minute"})
+    server = _Server({"status": "success", "current_datetime": "[2026.10.16 21:00]"})
+
+    async def call():
+        return await cache.call("get_current_datetime", {"dummy": "now"}, server.fetch())
+
+    asyncio.run(call())
+    clock[0] += 9
+    asyncio.run(call())
+    assert server.fetches == 1
+    clock[0] += 1
+    asyncio.run(call())
+    assert server.fetches == 2
+
+
+@pytest.mark.parametrize("value, is_error", [
+    ({"status": "error", "error_message": "bad input"}, False),
+    ({"error": "Invalid arguments"}, False),
+    ({"status": "success"}, True),
+])
+def test_error_results_are_not_memoized(value, is_error):
+    cache = ToolCallCache(ttls={"add_numbers": 3600})
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return _result(value, is_error)
+
+    asyncio.run(cache.call("add_numbers", {"a": 1}, fetch))
+    asyncio.run(cache.call("add_numbers", {"a": 1}, fetch))
+    assert len(fetches) == 2
+
+
+def test_oldest_results_are_dropped_beyond_max_entries():
+    cache = ToolCallCache(ttls={"add_numbers": 3600}, max_entries=2)
+    server = _Server()
+
+    async def call(a):
+        return await cache.call("add_numbers", {"a": a}, server.fetch())
+
+    for a in (1, 2, 3):
+        asyncio.run(call(a))
+    asyncio.run(call(1))
+    assert server.fetches == 4
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,51 @@
+from utils.tool_timeouts import ToolTimeoutPolicy, parse_overrides
+
+
+def _policy(**kwargs):
+    options = dict(overrides={}, adaptive=True, percentile=0.9, multiplier=3, min_seconds=2, min_samples=10, window=100)
+    options.update(kwargs)
+    return ToolTimeoutPolicy(**options)
+
+
+def test_default_until_enough_samples():
+    policy = _policy(default=60)
+    for _ in range(9):
+        policy.record("tool", 1.0)
+    assert policy.deadline("tool") == 60
+    policy.record("tool", 1.0)
+    assert policy.deadline("tool") == 3.0  # 1 s at the 90th percentile x 3
+
+
+def test_deadline_follows_the_percentile_and_is_clamped():
+    policy = _policy(default=60)
+    for latency in [0.1] * 9 + [4.0]:
+        policy.record("fast", 0.1)
+        policy.record("mixed", latency)
+    for _ in range(10):
+        policy.record("slow", 30.0)
+    assert policy.deadline("fast") == 2  # 0.3 s raised to min_seconds
+    assert policy.deadline("mixed") == 12.0  # the slow tail sets the percentile
+    assert policy.deadline("slow") == 60  # 90 s capped at the default
+
+
+def test_without_a_default_only_overrides_and_adaptive_deadlines_apply():
+    policy = _policy(default=None, overrides={"pinned": 7})
+    assert policy.deadline("tool") is None
+    assert policy.deadline("pinned") == 7
+    for _ in range(10):
+        policy.record("tool", 40.0)
+    assert policy.deadline("tool") == 120.0  # no upper clamp
+    assert policy.stats()["pinned"]["deadline_seconds"] == 7
+
+
+def test_window_forgets_old_latencies():
+    policy = _policy(default=60, window=10)
+    for _ in range(10):
+        policy.record("tool", 10.0)
+    for _ in range(10):
+        policy.record("tool", 1.0)
+    assert policy.deadline("tool") == 3.0
+
+
+def test_parse_overrides():
+    assert parse_overrides(" load_web_page=90, add_numbers=5 ,") == {"load_web_page": 90.0, "add_numbers": 5.0}
@@ -0,0 +1,160 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+from utils.web_page_cache import WebPageCache
+
+
+def _page(text):
+    return f"<html><body><p>{text} with enough words to be kept</p></body></html>".encode("utf-8")
+
+
+class _PageHandler(http.server.BaseHTTPRequestHandler):
+    """Serves `server.pages[path]` = (status, headers, body) and answers conditional requests with 304."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        status, headers, body = server.pages.get(self.path, (404, {}, b""))
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if status == 200 and (
+            (etag and self.headers.get("If-None-Match") == etag)
+            or (last_modified and self.headers.get("If-Modified-Since") == last_modified)
+        ):
+            status, body = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def web_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    server.pages = {}
+    server.requests = []
+    server.url = lambda path: f"http://127.0.0.1:{server.server_address[1]}{path}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _expire(cache, url):
+    """Marks the entry as checked long ago, so the next fetch revalidates it."""
+    entry = cache._read(url)
+    entry.pop("text")
+    entry["checked"] -= 3600
+    cache._write(url, entry)
+
+
+def test_fresh_entry_is_served_without_a_request(web_server, tmp_path):
+    web_server.pages["/a"] = (200, {"Cache-Control": "max-age=60"}, _page("first version"))
+    cache = WebPageCache(directory=str(tmp_path))
+    url = web_server.url("/a")
+
+    first = cache.fetch_text(url)
+    web_server.pages["/a"] = (200, {}, _page("second version"))
+    assert cache.fetch_text(url) == first
+    assert "first version" in first
+    assert len(web_server.requests) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["fetches"] == 1
+
+
+@pytest.mark.parametrize("validator, request_header", [
+    ({"ETag": '"v1"'}, "If-None-Match"),
+    ({"Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}, "If-Modified-Since"),
+])
+def test_not_modified_revalidates_and_rewrites_only_metadata(web_server, tmp_path, validator, request_header):
+    web_server.pages["/a"] = (200, validator, _page("cached text"))
+    cache = WebPageCache(directory=str(tmp_path))
+    url = web_server.url("/a")
+    text = cache.fetch_text(url)
+    _expire(cache, url)
+    text_path = cache._paths(url)[1]
+    os.utime(text_path, (1, 1))
+    written = os.stat(text_path)
+
+    assert cache.fetch_text(url) == text
+    assert request_header in web_server.requests[-1][1]
+    assert cache.stats()["revalidated"] == 1 and cache.stats()["fetches"] == 1
+    after = os.stat(text_path)
+    assert after.st_ino == written.st_ino  # the text file was not replaced, only touched for the LRU
+    assert after.st_mtime > written.st_mtime
+    assert cache.fetch_text(url) == text and cache.stats()["hits"] == 1  # fresh again
+
+
+def test_no_cache_revalidates_on_every_use(web_server, tmp_path):
+    web_server.pages["/a"] = (200, {"Cache-Control": "no-cache, max-age=600", "ETag": '"v1"'}, _page("text"))
+    cache = WebPageCache(directory=str(tmp_path))
+    url = web_server.url("/a")
+
+    cache.fetch_text(url)
+    cache.fetch_text(url)
+    cache.fetch_text(url)
+    assert len(web_server.requests) == 3
+    assert cache.stats()["revalidated"] == 2 and cache.stats()["hits"] == 0
+
+
+def test_no_store_is_not_cached(web_server, tmp_path):
+    web_server.pages["/a"] = (200, {"Cache-Control": "no-store"}, _page("text"))
+    cache = WebPageCache(directory=str(tmp_path))
+    cache.fetch_text(web_server.url("/a"))
+    assert os.listdir(tmp_path) == []
+
+
+def test_lru_entries_are_evicted_beyond_max_bytes(web_server, tmp_path):
+    cache = WebPageCache(directory=str(tmp_path), max_bytes=2000)  # room for three entries
+    for i in range(5):
+        web_server.pages[f"/p{i}"] = (200, {}, _page(f"page {i} " + "filler words here " * 20))
+    for i in range(3):
+        cache.fetch_text(web_server.url(f"/p{i}"))
+        os.utime(cache._paths(web_server.url(f"/p{i}"))[1], (i + 1, i + 1))
+    cache.fetch_text(web_server.url("/p0"))  # hit: p0 is now the most recently used
+    for i in range(3, 5):
+        cache.fetch_text(web_server.url(f"/p{i}"))
+
+    sizes = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert sizes <= 2000
+    assert cache.stats()["evictions"] > 0
+    assert cache._read(web_server.url("/p0")) is not None
+    assert cache._read(web_server.url("/p1")) is None
+
+
+def test_stale_text_is_served_when_revalidation_fails(web_server, tmp_path):
+    web_server.pages["/a"] = (200, {"ETag": '"v1"'}, _page("cached text"))
+    cache = WebPageCache(directory=str(tmp_path))
+    url = web_server.url("/a")
+    text = cache.fetch_text(url)
+
+    _expire(cache, url)
+    web_server.pages["/a"] = (503, {}, b"")
+    assert cache.fetch_text(url) == text
+
+    _expire(cache, url)
+    web_server.shutdown()
+    web_server.server_close()
+    assert cache.fetch_text(url) == text
+    assert cache.stats()["stale"] == 2
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_gone_page_drops_the_entry(web_server, tmp_path, status):
+    web_server.pages["/a"] = (200, {"ETag": '"v1"'}, _page("cached text"))
+    cache = WebPageCache(directory=str(tmp_path))
+    url = web_server.url("/a")
+    cache.fetch_text(url)
+
+    _expire(cache, url)
+    web_server.pages["/a"] = (status, {}, b"")
+    assert cache.fetch_text(url) == f"Failed to fetch url: {url}"
+    assert os.listdir(tmp_path) == []
+    assert cache.stats()["stale"] == 0
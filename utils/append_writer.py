@@ -0,0 +1,227 @@
+"""
+Buffered, group-commit append writer for MCPServer's append_to_file tool.
+
+Instead of opening and closing the target file for every line, `AppendWriter`
+keeps an LRU of open append descriptors. Appends to the same file are
+serialised by a per-file lock, so lines keep their order, and collect in a
+per-file pending buffer. A background thread commits every dirty file each
+`flush_interval` seconds (group commit) and `close` commits everything on
+shutdown.
+
+Files are opened with O_APPEND and each commit writes the pending records
+with a single write(), so on POSIX a commit lands whole at the end of the
+file even when several processes append to it (e.g. one MCPServer per pooled
+client session): records are never split or interleaved, and each process's
+records stay in order, but records of different processes are ordered by
+commit time, not by call time. Windows emulates O_APPEND with a seek before
+each write, so there a file should have a single writing process.
+
+Buffered records only reach the file through the flusher thread or `close`
+(also registered with atexit), so they are lost if the process is killed;
+use "always" where that matters. A failed group commit (e.g. ENOSPC) is
+logged and its records stay pending until a later commit succeeds; with
+"always" the error is raised to the caller instead. append_to_file is
+registered thread_only in MCPServer, so it never runs in a tool worker
+process.
+
+fsync policy:
+    "never"     write to the OS only (default)
+    "interval"  fsync on every group commit
+    "always"    write and fsync inside each append (slowest, no loss window)
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+APPEND_MAX_OPEN_FILES = int(os.getenv("APPEND_MAX_OPEN_FILES", 32))
+APPEND_FLUSH_INTERVAL_SECONDS = float(os.getenv("APPEND_FLUSH_INTERVAL_SECONDS", 0.2))
+APPEND_FSYNC = os.getenv("APPEND_FSYNC", "never")
+
+logger = logging.getLogger(__name__)
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+class AppendWriter:
+    """Thread-safe appender with an LRU of open descriptors and periodic group commit."""
+
+    def __init__(
+        self,
+        max_open_files: int = APPEND_MAX_OPEN_FILES,
+        flush_interval: float = APPEND_FLUSH_INTERVAL_SECONDS,
+        fsync: str = APPEND_FSYNC,
+    ):
+        if fsync not in ("never", "interval", "always"):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.max_open_files = max_open_files
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._handles: "OrderedDict[str, int]" = OrderedDict()
+        self._pending: Dict[str, List[bytes]] = {}  # guarded by the file's lock
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()  # guards _handles, _file_locks and _dirty
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.appends = 0
+        self.commits = 0
+        self.errors = 0
+        atexit.register(self.close)
+
+    def _file_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock = self._file_locks.get(path)
+            if lock is None:
+                lock = self._file_locks[path] = threading.Lock()
+            return lock
+
+    def _handle(self, path: str) -> int:
+        """Returns the open descriptor for `path` (caller holds the file lock)."""
+        with self._lock:
+            fd = self._handles.get(path)
+            if fd is not None:
+                self._handles.move_to_end(path)
+                return fd
+            evict = len(self._handles) >= self.max_open_files
+
+        if evict:
+            self._evict_one(exclude=path)
+        fd = os.open(path, _OPEN_FLAGS, 0o666)
+        with self._lock:
+            self._handles[path] = fd
+        return fd
+
+    def _evict_one(self, exclude: str) -> None:
+        """Closes the least recently used descriptor whose file is not being written right now."""
+        with self._lock:
+            candidates = [path for path in self._handles if path != exclude]
+        for path in candidates:
+            lock = self._file_lock(path)
+            # Başka bir thread bu dosyaya yazıyorsa onu atla (kilit sırası kilitlenmesini önler)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                with self._lock:
+                    fd = self._handles.pop(path, None)
+                    self._dirty.discard(path)
+                if fd is not None:
+                    try:
+                        self._commit(path, fd, fsync=self.fsync != "never")
+                    except OSError as e:
+                        # The records stay pending; the next group commit reopens the file
+                        self._commit_failed(path, e)
+                    finally:
+                        os.close(fd)
+                return
+            finally:
+                lock.release()
+
+    def _commit(self, path: str, fd: int, fsync: bool) -> None:
+        """
+        Writes the file's pending records with one write() (caller holds the file lock).
+
+        If the write fails, whatever was not written stays pending for the next commit.
+        """
+        pending = self._pending.pop(path, None)
+        if pending:
+            view = memoryview(b"".join(pending))
+            try:
+                while view:
+                    # Regular files take the whole buffer at once; the loop only covers short writes
+                    view = view[os.write(fd, view):]
+            finally:
+                if view:
+                    self._pending[path] = [bytes(view)]
+        if fsync:
+            os.fsync(fd)
+
+    def _commit_failed(self, path: str, error: OSError) -> None:
+        """Keeps the file dirty so the next group commit retries it."""
+        self.errors += 1
+        with self._lock:
+            self._dirty.add(path)
+        logger.warning("Append to %s failed, will retry: %s", path, error)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None and self.flush_interval > 0:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name="append-flusher", daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # flush already retries failed files; never let the flusher die
+                logger.exception("Append group commit failed")
+
+    def append(self, path: str, text: str) -> None:
+        """Appends `text` to `path`; returns once the text is in the file's pending buffer."""
+        path = os.path.abspath(path)
+        self._ensure_flusher()
+        with self._file_lock(path):
+            fd = self._handle(path)
+            if os.linesep != "\n":
+                text = text.replace("\n", os.linesep)  # text-mode line endings, as open(path, "a") wrote them
+            self._pending.setdefault(path, []).append(text.encode("utf-8", errors="replace"))
+            self.appends += 1
+            if self.fsync == "always" or self.flush_interval <= 0:
+                try:
+                    self._commit(path, fd, fsync=self.fsync == "always")
+                except OSError:
+                    self._pending.pop(path, None)  # the caller sees the error, so don't write it later
+                    raise
+            else:
+                with self._lock:
+                    self._dirty.add(path)
+
+    def flush(self) -> None:
+        """Group commit: writes (and, with the "interval" policy, fsyncs) every dirty file."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for path in dirty:
+            with self._file_lock(path):
+                if path not in self._pending:
+                    continue  # already committed when its descriptor was evicted
+                try:
+                    # Reopens the file if its descriptor was evicted while records were pending
+                    fd = self._handle(path)
+                    self._commit(path, fd, fsync=self.fsync == "interval")
+                except OSError as e:
+                    self._commit_failed(path, e)
+        if dirty:
+            self.commits += 1
+
+    def close(self) -> None:
+        """Stops the flusher, commits and closes every descriptor (safe to call twice)."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._stop.clear()  # a later append starts a new flusher
+        self.flush()
+        with self._lock:
+            paths = list(self._handles)
+        for path in paths:
+            with self._file_lock(path):
+                with self._lock:
+                    fd = self._handles.pop(path, None)
+                if fd is not None:
+                    try:
+                        self._commit(path, fd, fsync=self.fsync != "never")
+                    except OSError as e:
+                        self.errors += 1
+                        logger.error("Append to %s failed on close, %d bytes lost: %s", path,
+                                     sum(map(len, self._pending.pop(path, ()))), e)
+                    finally:
+                        os.close(fd)
+        # Records of a file whose descriptor was evicted and could not be reopened
+        for path in list(self._pending):
+            self.errors += 1
+            logger.error("Append to %s failed, %d bytes lost", path, sum(map(len, self._pending.pop(path))))
@@ -7,23 +7,266 @@ configurable timeouts for StdioServerParameters connections.
 The google-adk 1.2.0 introduced a hardcoded 5-second timeout for stdio-based
 MCP connections, which can be too short for some legitimate operations like
 Spinach AI transcription and analysis.
+
+`CustomMcpSessionManager` can also keep a pool of sessions (MCP_SESSION_POOL_SIZE),
+each with its own server process or connection, and send every tool call to
+the session with the fewest calls in flight. Dead or hung sessions are found
+by ping and replaced, and calls of idempotent tools are retried on the new
+session.
+
+`CustomMCPToolset.get_tools` serves the tool list from a catalog shared by
+all toolset instances, keyed by the server's connection identity and its
+reported name/version. It is invalidated when a reconnect reports a different
+server version or the server sends notifications/tools/list_changed.
+
+Tool calls go through the manager's ToolCallCache: identical concurrent calls
+of idempotent tools share one request, and tools in MCP_CACHEABLE_TOOLS are
+memoized with per-tool TTLs.
 """
 
+import asyncio
+import os
 import sys
+import time
+import weakref
 from contextlib import AsyncExitStack
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, TextIO, Union
+from typing import Any, Dict, List, Optional, Set, TextIO, Union
 
+import anyio
+import httpx
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager, StdioServerParameters
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams, StreamableHTTPServerParams, ToolPredicate
+from mcp import types as mcp_types
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+from utils.tool_call_cache import ToolCallCache
+from utils.tool_timeouts import ToolTimeoutPolicy
 
 # Configure your desired timeout for stdio-based MCP connections
 CUSTOM_STDIO_TIMEOUT_SECONDS = 60  # 60 seconds instead of the default 5 seconds
 
+# Number of MCP sessions (server processes for stdio) per session manager; 1 disables pooling
+MCP_SESSION_POOL_SIZE = int(os.getenv("MCP_SESSION_POOL_SIZE", 1))
+
+# Self-healing: sessions are pinged when handed out, at most once per interval,
+# and reconnected with exponential backoff when the ping fails
+MCP_HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL_SECONDS", 30))
+MCP_HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT_SECONDS", 5))
+MCP_RECONNECT_ATTEMPTS = int(os.getenv("MCP_RECONNECT_ATTEMPTS", 5))
+MCP_RECONNECT_BACKOFF_SECONDS = float(os.getenv("MCP_RECONNECT_BACKOFF_SECONDS", 0.5))
+MCP_RECONNECT_MAX_BACKOFF_SECONDS = float(os.getenv("MCP_RECONNECT_MAX_BACKOFF_SECONDS", 10))
+# Tools that are safe to run twice; their calls are retried on a fresh session
+MCP_IDEMPOTENT_TOOLS = set(filter(None, os.getenv(
+    "MCP_IDEMPOTENT_TOOLS",
+    "add_numbers,get_current_datetime,load_web_page,server_stats,read_result_page",
+).split(",")))
+
+
+def _is_timeout(error: BaseException) -> bool:
+    # ClientSession reports a read timeout as McpError with HTTP 408
+    return isinstance(error, McpError) and error.error.code == httpx.codes.REQUEST_TIMEOUT
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    """True for errors that mean the session is dead or hung (not a tool failure)."""
+    if isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)):
+        return True
+    return _is_timeout(error)
+
+
+class ToolCatalog:
+    """
+    Process-wide cache of `tools/list` results.
+
+    Entries are keyed by connection identity and remember the server
+    name/version they were listed from; `observe_server` drops an entry when
+    a (re)connected server reports a different one.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, identity: str) -> Optional[List[mcp_types.Tool]]:
+        entry = self._entries.get(identity)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["tools"]
+
+    def put(self, identity: str, server: Optional[str], tools: List[mcp_types.Tool]) -> None:
+        self._entries[identity] = {"server": server, "tools": tools}
+
+    def observe_server(self, identity: str, server: Optional[str]) -> None:
+        entry = self._entries.get(identity)
+        if entry is not None and entry["server"] != server:
+            self.invalidate(identity)
+
+    def invalidate(self, identity: str) -> None:
+        if self._entries.pop(identity, None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared by every CustomMCPToolset in the process
+tool_catalog = ToolCatalog()
+
+
+class _PoolMember:
+    """
+    One pooled session (and so, for stdio, one server process).
+
+    The transport and ClientSession are opened and closed by a dedicated
+    connection task, because anyio requires them to be exited in the task
+    that entered them; any task may then reconnect or close the member.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stop: Optional[asyncio.Event] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.reconnects = 0
+        self.last_healthy = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class _PooledSession:
+    """
+    ClientSession stand-in that spreads tool calls over the pool members.
+
+    `call_tool` goes to the member with the fewest calls in flight, with the
+    read timeout chosen by the manager's ToolTimeoutPolicy. When a call fails
+    because its session is dead, that member is reconnected; a timed out call
+    only reconnects when the session no longer answers a ping. Calls of
+    idempotent tools are then retried (a timed out call once). Calls pass
+    through the manager's ToolCallCache first.
+    A member whose reconnect failed has no session and is left out of
+    selection until a health check reconnects it.
+    `send_ping` pings every live member; everything else (list_tools, ...) is
+    answered by the first live member, since all members talk to the same server.
+    """
+
+    def __init__(self, manager: "CustomMcpSessionManager", members: List[_PoolMember]):
+        self._manager = manager
+        self._members = members
+
+    async def _live_members(self) -> List[_PoolMember]:
+        """Members with a session; when a failed reconnect left none, the first one is reconnected."""
+        live = [member for member in self._members if member.session is not None]
+        if not live:
+            member = self._members[0]
+            await self._manager._reconnect_member(member, None)
+            live = [member]
+        return live
+
+    async def _least_loaded(self) -> _PoolMember:
+        return min(await self._live_members(), key=lambda member: member.in_flight)
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None,
+                        read_timeout_seconds: Optional[timedelta] = None, **kwargs):
+        if kwargs.get("progress_callback") is not None:
+            # Progress goes to one caller, so such calls are neither shared nor cached
+            return await self._call_tool(name, arguments, read_timeout_seconds, **kwargs)
+        return await self._manager.call_cache.call(
+            name, arguments, lambda: self._call_tool(name, arguments, read_timeout_seconds, **kwargs)
+        )
+
+    async def _call_tool(self, name: str, arguments: Optional[Dict[str, Any]],
+                         read_timeout_seconds: Optional[timedelta], **kwargs):
+        manager = self._manager
+        retries = manager.reconnect_attempts if name in manager.idempotent_tools else 0
+        timeout_retries = 1 if retries else 0
+        attempt = 0
+        while True:
+            member = await self._least_loaded()
+            session = member.session
+            if read_timeout_seconds is not None:
+                timeout = read_timeout_seconds.total_seconds()  # the caller's timeout wins
+            else:
+                timeout = manager.timeouts.deadline(name)
+            member.in_flight += 1
+            member.calls += 1
+            started = time.monotonic()
+            try:
+                result = await session.call_tool(
+                    name,
+                    arguments=arguments,
+                    read_timeout_seconds=None if timeout is None else timedelta(seconds=timeout),
+                    **kwargs,
+                )
+                member.last_healthy = time.monotonic()
+                manager.timeouts.record(name, member.last_healthy - started)
+                return result
+            except Exception as e:
+                if not _is_connection_error(e):
+                    raise
+                if _is_timeout(e):
+                    # Without a per-call timeout the session's own read timeout ran out
+                    waited = timeout if timeout is not None else time.monotonic() - started
+                    manager.timeouts.record(name, waited, timed_out=True)
+                    print(f"CUSTOM_ADK: '{name}' timed out after {waited:.1f}s", file=manager._errlog)
+                    # Yavaş araç mı, ölü sunucu mu? Yalnızca ping de yanıtsızsa yeniden bağlan
+                    if not await manager._ping(member):
+                        await self._replace(member, session)
+                    if timeout_retries == 0:
+                        raise
+                    timeout_retries -= 1
+                else:
+                    await self._replace(member, session)
+                attempt += 1
+                if attempt > retries:
+                    raise
+                print(f"CUSTOM_ADK: Retrying '{name}' after {e!r}", file=manager._errlog)
+            finally:
+                member.in_flight -= 1
+
+    async def _replace(self, member: _PoolMember, failed_session: ClientSession) -> None:
+        """Reconnects a dead member; if that fails, the call carries on with the other members."""
+        try:
+            await self._manager._reconnect_member(member, failed_session)
+        except Exception as e:
+            if not any(other.session is not None for other in self._members):
+                raise
+            print(f"CUSTOM_ADK: MCP session {member.index} left out until it reconnects ({e!r})",
+                  file=self._manager._errlog)
+
+    async def send_ping(self):
+        results = await asyncio.gather(*(member.session.send_ping() for member in await self._live_members()))
+        return results[0]
+
+    def stats(self) -> List[Dict[str, int]]:
+        return [
+            {"session": member.index, "in_flight": member.in_flight, "calls": member.calls,
+             "reconnects": member.reconnects}
+            for member in self._members
+        ]
+
+    def __getattr__(self, name: str):
+        session = next((member.session for member in self._members if member.session is not None), None)
+        return getattr(session, name)
+
 
 class CustomMcpSessionManager(MCPSessionManager):
     """
@@ -32,12 +275,24 @@ class CustomMcpSessionManager(MCPSessionManager):
     This class overrides the create_session method to apply a custom timeout
     for stdio-based MCP connections, addressing the hardcoded 5-second limit
     introduced in google-adk 1.2.0.
+
+    Sessions are kept in a pool (of one by default) behind a `_PooledSession`.
+    create_session pings the sessions at most once per health check interval
+    and reconnects a session that does not answer, with exponential backoff,
+    so a crashed or hung server is replaced without rebuilding the toolset.
     """
 
     def __init__(
         self,
         connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
         errlog: TextIO = sys.stderr,
+        pool_size: int = MCP_SESSION_POOL_SIZE,
+        health_check_interval: float = MCP_HEALTH_CHECK_INTERVAL_SECONDS,
+        health_check_timeout: float = MCP_HEALTH_CHECK_TIMEOUT_SECONDS,
+        reconnect_attempts: int = MCP_RECONNECT_ATTEMPTS,
+        idempotent_tools: Optional[Set[str]] = None,
+        timeouts: Optional[ToolTimeoutPolicy] = None,
+        call_cache: Optional[ToolCallCache] = None,
     ):
         """Initialize the custom session manager with all required attributes."""
         # Initialize all attributes exactly as the original MCPSessionManager does
@@ -45,6 +300,37 @@ class CustomMcpSessionManager(MCPSessionManager):
         self._errlog = errlog
         self._exit_stack: Optional[AsyncExitStack] = None
         self._session: Optional[ClientSession] = None
+        self._pool_size = max(1, pool_size)
+        self._members: List[_PoolMember] = []
+        # Event loop -> lock; asyncio primitives are bound to the loop they are first used on
+        self._pool_locks = weakref.WeakKeyDictionary()
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.reconnect_attempts = reconnect_attempts
+        self.idempotent_tools = MCP_IDEMPOTENT_TOOLS if idempotent_tools is None else idempotent_tools
+        # Per-tool read timeouts; for stdio CUSTOM_STDIO_TIMEOUT_SECONDS is the default and the adaptive
+        # ceiling, HTTP and SSE sessions keep having no read timeout unless a tool gets one
+        self.timeouts = timeouts or ToolTimeoutPolicy(
+            default=CUSTOM_STDIO_TIMEOUT_SECONDS if isinstance(connection_params, StdioServerParameters) else None
+        )
+        self.server: Optional[str] = None  # "name/version" reported by the last handshake
+        # Aynı anda gelen özdeş çağrılar yalnızca tekrar çalıştırılabilir araçlarda birleştirilir
+        self.call_cache = call_cache or ToolCallCache(coalesce=self.idempotent_tools)
+
+    @property
+    def identity(self) -> str:
+        """Which server this manager talks to (command line or URL), for the tool catalog."""
+        params = self._connection_params
+        if isinstance(params, StdioServerParameters):
+            return f"stdio:{params.command} {' '.join(params.args)} @ {params.cwd or ''}"
+        return f"{type(params).__name__}:{params.url}"
+
+    async def _handle_message(self, message) -> None:
+        """ClientSession message handler: drops the cached catalog on tools/list_changed."""
+        if isinstance(message, mcp_types.ServerNotification) and isinstance(
+            message.root, mcp_types.ToolListChangedNotification
+        ):
+            tool_catalog.invalidate(self.identity)
 
     async def create_session(self) -> ClientSession:
         """
@@ -52,83 +338,187 @@ class CustomMcpSessionManager(MCPSessionManager):
         
         This is a complete copy of the original ADK create_session logic from 
         google-adk version 1.2.0, with only the timeout modification for StdioServerParameters.
+        The returned object is a `_PooledSession` over pool_size sessions; an
+        existing one is health checked before it is returned.
         """
-        if self._session is not None:
-            return self._session
+        if self._session is None:
+            # Topics of a batch reach their first MCP step together; only one of them opens the pool
+            async with self._pool_lock():
+                if self._session is None:
+                    return await self._create_pool()
+        await self._check_health()
+        return self._session
+
+    def _pool_lock(self) -> asyncio.Lock:
+        """Returns the pool creation lock of the running event loop."""
+        loop = asyncio.get_running_loop()
+        lock = self._pool_locks.get(loop)
+        if lock is None:
+            lock = self._pool_locks[loop] = asyncio.Lock()
+        return lock
 
-        # Create a new exit stack for this session
-        self._exit_stack = AsyncExitStack()
+    async def _create_pool(self) -> ClientSession:
+        """Opens pool_size sessions concurrently and wraps them in a _PooledSession."""
+        members = [_PoolMember(index) for index in range(self._pool_size)]
+        results = await asyncio.gather(*(self._connect(member) for member in members), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for member in members:
+                await self._disconnect(member)
+            raise errors[0]
 
+        self._members = members
+        self._session = _PooledSession(self, members)
+        return self._session
+
+    async def _hold_connection(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Connection task: opens the session, hands it over and keeps it open until `stop` is set."""
         try:
-            if isinstance(self._connection_params, StdioServerParameters):
-                client = stdio_client(
-                    server=self._connection_params, errlog=self._errlog
-                )
-            elif isinstance(self._connection_params, SseServerParams):
-                client = sse_client(
-                    url=self._connection_params.url,
-                    headers=self._connection_params.headers,
-                    timeout=self._connection_params.timeout,
-                    sse_read_timeout=self._connection_params.sse_read_timeout,
-                )
-            elif isinstance(self._connection_params, StreamableHTTPServerParams):
-                client = streamablehttp_client(
-                    url=self._connection_params.url,
-                    headers=self._connection_params.headers,
-                    timeout=timedelta(seconds=self._connection_params.timeout),
-                    sse_read_timeout=timedelta(
-                        seconds=self._connection_params.sse_read_timeout
-                    ),
-                    terminate_on_close=self._connection_params.terminate_on_close,
-                )
-            else:
-                raise ValueError(
-                    'Unable to initialize connection. Connection should be'
-                    ' StdioServerParameters or SseServerParams, but got'
-                    f' {self._connection_params}'
-                )
+            async with AsyncExitStack() as exit_stack:
+                session = await self._open_session(exit_stack)
+                result = await session.initialize()
+                self.server = f"{result.serverInfo.name}/{result.serverInfo.version}"
+                tool_catalog.observe_server(self.identity, self.server)
+                ready.set_result(session)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif not stop.is_set():
+                # The transport died under a live session; the next call or health check reconnects it
+                print(f"CUSTOM_ADK: MCP connection lost: {e!r}", file=self._errlog)
 
-            transports = await self._exit_stack.enter_async_context(client)
-            
-            # HERE IS THE CUSTOM TIMEOUT LOGIC:
-            if isinstance(self._connection_params, StdioServerParameters):
-                print(f"CUSTOM_ADK: Applying custom timeout for StdioServerParameters: {CUSTOM_STDIO_TIMEOUT_SECONDS}s")
-                session = await self._exit_stack.enter_async_context(
-                    ClientSession(
-                        *transports[:2],
-                        read_timeout_seconds=timedelta(seconds=CUSTOM_STDIO_TIMEOUT_SECONDS),
-                    )
-                )
-            else:
-                # Original logic for other connection types
-                session = await self._exit_stack.enter_async_context(
-                    ClientSession(*transports[:2])
+    async def _connect(self, member: _PoolMember) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        member.stop = asyncio.Event()
+        member.task = asyncio.create_task(self._hold_connection(ready, member.stop))
+        member.session = await ready
+        member.last_healthy = time.monotonic()
+
+    async def _disconnect(self, member: _PoolMember) -> None:
+        if member.task is None:
+            return
+        member.stop.set()
+        try:
+            await asyncio.wait_for(member.task, timeout=self.health_check_timeout)
+        except Exception as e:
+            # Log the error but don't re-raise to avoid blocking shutdown
+            print(f'Warning: Error during MCP session cleanup: {e!r}', file=self._errlog)
+        member.task = None
+        member.session = None
+
+    async def _open_session(self, exit_stack: AsyncExitStack) -> ClientSession:
+        """Opens the transport and the ClientSession on `exit_stack` (not yet initialized)."""
+        if isinstance(self._connection_params, StdioServerParameters):
+            client = stdio_client(
+                server=self._connection_params, errlog=self._errlog
+            )
+        elif isinstance(self._connection_params, SseServerParams):
+            client = sse_client(
+                url=self._connection_params.url,
+                headers=self._connection_params.headers,
+                timeout=self._connection_params.timeout,
+                sse_read_timeout=self._connection_params.sse_read_timeout,
+            )
+        elif isinstance(self._connection_params, StreamableHTTPServerParams):
+            client = streamablehttp_client(
+                url=self._connection_params.url,
+                headers=self._connection_params.headers,
+                timeout=timedelta(seconds=self._connection_params.timeout),
+                sse_read_timeout=timedelta(
+                    seconds=self._connection_params.sse_read_timeout
+                ),
+                terminate_on_close=self._connection_params.terminate_on_close,
+            )
+        else:
+            raise ValueError(
+                'Unable to initialize connection. Connection should be'
+                ' StdioServerParameters or SseServerParams, but got'
+                f' {self._connection_params}'
+            )
+
+        transports = await exit_stack.enter_async_context(client)
+        
+        # HERE IS THE CUSTOM TIMEOUT LOGIC:
+        if isinstance(self._connection_params, StdioServerParameters):
+            session = await exit_stack.enter_async_context(
+                ClientSession(
+                    *transports[:2],
+                    read_timeout_seconds=timedelta(seconds=CUSTOM_STDIO_TIMEOUT_SECONDS),
+                    message_handler=self._handle_message,
                 )
-            
-            await session.initialize()
-            self._session = session
-            return session
-
-        except Exception:
-            # If session creation fails, clean up the exit stack
-            if self._exit_stack:
-                await self._exit_stack.aclose()
-                self._exit_stack = None
-            raise
+            )
+        else:
+            # Original logic for other connection types
+            session = await exit_stack.enter_async_context(
+                ClientSession(*transports[:2], message_handler=self._handle_message)
+            )
+        return session
 
-    async def close(self):
-        """Closes the session and cleans up resources."""
-        if self._exit_stack:
+    async def _check_health(self) -> None:
+        """Pings members that have not been seen healthy within the interval and reconnects dead ones."""
+        now = time.monotonic()
+        stale = [m for m in self._members if now - m.last_healthy >= self.health_check_interval]
+        for member in stale:
+            session = member.session
+            if session is not None and await self._ping(member):
+                continue
             try:
-                await self._exit_stack.aclose()
+                await self._reconnect_member(member, session)
             except Exception as e:
-                # Log the error but don't re-raise to avoid blocking shutdown
-                print(
-                    f'Warning: Error during MCP session cleanup: {e}', file=self._errlog
-                )
-            finally:
-                self._exit_stack = None
-                self._session = None
+                # The pool stays usable while another member is up; this one is retried next check
+                if not any(other.session is not None for other in self._members):
+                    raise
+                print(f"CUSTOM_ADK: MCP session {member.index} is still down: {e!r}", file=self._errlog)
+
+    async def _ping(self, member: _PoolMember) -> bool:
+        """Pings one member; True if it answered within the health check timeout."""
+        try:
+            await asyncio.wait_for(member.session.send_ping(), timeout=self.health_check_timeout)
+        except Exception as e:
+            print(f"CUSTOM_ADK: MCP session {member.index} failed its health check: {e!r}", file=self._errlog)
+            return False
+        member.last_healthy = time.monotonic()
+        return True
+
+    async def _reconnect_member(self, member: _PoolMember, failed_session: ClientSession) -> None:
+        """Replaces a dead member session, retrying with exponential backoff."""
+        async with member.lock:
+            if member.session is not failed_session and member.session is not None:
+                return  # another call already reconnected this member
+            await self._disconnect(member)
+
+            delay = MCP_RECONNECT_BACKOFF_SECONDS
+            for attempt in range(1, self.reconnect_attempts + 1):
+                try:
+                    await self._connect(member)
+                except Exception as e:
+                    if attempt == self.reconnect_attempts:
+                        raise
+                    print(f"CUSTOM_ADK: Reconnect {attempt} failed ({e!r}), retrying in {delay:.1f}s", file=self._errlog)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MCP_RECONNECT_MAX_BACKOFF_SECONDS)
+                    continue
+                member.reconnects += 1
+                print(f"CUSTOM_ADK: MCP session {member.index} reconnected", file=self._errlog)
+                return
+
+    def pool_stats(self) -> List[Dict[str, int]]:
+        """Calls in flight, calls made and reconnects per pooled session."""
+        if isinstance(self._session, _PooledSession):
+            return self._session.stats()
+        return []
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Memoization and coalescing hits/misses per tool."""
+        return self.call_cache.stats()
+
+    async def close(self):
+        """Closes the session and cleans up resources."""
+        members, self._members = self._members, []
+        self._session = None
+        for member in reversed(members):
+            await self._disconnect(member)
 
 
 class CustomMCPToolset(MCPToolset):
@@ -144,6 +534,7 @@ class CustomMCPToolset(MCPToolset):
         connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
         tool_filter: Union[ToolPredicate, List[str], None] = None,
         errlog: TextIO = sys.stderr,
+        pool_size: int = MCP_SESSION_POOL_SIZE,
     ):
         """
         Initialize Custom MCPToolset with CustomMcpSessionManager.
@@ -152,6 +543,7 @@ class CustomMCPToolset(MCPToolset):
             connection_params: Parameters for the MCP connection
             tool_filter: Optional filter to select specific tools
             errlog: TextIO stream for error logging
+            pool_size: Number of pooled MCP sessions (1 = a single session)
         """
         # Call BaseToolset's __init__ directly, bypassing MCPToolset's __init__
         # This prevents the original MCPToolset from creating the default MCPSessionManager
@@ -159,7 +551,7 @@ class CustomMCPToolset(MCPToolset):
 
         # Use our custom session manager instead of the default one
         # Note: ADK expects this to be named '_mcp_session_manager', not '_session_manager'
-        self._mcp_session_manager = CustomMcpSessionManager(connection_params, errlog=errlog)
+        self._mcp_session_manager = CustomMcpSessionManager(connection_params, errlog=errlog, pool_size=pool_size)
 
         # Initialize ALL instance variables as in the original MCPToolset
         self._tool_configs_by_name: Dict[str, Any] = {}
@@ -177,4 +569,29 @@ class CustomMCPToolset(MCPToolset):
         """Setter for _session - this is needed for ADK compatibility but we ignore it since the session manager handles this."""
         # The ADK tries to set this, but we let the session manager handle it
         # We don't actually need to store it here since we get it from the session manager
-        pass
\ No newline at end of file
+        pass
+
+    async def get_tools(
+        self,
+        readonly_context: Optional[ReadonlyContext] = None,
+    ) -> List[BaseTool]:
+        """
+        Returns the toolset's tools, listing them from the server only on a catalog miss.
+
+        The catalog is shared by all toolset instances (see ToolCatalog), so a
+        new toolset or agent for an already listed server skips the
+        tools/list round-trip.
+        """
+        manager = self._mcp_session_manager
+        mcp_tools = tool_catalog.get(manager.identity)
+        if mcp_tools is None:
+            session = await manager.create_session()
+            mcp_tools = (await session.list_tools()).tools
+            tool_catalog.put(manager.identity, manager.server, mcp_tools)
+
+        tools = []
+        for mcp_tool in mcp_tools:
+            tool = MCPTool(mcp_tool=mcp_tool, mcp_session_manager=manager)
+            if self._is_tool_selected(tool, readonly_context):
+                tools.append(tool)
+        return tools
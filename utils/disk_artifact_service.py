@@ -0,0 +1,360 @@
+"""
+Disk-backed, content-addressed artifact service.
+
+Drop-in replacement for ADK's InMemoryArtifactService that keeps artifact
+bytes on local disk instead of in the Python heap:
+
+    root/blobs/<aa>/<sha256>                    artifact contents, stored once per digest
+    root/refs/<app>/<user>/<session>/<name>.json  version list pointing at blob digests
+
+Identical contents are stored once, and saving the same bytes again returns
+the latest version instead of adding a new one. Blobs are read through
+memory maps. `load_artifact` has to copy binary contents into the returned
+Part (types.Blob only accepts bytes); `open_artifact_view` returns a zero-copy
+memoryview instead and `export_artifact` copies a blob to a file at kernel
+level, so callers that can take a buffer never pull the bytes into Python
+objects. Reads look up the ref and open the blob under the same lock that
+`prune` holds, so a blob is never deleted between the two. `prune` applies the
+retention policy (maximum age of a session's artifacts, number of versions
+kept per artifact) and removes blobs that are no longer referenced.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from google.adk.artifacts.base_artifact_service import BaseArtifactService
+from google.genai import types
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".artifacts")
+ARTIFACT_MAX_AGE_SECONDS = float(os.getenv("ARTIFACT_MAX_AGE_SECONDS", 7 * 24 * 60 * 60))
+ARTIFACT_MAX_VERSIONS = int(os.getenv("ARTIFACT_MAX_VERSIONS", 5))
+ARTIFACT_PRUNE_INTERVAL_SECONDS = float(os.getenv("ARTIFACT_PRUNE_INTERVAL_SECONDS", 10 * 60))
+# Number of blob memory maps kept open for repeated reads
+ARTIFACT_MMAP_CACHE_SIZE = 32
+
+_TEXT_MIME_TYPE = "text/plain"
+
+
+class DiskArtifactService(BaseArtifactService):
+    """
+    Artifact service storing content-addressed blobs on local disk.
+
+    Args:
+        root: Storage directory.
+        max_age_seconds: Session artifacts untouched for longer are pruned.
+        max_versions: Versions kept per artifact (older ones are pruned).
+        prune_interval_seconds: Minimum time between automatic prunes triggered by saves.
+    """
+
+    def __init__(
+        self,
+        root: str = ARTIFACT_DIR,
+        max_age_seconds: float = ARTIFACT_MAX_AGE_SECONDS,
+        max_versions: int = ARTIFACT_MAX_VERSIONS,
+        prune_interval_seconds: float = ARTIFACT_PRUNE_INTERVAL_SECONDS,
+    ):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.max_versions = max_versions
+        self.prune_interval_seconds = prune_interval_seconds
+        self._blob_dir = os.path.join(root, "blobs")
+        self._ref_dir = os.path.join(root, "refs")
+        self._lock = threading.Lock()
+        self._maps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self._last_prune = time.time()
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._ref_dir, exist_ok=True)
+
+    # --- Paths ---
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _scope_dir(self, app_name: str, user_id: str, session_id: str, filename: str) -> str:
+        # "user:" ile başlayan artifact'ler kullanıcının bütün oturumlarında ortaktır
+        scope = "user" if filename.startswith("user:") else quote(session_id, safe="")
+        return os.path.join(self._ref_dir, quote(app_name, safe=""), quote(user_id, safe=""), scope)
+
+    def _ref_path(self, app_name: str, user_id: str, session_id: str, filename: str) -> str:
+        return os.path.join(
+            self._scope_dir(app_name, user_id, session_id, filename),
+            quote(filename, safe="") + ".json",
+        )
+
+    # --- Refs ---
+    @staticmethod
+    def _read_versions(ref_path: str) -> List[Dict[str, Any]]:
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                return json.load(f)["versions"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    @staticmethod
+    def _write_versions(ref_path: str, versions: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        tmp_path = f"{ref_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"versions": versions}, f)
+        os.replace(tmp_path, ref_path)
+
+    @staticmethod
+    def _find_version(versions: List[Dict[str, Any]], version: Optional[int]) -> Optional[Dict[str, Any]]:
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        for entry in versions:
+            if entry["version"] == version:
+                return entry
+        return None
+
+    # --- Blobs ---
+    def _store_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _map_blob(self, digest: str) -> memoryview:
+        """Returns a read-only memoryview over the blob's memory map (caller holds the lock)."""
+        mapped = self._maps.get(digest)
+        if mapped is not None:
+            self._maps.move_to_end(digest)
+            return memoryview(mapped)
+
+        path = self._blob_path(digest)
+        if os.path.getsize(path) == 0:
+            return memoryview(b"")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[digest] = mapped
+        while len(self._maps) > ARTIFACT_MMAP_CACHE_SIZE:
+            self._close_map(self._maps.popitem(last=False)[1])
+        return memoryview(mapped)
+
+    @staticmethod
+    def _close_map(mapped: mmap.mmap) -> None:
+        try:
+            mapped.close()
+        except BufferError:
+            # Hâlâ bir memoryview tarafından kullanılıyor; GC serbest bırakır
+            pass
+
+    # --- BaseArtifactService ---
+    def _save(self, app_name: str, user_id: str, session_id: str, filename: str, artifact: types.Part) -> int:
+        if artifact.inline_data is not None:
+            data = artifact.inline_data.data or b""
+            mime_type = artifact.inline_data.mime_type
+            is_text = False
+        elif artifact.text is not None:
+            data = artifact.text.encode("utf-8")
+            mime_type = _TEXT_MIME_TYPE
+            is_text = True
+        else:
+            raise ValueError("Artifact must contain inline_data or text.")
+
+        ref_path = self._ref_path(app_name, user_id, session_id, filename)
+        now = time.time()
+        # The blob and the ref pointing at it are written under one lock; otherwise a
+        # prune in between would delete the fresh blob as unreferenced
+        with self._lock:
+            digest = self._store_blob(data)
+            versions = self._read_versions(ref_path)
+            latest = versions[-1] if versions else None
+            if latest and latest["digest"] == digest and latest["mime_type"] == mime_type and latest.get("text") == is_text:
+                # Aynı içerik: yeni sürüm açma
+                latest["accessed"] = now
+                self._write_versions(ref_path, versions)
+                return latest["version"]
+
+            version = latest["version"] + 1 if latest else 0
+            versions.append({
+                "version": version,
+                "digest": digest,
+                "mime_type": mime_type,
+                "size": len(data),
+                "text": is_text,
+                "created": now,
+                "accessed": now,
+            })
+            self._write_versions(ref_path, versions)
+        return version
+
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        artifact: types.Part,
+    ) -> int:
+        version = await asyncio.to_thread(self._save, app_name, user_id, session_id, filename, artifact)
+        if time.time() - self._last_prune > self.prune_interval_seconds:
+            self._last_prune = time.time()
+            await asyncio.to_thread(self.prune)
+        return version
+
+    def _entry(self, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int]) -> Optional[Dict[str, Any]]:
+        ref_path = self._ref_path(app_name, user_id, session_id, filename)
+        return self._find_version(self._read_versions(ref_path), version)
+
+    def _open(
+        self, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[memoryview]]:
+        """Returns (entry, view) for the artifact version, or (None, None)."""
+        # The ref lookup and the blob open happen under one lock; otherwise a prune in
+        # between could delete the blob the ref just pointed at
+        with self._lock:
+            entry = self._entry(app_name, user_id, session_id, filename, version)
+            if entry is None:
+                return None, None
+            return entry, self._map_blob(entry["digest"])
+
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        version: Optional[int] = None,
+    ) -> Optional[types.Part]:
+        entry, view = self._open(app_name, user_id, session_id, filename, version)
+        if entry is None:
+            return None
+        if entry.get("text"):
+            return types.Part(text=str(view, "utf-8"))
+        # types.Blob yalnızca bytes kabul ediyor; sıfır kopya için open_artifact_view kullanılmalı
+        return types.Part.from_bytes(data=view.tobytes(), mime_type=entry["mime_type"])
+
+    async def list_artifact_keys(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> list[str]:
+        filenames = []
+        for scope_dir in (
+            self._scope_dir(app_name, user_id, session_id, ""),
+            self._scope_dir(app_name, user_id, session_id, "user:"),
+        ):
+            if os.path.isdir(scope_dir):
+                filenames.extend(
+                    unquote(name[: -len(".json")])
+                    for name in os.listdir(scope_dir)
+                    if name.endswith(".json")
+                )
+        return sorted(filenames)
+
+    async def delete_artifact(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str
+    ) -> None:
+        # Blob'lar başka referanslar tarafından kullanılıyor olabilir; prune temizler
+        try:
+            os.remove(self._ref_path(app_name, user_id, session_id, filename))
+        except FileNotFoundError:
+            pass
+
+    async def list_versions(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str
+    ) -> list[int]:
+        ref_path = self._ref_path(app_name, user_id, session_id, filename)
+        return [entry["version"] for entry in self._read_versions(ref_path)]
+
+    # --- Zero-copy access ---
+    def open_artifact_view(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        version: Optional[int] = None,
+    ) -> Optional[memoryview]:
+        """Returns a read-only memoryview over the artifact bytes without copying them."""
+        return self._open(app_name, user_id, session_id, filename, version)[1]
+
+    async def export_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        destination: str,
+        version: Optional[int] = None,
+    ) -> Optional[str]:
+        """Copies the artifact to `destination` file-to-file (no copy through Python objects)."""
+        for attempt in range(2):
+            entry = self._entry(app_name, user_id, session_id, filename, version)
+            if entry is None:
+                return None
+            try:
+                await asyncio.to_thread(shutil.copyfile, self._blob_path(entry["digest"]), destination)
+                return destination
+            except FileNotFoundError:
+                # Bir prune ref'i güncelleyip blob'u silmiş; ref'i yeniden oku
+                if attempt:
+                    raise
+
+    # --- Retention ---
+    def prune(self) -> Dict[str, int]:
+        """
+        Applies the retention policy and removes unreferenced blobs.
+
+        Returns:
+            Counts of removed refs, versions and blobs.
+        """
+        removed = {"refs": 0, "versions": 0, "blobs": 0}
+        now = time.time()
+        referenced = set()
+        with self._lock:
+            for dirpath, _, names in os.walk(self._ref_dir):
+                for name in names:
+                    if not name.endswith(".json"):
+                        continue
+                    ref_path = os.path.join(dirpath, name)
+                    versions = self._read_versions(ref_path)
+                    last_access = max((entry.get("accessed", entry["created"]) for entry in versions), default=0)
+                    if now - last_access > self.max_age_seconds:
+                        os.remove(ref_path)
+                        removed["refs"] += 1
+                        continue
+                    if len(versions) > self.max_versions:
+                        removed["versions"] += len(versions) - self.max_versions
+                        versions = versions[-self.max_versions:]
+                        self._write_versions(ref_path, versions)
+                    referenced.update(entry["digest"] for entry in versions)
+
+            for dirpath, _, names in os.walk(self._blob_dir):
+                for name in names:
+                    if name in referenced or name.endswith(".tmp"):
+                        continue
+                    mapped = self._maps.pop(name, None)
+                    if mapped is not None:
+                        self._close_map(mapped)
+                    try:
+                        os.remove(os.path.join(dirpath, name))
+                        removed["blobs"] += 1
+                    except OSError:
+                        # Windows'ta hâlâ map'li dosyalar silinemez; bir sonraki prune'da denenir
+                        pass
+        return removed
+
+    def close(self) -> None:
+        """Closes the open memory maps."""
+        with self._lock:
+            while self._maps:
+                self._close_map(self._maps.popitem()[1])
@@ -0,0 +1,102 @@
+"""
+Directory of cache entries evicted least recently used first.
+
+Shared storage layer of the response cache (llm_cache) and the web page
+cache. An entry is one or more files `<key><suffix>` in one directory; the
+modification time of its first file is the entry's last use, so `touch` on a
+hit is all the LRU bookkeeping a reader does, and several processes can
+share the directory. Files are replaced atomically (temporary file +
+os.replace), so a reader never sees a half-written entry.
+
+The eviction policy (entry count, total bytes, TTL) is left to the caller,
+which gets the entries oldest first from `scan`.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class DiskLRUStore:
+    """Atomic file storage with mtime-based LRU order."""
+
+    def __init__(self, directory: str, suffixes: Iterable[str] = (".json",)):
+        self.directory = directory
+        self.suffixes = tuple(suffixes)
+
+    def path(self, key: str, suffix: Optional[str] = None) -> str:
+        return os.path.join(self.directory, f"{key}{suffix or self.suffixes[0]}")
+
+    def read_json(self, key: str, suffix: Optional[str] = None) -> Optional[Any]:
+        """Returns the decoded file, or None if it is missing or unreadable."""
+        try:
+            with open(self.path(key, suffix), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_text(self, key: str, suffix: Optional[str] = None) -> Optional[str]:
+        try:
+            with open(self.path(key, suffix), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write(self, key: str, content: str, suffix: Optional[str] = None) -> int:
+        """Atomically replaces one file of the entry; returns the change in size."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key, suffix)
+        old_size = _size(path)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return _size(path) - old_size
+
+    def write_json(self, key: str, value: Any, suffix: Optional[str] = None) -> int:
+        return self.write(key, json.dumps(value, ensure_ascii=False), suffix)
+
+    def touch(self, key: str) -> None:
+        """Marks the entry as just used."""
+        try:
+            os.utime(self.path(key), None)
+        except OSError:
+            pass
+
+    def remove(self, key: str) -> Optional[int]:
+        """Deletes the entry's files; returns the bytes freed, or None if it was already gone."""
+        freed = None
+        for suffix in self.suffixes:
+            path = self.path(key, suffix)
+            size = _size(path)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            freed = (freed or 0) + size
+        return freed
+
+    def scan(self) -> List[Tuple[float, int, str]]:
+        """Lists the entries as (last use, size in bytes, key), least recently used first."""
+        primary = self.suffixes[0]
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(primary):
+                continue
+            key = name[:-len(primary)]
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            size = stat.st_size + sum(_size(self.path(key, suffix)) for suffix in self.suffixes[1:])
+            entries.append((stat.st_mtime, size, key))
+        entries.sort()
+        return entries
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
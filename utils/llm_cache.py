@@ -0,0 +1,240 @@
+"""
+Content-addressed response cache for the MultiAgent pipeline.
+
+Model responses are keyed by the model name, the rendered system instruction
+and the request contents, so a topic that has been processed before can be
+answered from disk instead of making another Gemini round-trip. The same store
+also keeps raw blobs (e.g. generated images) under caller supplied keys.
+
+Entries live as one JSON file per key under CACHE_DIR (see utils.disk_lru).
+Eviction is LRU (the file modification time is bumped on every hit) with a
+TTL measured from the time the entry was written. The LRU order is kept in memory, so a write only
+rescans the directory (for expired entries and files written by other
+processes) once every LLM_CACHE_SWEEP_EVERY writes.
+
+Function calls in a replayed response get new ids, as the model's own calls
+would. A cache hit skips the model call, and with it ADK's after_model callbacks;
+functions in `hit_listeners` are called with the cached response instead, so
+e.g. the profiler still records the step.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from utils.disk_lru import DiskLRUStore
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+LLM_CACHE_SWEEP_EVERY = int(os.getenv("LLM_CACHE_SWEEP_EVERY", 64))
+
+logger = logging.getLogger(__name__)
+
+
+def _strip_call_ids(value: Any) -> Any:
+    """Drops the per-run function call ids that ADK assigns, so keys stay stable across runs."""
+    if isinstance(value, dict):
+        return {
+            k: _strip_call_ids(v)
+            for k, v in value.items()
+            if not (k == "id" and ("name" in value and ("args" in value or "response" in value)))
+        }
+    if isinstance(value, list):
+        return [_strip_call_ids(v) for v in value]
+    return value
+
+
+def _renew_call_ids(llm_response: LlmResponse) -> None:
+    """Gives each replayed function call a fresh id, so its response is not matched to an earlier run's call."""
+    for part in (llm_response.content.parts if llm_response.content else None) or []:
+        if part.function_call is not None:
+            # Same format as ADK's client ids, which it strips again before sending contents to the model
+            part.function_call.id = f"adk-{uuid.uuid4()}"
+
+
+def make_key(*parts: Any) -> str:
+    """Builds a sha256 key from JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Cache key for a model request: model + rendered instruction + contents."""
+    instruction = None
+    if llm_request.config is not None and llm_request.config.system_instruction is not None:
+        instruction = llm_request.config.system_instruction
+        if not isinstance(instruction, str):
+            instruction = instruction.model_dump(mode="json", exclude_none=True)
+    contents = [
+        _strip_call_ids(content.model_dump(mode="json", exclude_none=True))
+        for content in llm_request.contents or []
+    ]
+    return make_key("llm", llm_request.model, instruction, contents)
+
+
+class ResponseCache:
+    """
+    Disk backed LRU+TTL cache for model responses and blobs.
+
+    The model side is used through `before_model` / `after_model`, which match
+    the signatures of ADK's before/after model callbacks. The pending request
+    key is remembered per (invocation, agent) between the two callbacks;
+    `finish_run` drops the keys a run left behind.
+    """
+
+    def __init__(
+        self,
+        directory: str = LLM_CACHE_DIR,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+        sweep_every: int = LLM_CACHE_SWEEP_EVERY,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.sweep_every = max(1, sweep_every)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.hit_listeners: List[Callable[[CallbackContext, LlmResponse], None]] = []
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._store = DiskLRUStore(directory)
+        # key -> last use, least recently used first; rebuilt from the directory by _sweep
+        self._index: "OrderedDict[str, float]" = OrderedDict()
+        self._writes = 0
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._sweep()
+
+    # --- Low level storage ---
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        entry = self._store.read_json(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            with self._lock:
+                self._remove(key)
+                self.misses += 1
+            return None
+
+        self._store.touch(key)
+        with self._lock:
+            self._index[key] = time.time()
+            self._index.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _write(self, key: str, kind: str, data: Any) -> None:
+        if not self.enabled:
+            return
+        entry = {"created": time.time(), "kind": kind, "data": data}
+        self._store.write_json(key, entry)
+        with self._lock:
+            self._index[key] = entry["created"]
+            self._index.move_to_end(key)
+            self._writes += 1
+            sweep = self._writes % self.sweep_every == 0
+        if sweep:
+            self._sweep()
+        else:
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        self._index.pop(key, None)
+        if self._store.remove(key) is not None:
+            self.evictions += 1
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until at most `max_entries` are left."""
+        with self._lock:
+            while len(self._index) > self.max_entries:
+                self._remove(next(iter(self._index)))
+
+    def _sweep(self) -> None:
+        """Rebuilds the LRU index from the directory, removing expired entries."""
+        with self._lock:
+            now = time.time()
+            entries = self._store.scan()
+            self._index = OrderedDict((key, mtime) for mtime, _, key in entries)
+            for mtime, _, key in entries:
+                # mtime is only ever bumped forward, so an entry whose last use is
+                # older than the TTL is certainly expired.
+                if now - mtime > self.ttl_seconds:
+                    self._remove(key)
+        self._evict()
+
+    # --- Blob API (images etc.) ---
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        entry = self._read(key)
+        if entry is None or entry.get("kind") != "bytes":
+            return None
+        return base64.b64decode(entry["data"])
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self._write(key, "bytes", base64.b64encode(data).decode("ascii"))
+
+    # --- Model response API ---
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Returns a cached LlmResponse for this request, or None to let the model run."""
+        if not self.enabled:
+            return None
+        key = request_key(llm_request)
+        entry = self._read(key)
+        if entry is not None and entry.get("kind") == "llm_response":
+            logger.info("Cache hit for agent: %s", callback_context.agent_name)
+            llm_response = LlmResponse.model_validate(entry["data"])
+            _renew_call_ids(llm_response)
+            for listener in self.hit_listeners:
+                listener(callback_context, llm_response)
+            return llm_response
+
+        self._pending[(callback_context.invocation_id, callback_context.agent_name)] = key
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """Stores the model response for the request seen in `before_model`."""
+        key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is None:
+            return None
+        if llm_response.partial or llm_response.error_code or llm_response.content is None:
+            return None
+        self._write(key, "llm_response", llm_response.model_dump(mode="json", exclude_none=True))
+        return None
+
+    def finish_run(self, invocation_id: Optional[str]) -> None:
+        """Forgets the run's pending keys, e.g. of model calls that failed before after_model."""
+        for pending in list(self._pending):
+            if pending[0] == invocation_id:
+                self._pending.pop(pending, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
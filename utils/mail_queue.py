@@ -0,0 +1,291 @@
+"""
+Pooled, asynchronous SMTP delivery for the MultiAgent reports.
+
+`send_mail` only builds the message and puts it on `mail_queue`; worker tasks
+take messages off the queue in batches and send each batch over one pooled
+SMTP connection in a worker thread, so the pipeline never waits for SMTP.
+Failed messages are retried with exponential backoff.
+
+For local testing point SMTP_SERVER/SMTP_PORT at a stand-in server and turn
+TLS off, e.g.:
+    python -m aiosmtpd -n -l localhost:8025
+    SMTP_SERVER=localhost SMTP_PORT=8025 SMTP_STARTTLS=0
+"""
+
+import asyncio
+import os
+import smtplib
+import threading
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 30))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") not in ("0", "false", "False")
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 10))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 3))
+MAIL_RETRY_BACKOFF_SECONDS = float(os.getenv("MAIL_RETRY_BACKOFF_SECONDS", 2))
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of logged-in SMTP connections.
+
+    Idle connections are checked with NOOP before reuse and reopened when the
+    server has dropped them, so TLS handshake and login are paid once per
+    connection instead of once per report.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str],
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = SMTP_STARTTLS,
+        size: int = SMTP_POOL_SIZE,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()  # TLS şifrelemesi başlat
+            if self.user:
+                server.login(self.user, self.password)  # Giriş yap
+        except Exception:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        """Returns a live connection; blocks while all `size` connections are in use."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    server = self._idle.pop() if self._idle else None
+                if server is None:
+                    return self._connect()
+                if self._is_alive(server):
+                    return server
+                self._discard(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server: smtplib.SMTP, broken: bool = False) -> None:
+        if broken:
+            self._discard(server)
+        else:
+            with self._lock:
+                self._idle.append(server)
+        self._slots.release()
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Quits every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server in idle:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._discard(server)
+
+
+@dataclass
+class OutgoingMail:
+    message: Message
+    from_addr: str
+    to_addrs: Sequence[str]
+    attempts: int = 0
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+
+class MailQueue:
+    """
+    Asynchronous outbound queue in front of an SMTPConnectionPool.
+
+    Workers are started on first use in the running event loop. The queue
+    and its workers are bound to that loop, so when a later `asyncio.run`
+    uses the queue they are recreated on the new loop and messages still
+    waiting in the old queue are moved over. `drain` waits until every
+    queued message has been delivered or has given up.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        batch_size: int = MAIL_BATCH_SIZE,
+        max_retries: int = MAIL_MAX_RETRIES,
+        retry_backoff_seconds: float = MAIL_RETRY_BACKOFF_SECONDS,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, int] = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "batches": 0}
+
+    @classmethod
+    def from_env(cls) -> "MailQueue":
+        pool = SMTPConnectionPool(
+            host=os.getenv("SMTP_SERVER"),  # Brevo SMTP sunucusu
+            port=int(os.getenv("SMTP_PORT") or 587),  # Brevo SMTP port (587 TLS, 465 SSL)
+            user=os.getenv("SMTP_USER"),  # Brevo'da tanımlı mail adresi
+            password=os.getenv("SMTP_PASSWORD"),  # Brevo API
+        )
+        return cls(pool)
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        leftover: List[OutgoingMail] = []
+        if self._queue is not None and self._loop is not loop:
+            # The queue belongs to a finished event loop (asyncio.run has cancelled its workers
+            # and retry tasks); keep the messages still waiting in it and start over on this loop
+            while not self._queue.empty():
+                leftover.append(self._queue.get_nowait())
+            self._queue = None
+            self._retry_tasks = set()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"mail-worker-{i}")
+                for i in range(self.pool.size)
+            ]
+        for mail in leftover:
+            mail.future = loop.create_future()
+            self._queue.put_nowait(mail)
+        return self._queue
+
+    def enqueue(self, message: Message, from_addr: str, to_addrs: Sequence[str]) -> asyncio.Future:
+        """Queues a message; the returned future resolves to True once sent, False if it gave up."""
+        queue = self._ensure_started()
+        mail = OutgoingMail(message, from_addr, list(to_addrs), future=asyncio.get_running_loop().create_future())
+        queue.put_nowait(mail)
+        self._stats["queued"] += 1
+        return mail.future
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            self._stats["batches"] += 1
+            try:
+                results = await asyncio.to_thread(self._send_batch, batch)
+            except Exception as e:
+                # Bağlantı kurulamadı: batch'teki bütün mesajlar başarısız sayılır
+                results = [(mail, e) for mail in batch]
+
+            for mail, error in results:
+                if error is None:
+                    self._stats["sent"] += 1
+                    if not mail.future.done():
+                        mail.future.set_result(True)
+                else:
+                    self._retry_or_fail(mail, error)
+                queue.task_done()
+
+    def _send_batch(self, batch: List[OutgoingMail]) -> List[Tuple[OutgoingMail, Optional[Exception]]]:
+        """Sends a batch over one pooled connection (runs in a worker thread)."""
+        server = self.pool.acquire()
+        broken = False
+        results = []
+        try:
+            for mail in batch:
+                if broken:
+                    results.append((mail, smtplib.SMTPServerDisconnected("connection lost earlier in batch")))
+                    continue
+                try:
+                    server.sendmail(mail.from_addr, mail.to_addrs, mail.message.as_string())
+                    results.append((mail, None))
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    broken = True
+                    results.append((mail, e))
+                except smtplib.SMTPException as e:
+                    results.append((mail, e))
+        finally:
+            self.pool.release(server, broken=broken)
+        return results
+
+    def _retry_or_fail(self, mail: OutgoingMail, error: Exception) -> None:
+        mail.attempts += 1
+        if mail.attempts > self.max_retries:
+            self._stats["failed"] += 1
+            print(f"E-posta gönderme sırasında bir hata oluştu: {error}")
+            if not mail.future.done():
+                mail.future.set_result(False)
+            return
+
+        self._stats["retried"] += 1
+        delay = self.retry_backoff_seconds * (2 ** (mail.attempts - 1))
+        task = asyncio.create_task(self._requeue_later(mail, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _requeue_later(self, mail: OutgoingMail, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(mail)
+
+    async def drain(self) -> None:
+        """Waits until the queue is empty, in-flight batches are done and no retry is pending."""
+        if self._queue is None:
+            return
+        self._ensure_started()
+        while True:
+            await self._queue.join()
+            if not self._retry_tasks:
+                return
+            await asyncio.gather(*list(self._retry_tasks), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Drains the queue, stops the workers and closes pooled connections."""
+        await self.drain()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        await asyncio.to_thread(self.pool.close)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "connections_opened": self.pool.connects}
+
+
+mail_queue = MailQueue.from_env()
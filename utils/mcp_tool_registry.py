@@ -0,0 +1,360 @@
+"""
+Declarative tool registry for MCPServer.
+
+Tools join the registry with the `@registry.tool()` decorator, or with
+`registry.register_lazy("package.module:function")` when the module should
+only be imported the first time the tool is listed or called. Dispatch is a
+dict lookup by name, and the MCP schemas are converted once and cached, so
+neither listing nor calling gets slower as tools are added.
+
+`ToolRegistry.call` keeps async tools on the event loop and runs sync
+(blocking) tools in a thread or process pool, with an optional per-tool
+concurrency limit, so one slow tool does not stall the server's other
+requests.
+
+The process pool starts its workers with "spawn": forking the server once the
+transport's stdin reader thread holds the stdin buffer lock deadlocks the
+children. Workers import the server module afresh and get their own copies of
+module state, so only stateless tools with picklable arguments may run there;
+tools registered with `thread_only=True` (anything touching server state such
+as the result pager, the tracer or buffered writers) always use the thread
+pool. Workers let go of the server's stdin/stdout and exit with the server,
+so a killed server cannot leave them holding the protocol pipe open.
+
+Importing google.adk takes seconds, so it is deferred until a schema or a
+FunctionTool is first needed. `warm()` does that work in a background thread
+after the server has started its handshake (a failed warm-up is forgotten,
+so the next listing retries it), and tools are called without ADK at all,
+with the arguments and the missing-argument error FunctionTool would produce
+(see `_ToolEntry.call_args`). With a
+`schema_cache` file the converted schemas are also kept on disk, keyed by
+the tool names, their source files and the ADK/MCP versions, so a restarted
+server can answer tools/list without importing ADK.
+"""
+
+import asyncio
+import functools
+import hashlib
+import importlib
+import importlib.metadata
+import importlib.util
+import inspect
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    from google.adk.tools.function_tool import FunctionTool
+    from mcp import types as mcp_types
+
+
+def _init_worker() -> None:
+    """Process pool initializer: detaches from the server's stdio and exits when the server does."""
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    parent = multiprocessing.parent_process()
+    if parent is not None:
+        def exit_with_parent():
+            parent.join()
+            os._exit(1)
+
+        threading.Thread(target=exit_with_parent, name="mcp-tool-parent-watch", daemon=True).start()
+
+
+class _ToolEntry:
+    """A registered tool; the function and its FunctionTool are resolved on first use."""
+
+    def __init__(self, name: str, target: Union[Callable, str], max_concurrency: Optional[int] = None,
+                 thread_only: bool = False):
+        self.name = name
+        self._target = target
+        self._tool: Optional["FunctionTool"] = None
+        self._mandatory_args: Optional[List[str]] = None
+        self._parameters: Optional[Dict[str, inspect.Parameter]] = None
+        self.max_concurrency = max_concurrency
+        self.thread_only = thread_only
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def func(self) -> Callable:
+        if isinstance(self._target, str):
+            module_name, _, attr = self._target.partition(":")
+            self._target = getattr(importlib.import_module(module_name), attr)
+        return self._target
+
+    @property
+    def tool(self) -> "FunctionTool":
+        if self._tool is None:
+            from google.adk.tools.function_tool import FunctionTool
+
+            self._tool = FunctionTool(self.func)
+        return self._tool
+
+    @property
+    def parameters(self) -> Dict[str, inspect.Parameter]:
+        if self._parameters is None:
+            self._parameters = dict(inspect.signature(self.func).parameters)
+        return self._parameters
+
+    @property
+    def mandatory_args(self) -> List[str]:
+        """Parameters without a default, as FunctionTool._get_mandatory_args reports them."""
+        if self._mandatory_args is None:
+            self._mandatory_args = [
+                name
+                for name, param in self.parameters.items()
+                if param.default is inspect.Parameter.empty
+                and param.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+                and name != "tool_context"  # FunctionTool passes it itself
+            ]
+        return self._mandatory_args
+
+    def call_args(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The keyword arguments FunctionTool.run_async would call the function with.
+
+        Arguments the function does not take are dropped (as newer ADK
+        releases do; a model that adds an extra field should not fail the
+        call) and `tool_context` is passed as None, as MCPServer has none.
+        """
+        parameters = self.parameters
+        args = {key: value for key, value in arguments.items() if key in parameters}
+        if "tool_context" in parameters:
+            args["tool_context"] = None
+        return args
+
+    @property
+    def source_path(self) -> Optional[str]:
+        """File that defines the tool, found without importing lazy targets."""
+        if isinstance(self._target, str):
+            spec = importlib.util.find_spec(self._target.partition(":")[0])
+            return spec.origin if spec is not None else None
+        code = getattr(self._target, "__code__", None)
+        return code.co_filename if code is not None else None
+
+    @property
+    def is_async(self) -> bool:
+        func = self.func
+        return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+    @property
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+def _missing_args_error(entry: _ToolEntry, missing: List[str]) -> Dict[str, str]:
+    """The result FunctionTool.run_async returns instead of calling a tool with missing arguments."""
+    name = getattr(entry.func, "__name__", entry.name)
+    missing_str = "\n".join(missing)
+    return {"error": f"""Invoking `{name}()` failed as the following mandatory input parameters are not present:
+{missing_str}
+You could retry calling this tool, but it is IMPORTANT for you to provide all the mandatory parameters."""}
+
+
+class ToolRegistry:
+    """Name -> tool mapping with cached MCP schemas."""
+
+    def __init__(self, pool: str = "thread", max_workers: Optional[int] = None, schema_cache: Optional[str] = None):
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Unknown tool pool '{pool}', expected 'thread' or 'process'.")
+        self._entries: Dict[str, _ToolEntry] = {}
+        self._schema_cache = schema_cache
+        self._schemas: Optional[List["mcp_types.Tool"]] = None
+        self._schemas_lock = threading.Lock()
+        self._warm_task: Optional[asyncio.Future] = None
+        self._pool = pool
+        self._max_workers = max_workers
+        self._executors: Dict[str, Executor] = {}
+
+    def _add(self, name: str, target: Union[Callable, str], max_concurrency: Optional[int] = None,
+             thread_only: bool = False) -> None:
+        if name in self._entries:
+            raise ValueError(f"Tool '{name}' is already registered.")
+        self._entries[name] = _ToolEntry(name, target, max_concurrency, thread_only)
+        self._schemas = None
+
+    def tool(self, func: Optional[Callable] = None, *, name: Optional[str] = None, max_concurrency: Optional[int] = None,
+             thread_only: bool = False):
+        """
+        Decorator registering a function as an MCP tool (the function is returned unchanged).
+
+        Args:
+            name: Tool name, defaults to the function name.
+            max_concurrency: Maximum number of concurrent calls of this tool (unlimited if None).
+            thread_only: Never run the tool in the process pool (it uses server state).
+
+        Usage:
+            @registry.tool()
+            def add_numbers(a: int, b: int) -> dict: ...
+        """
+        def decorator(f: Callable) -> Callable:
+            self._add(name or f.__name__, f, max_concurrency, thread_only)
+            return f
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    def register_lazy(self, target: str, name: Optional[str] = None, max_concurrency: Optional[int] = None,
+                      thread_only: bool = False) -> None:
+        """
+        Registers a tool by import path ("package.module:function").
+
+        The module is imported when the tool is first listed or called. The
+        name defaults to the function name, which is also the name ADK gives
+        the FunctionTool.
+        """
+        self._add(name or target.rpartition(":")[2], target, max_concurrency, thread_only)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, name: str) -> "FunctionTool":
+        """Returns the FunctionTool for `name`; raises KeyError for unknown tools."""
+        return self._entries[name].tool
+
+    def get_function(self, name: str) -> Callable:
+        """Returns the plain function registered under `name`."""
+        return self._entries[name].func
+
+    def fingerprint(self) -> str:
+        """Hash of the tool names, their source files and the ADK/MCP versions."""
+        parts: List[Any] = []
+        for package in ("google-adk", "mcp"):
+            try:
+                parts.append(importlib.metadata.version(package))
+            except importlib.metadata.PackageNotFoundError:
+                parts.append(None)
+        for entry in self._entries.values():
+            path = entry.source_path
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+            parts.append([entry.name, path, stat and stat.st_mtime_ns, stat and stat.st_size])
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _load_cached_schemas(self, fingerprint: str) -> Optional[List["mcp_types.Tool"]]:
+        from mcp import types as mcp_types
+
+        try:
+            with open(self._schema_cache, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("fingerprint") != fingerprint:
+            return None
+        return [mcp_types.Tool.model_validate(schema) for schema in cached["tools"]]
+
+    def _store_cached_schemas(self, fingerprint: str, schemas: List["mcp_types.Tool"]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self._schema_cache) or ".", exist_ok=True)
+            tmp_path = f"{self._schema_cache}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "fingerprint": fingerprint,
+                    "tools": [schema.model_dump(mode="json", exclude_none=True) for schema in schemas],
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self._schema_cache)
+        except OSError:
+            pass  # the cache is only an optimisation
+
+    def list_tools(self) -> List["mcp_types.Tool"]:
+        """Returns the MCP schemas of all tools, converting them only once."""
+        with self._schemas_lock:
+            if self._schemas is None:
+                fingerprint = self.fingerprint() if self._schema_cache else None
+                schemas = self._load_cached_schemas(fingerprint) if fingerprint else None
+                if schemas is None:
+                    from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+
+                    schemas = []
+                    for entry in self._entries.values():
+                        schema = adk_to_mcp_tool_type(entry.tool)
+                        schema.name = entry.name
+                        schemas.append(schema)
+                    if fingerprint:
+                        self._store_cached_schemas(fingerprint, schemas)
+                self._schemas = schemas
+            return self._schemas
+
+    def warm(self) -> asyncio.Future:
+        """Starts converting the schemas in a background thread (once); returns the pending future."""
+        if self._warm_task is None:
+            self._warm_task = asyncio.ensure_future(asyncio.to_thread(self.list_tools))
+            self._warm_task.add_done_callback(self._forget_failed_warm)
+        return self._warm_task
+
+    def _forget_failed_warm(self, task: asyncio.Future) -> None:
+        # A failed future would otherwise be handed to every later listing
+        if (task.cancelled() or task.exception() is not None) and self._warm_task is task:
+            self._warm_task = None
+
+    async def list_tools_async(self) -> List["mcp_types.Tool"]:
+        """list_tools without blocking the event loop while ADK is imported."""
+        if self._schemas is not None:
+            return self._schemas
+        return await self.warm()
+
+    # --- Execution ---
+    def _get_executor(self, kind: str) -> Executor:
+        executor = self._executors.get(kind)
+        if executor is None:
+            if kind == "process":
+                executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            else:
+                executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="mcp-tool")
+            self._executors[kind] = executor
+        return executor
+
+    def start_pool(self) -> None:
+        """Creates the worker pool; call it before the transport starts its reader threads."""
+        self._get_executor(self._pool)
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """
+        Runs a tool; raises KeyError for unknown tools.
+
+        Async tools are awaited on the event loop, sync tools run in the
+        worker pool. Calls wait for a slot when the tool's max_concurrency
+        is reached.
+        """
+        entry = self._entries[name]
+        semaphore = entry.semaphore
+        if semaphore is None:
+            return await self._call(entry, arguments)
+        async with semaphore:
+            return await self._call(entry, arguments)
+
+    async def _call(self, entry: _ToolEntry, arguments: Dict[str, Any]) -> Any:
+        # Same checks and call FunctionTool.run_async makes, whose result is the function's
+        # return value as is; building the FunctionTool would import ADK on the event loop
+        args = entry.call_args(arguments)
+        missing = [arg for arg in entry.mandatory_args if arg not in args]
+        if missing:
+            return _missing_args_error(entry, missing)
+        if entry.is_async:
+            return await entry.func(**args)
+
+        kind = "thread" if entry.thread_only else self._pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(kind), functools.partial(entry.func, **args))
+
+    def shutdown(self) -> None:
+        """Stops the worker pools."""
+        executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True)
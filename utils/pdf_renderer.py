@@ -0,0 +1,154 @@
+"""
+In-memory PDF rendering for the MultiAgent report.
+
+The report image is passed to reportlab as a BytesIO, so nothing is written to
+a temporary file, and paragraph styles are built once at import time. The
+reportlab build is CPU bound, so `render_report_pdf_async` runs it in a worker
+pool to keep the event loop free for other sessions.
+
+The pool is a thread pool by default: a report builds in milliseconds, and a
+process pool started with spawn (Windows, macOS) re-imports the main module
+in every worker, which for MultiAgent.py means building the agents and
+toolsets again. PDF_RENDER_POOL=process is only worth it for large reports on
+fork platforms.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional, Union
+
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image as PlatypusImage
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+PDF_RENDER_POOL = os.getenv("PDF_RENDER_POOL", "thread")
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", 2))
+
+PAGE_MARGIN = 50
+
+# --- Türkçe karakter desteği ---
+# Base-14 fontları (Helvetica) kullanıldığı için Türkçe karakterler Latin karşılıklarına dönüştürülüyor.
+_TURKISH_TRANSLATION = str.maketrans({
+    'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G',
+    'ü': 'u', 'Ü': 'U', 'ş': 's', 'Ş': 'S',
+    'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'
+})
+
+
+def fix_turkish_chars(text: str) -> str:
+    """Replaces Turkish specific characters with their Latin counterparts."""
+    return text.translate(_TURKISH_TRANSLATION)
+
+
+# --- Sayfa stilleri (bir kez oluşturulur) ---
+_styles = getSampleStyleSheet()
+
+# Metin stili - Sola hizalı (TA_LEFT)
+LEFT_ALIGNED_STYLE = ParagraphStyle(
+    name='LeftAlignedStyle',
+    parent=_styles['Normal'],
+    fontName='Helvetica', # Sabit font Helvetica
+    alignment=TA_LEFT,
+    fontSize=12,
+    leading=14,
+    firstLineIndent=0, # İlk satır girintisi kaldırıldı
+)
+
+# Başlık stili
+TITLE_STYLE = ParagraphStyle(
+    name='TitleStyle',
+    parent=_styles['Heading1'],
+    fontName='Helvetica', # Sabit font Helvetica
+    alignment=TA_LEFT, # Başlık da sola hizalı
+    fontSize=16,
+    leading=20,
+)
+
+
+def render_report_pdf(title: str, report_text: str, image_data: Optional[Union[bytes, memoryview]] = None) -> bytes:
+    """
+    Builds the report PDF entirely in memory.
+
+    Args:
+        title: Report title (already processed with fix_turkish_chars).
+        report_text: Report body (already processed with fix_turkish_chars).
+        image_data: Encoded image (PNG/JPEG) placed under the title, if any. A
+            memoryview (e.g. an artifact's memory map) is copied here, once.
+
+    Returns:
+        The PDF document as bytes.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=PAGE_MARGIN,
+        rightMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN
+    )
+
+    flowables = [Paragraph(title, TITLE_STYLE), Spacer(1, 20)]
+
+    if image_data:
+        image_data = bytes(image_data)  # BytesIO shares a bytes buffer but copies any other buffer
+        image_width, image_height = ImageReader(BytesIO(image_data)).getSize()
+        max_img_width = A4[0] - 2 * PAGE_MARGIN
+        scale_factor = min(1, max_img_width / image_width)
+        flowables.append(
+            PlatypusImage(
+                BytesIO(image_data),
+                width=image_width * scale_factor,
+                height=image_height * scale_factor,
+            )
+        )
+        flowables.append(Spacer(1, 20))
+
+    # Metni paragraf olarak ekle
+    paragraphs = report_text.split('\n\n')
+    if len(paragraphs) == 1:
+        paragraphs = report_text.split('\n')
+
+    for paragraph in paragraphs:
+        if paragraph.strip():
+            flowables.append(Paragraph(paragraph, LEFT_ALIGNED_STYLE))
+            flowables.append(Spacer(1, 10))
+
+    doc.build(flowables)
+    return buffer.getvalue()
+
+
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if PDF_RENDER_POOL == "process":
+            _executor = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix="pdf-render")
+    return _executor
+
+
+async def render_report_pdf_async(
+    title: str, report_text: str, image_data: Optional[Union[bytes, memoryview]] = None
+) -> bytes:
+    """Runs render_report_pdf in the worker pool and awaits the result."""
+    loop = asyncio.get_running_loop()
+    if isinstance(image_data, memoryview) and PDF_RENDER_POOL == "process":
+        image_data = image_data.tobytes()  # memoryview cannot be pickled to a worker process
+    return await loop.run_in_executor(_get_executor(), render_report_pdf, title, report_text, image_data)
+
+
+def shutdown() -> None:
+    """Stops the worker pool (called at application exit)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,98 @@
+"""
+Workflow agents for the MultiAgent pipeline.
+
+Some steps of the MultiAgent pipeline only exist so that the model can decide
+to call a single tool with no arguments. `ToolStepAgent` calls the tool
+function directly instead, and can be placed in a SequentialAgent or
+ParallelAgent like any other agent. `ShortCircuitSequentialAgent` stops
+running its remaining sub-agents once a state flag has been set.
+"""
+
+import inspect
+from typing import Any, AsyncGenerator, Callable, Dict, Optional
+
+from google.adk.agents import BaseAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+
+class ToolStepAgent(BaseAgent):
+    """
+    Agent that runs one tool function without a model round-trip.
+
+    The function is called with `tool_context` (if it declares that parameter),
+    the fixed `args`, and values read from session state through `state_args`
+    (parameter name -> state key). State changes made through the tool context
+    are committed with the emitted event, and the result is optionally stored
+    under `output_key`.
+
+    Example:
+        ToolStepAgent(name="send_mail", func=send_mail)
+    """
+
+    func: Callable[..., Any]
+    """The tool function (sync or async) to call."""
+
+    args: Dict[str, Any] = {}
+    """Fixed keyword arguments for the call."""
+
+    state_args: Dict[str, str] = {}
+    """Keyword arguments read from session state, as parameter name -> state key."""
+
+    output_key: Optional[str] = None
+    """If set, the tool result is stored in session state under this key."""
+
+    def _build_kwargs(self, tool_context: ToolContext) -> Dict[str, Any]:
+        kwargs = dict(self.args)
+        for param, state_key in self.state_args.items():
+            kwargs[param] = tool_context.state.get(state_key)
+        if "tool_context" in inspect.signature(self.func).parameters:
+            kwargs["tool_context"] = tool_context
+        return kwargs
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        tool_context = ToolContext(ctx)
+        result = self.func(**self._build_kwargs(tool_context))
+        if inspect.isawaitable(result):
+            result = await result
+
+        if self.output_key:
+            tool_context.state[self.output_key] = result
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text=f"{self.func.__name__}: {result}")],
+            ),
+            actions=tool_context.actions,
+        )
+
+
+class ShortCircuitSequentialAgent(SequentialAgent):
+    """
+    SequentialAgent that stops as soon as `stop_key` is truthy in session state.
+
+    The flag is checked after each sub-agent has finished, when its state
+    changes have already been applied to the session. The remaining
+    sub-agents are not run at all, so an MCP toolset that belongs only to a
+    later agent is never listed or called.
+    """
+
+    stop_key: str = "stop_sequential"
+    """Session state key that ends the sequence when set."""
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        for sub_agent in self.sub_agents:
+            async for event in sub_agent.run_async(ctx):
+                yield event
+            if ctx.session.state.get(self.stop_key):
+                return
@@ -0,0 +1,259 @@
+"""
+Per-stage latency and token instrumentation for the MultiAgent pipeline.
+
+`PipelineProfiler` exposes ADK callbacks that time every agent run, model
+call and tool call, and read input/output token counts from the model
+responses. Spans are grouped per invocation; `finish_run` writes the run's
+JSON trace and refreshes an aggregate Prometheus text file
+(`<PROFILE_DIR>/metrics.prom`) with latency histograms and token counters.
+
+Callback order matters because ADK stops at the first callback that returns
+a value: put `before_agent`/`before_model` last in the before-lists (so spans
+only open when the stage really runs) and `after_agent`/`after_model` first
+in the after-lists.
+
+Responses served by the response cache never reach after_model (nor
+before_model, when the cache sits earlier in the list); `record_cache_hit` is
+registered as a cache hit listener and records them as zero-token "model"
+spans marked `cached`, counted separately from the latency histograms.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "1") not in ("0", "false", "False")
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+
+class PipelineProfiler:
+    """Collects per-run traces and process-wide aggregates."""
+
+    def __init__(self, output_dir: str = PROFILE_DIR, enabled: bool = PROFILING_ENABLED):
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._open: Dict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._tokens: Dict[Tuple[str, str], int] = {}
+        self._cache_hits: Dict[str, int] = {}
+
+    # --- Span bookkeeping ---
+    def _run(self, invocation_id: str) -> Dict[str, Any]:
+        run = self._runs.get(invocation_id)
+        if run is None:
+            run = {
+                "invocation_id": invocation_id,
+                "started_at": time.time(),
+                "_started": time.perf_counter(),
+                "spans": [],
+            }
+            self._runs[invocation_id] = run
+        return run
+
+    def _start(self, invocation_id: str, kind: str, key: str, **attributes: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            run = self._run(invocation_id)
+            now = time.perf_counter()
+            span = {"kind": kind, "start_offset_ms": round((now - run["_started"]) * 1000, 3), **attributes}
+            self._open[(invocation_id, kind, key)] = (now, span)
+
+    def _end(self, invocation_id: str, kind: str, key: str, **attributes: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            opened = self._open.pop((invocation_id, kind, key), None)
+            if opened is None:
+                return
+            started, span = opened
+            elapsed = time.perf_counter() - started
+            span["duration_ms"] = round(elapsed * 1000, 3)
+            span.update(attributes)
+            self._run(invocation_id)["spans"].append(span)
+
+            histogram_key = (kind, span["name"])
+            if histogram_key not in self._histograms:
+                self._histograms[histogram_key] = _Histogram()
+            self._histograms[histogram_key].observe(elapsed)
+
+    # --- Agent callbacks ---
+    def before_agent(self, callback_context: CallbackContext) -> None:
+        self._start(callback_context.invocation_id, "agent", callback_context.agent_name, name=callback_context.agent_name)
+        return None
+
+    def after_agent(self, callback_context: CallbackContext) -> None:
+        self._end(callback_context.invocation_id, "agent", callback_context.agent_name)
+        return None
+
+    # --- Model callbacks ---
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        self._start(
+            callback_context.invocation_id,
+            "model",
+            callback_context.agent_name,
+            name=callback_context.agent_name,
+            model=llm_request.model,
+        )
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        usage = llm_response.usage_metadata
+        input_tokens = (usage.prompt_token_count or 0) if usage else 0
+        output_tokens = (usage.candidates_token_count or 0) if usage else 0
+        self._end(
+            callback_context.invocation_id,
+            "model",
+            callback_context.agent_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+        if self.enabled:
+            with self._lock:
+                for direction, count in (("input", input_tokens), ("output", output_tokens)):
+                    key = (callback_context.agent_name, direction)
+                    self._tokens[key] = self._tokens.get(key, 0) + count
+        return None
+
+    def record_cache_hit(self, callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+        """Records a model call answered by the response cache (see ResponseCache.hit_listeners)."""
+        if not self.enabled:
+            return
+        agent = callback_context.agent_name
+        with self._lock:
+            # Opened by before_model if it ran before the cache callback; the model did not run
+            self._open.pop((callback_context.invocation_id, "model", agent), None)
+            run = self._run(callback_context.invocation_id)
+            run["spans"].append({
+                "kind": "model",
+                "name": agent,
+                "start_offset_ms": round((time.perf_counter() - run["_started"]) * 1000, 3),
+                "duration_ms": 0.0,
+                "cached": True,
+                "input_tokens": 0,
+                "output_tokens": 0,
+            })
+            self._cache_hits[agent] = self._cache_hits.get(agent, 0) + 1
+
+    # --- Tool callbacks ---
+    def before_tool(self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[dict]:
+        self._start(
+            tool_context.invocation_id,
+            "tool",
+            tool_context.function_call_id or tool.name,
+            name=tool.name,
+            agent=tool_context.agent_name,
+        )
+        return None
+
+    def after_tool(self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any) -> Optional[dict]:
+        self._end(tool_context.invocation_id, "tool", tool_context.function_call_id or tool.name)
+        return None
+
+    # --- Export ---
+    def finish_run(self, invocation_id: Optional[str], **metadata: Any) -> Optional[str]:
+        """
+        Writes the run's JSON trace and refreshes the Prometheus file.
+
+        Args:
+            invocation_id: The run's invocation id (from any of its events).
+            **metadata: Extra fields stored in the trace (topic, session id ...).
+
+        Returns:
+            Path of the written trace, or None if there was nothing to write.
+        """
+        if not self.enabled or invocation_id is None:
+            return None
+        with self._lock:
+            run = self._runs.pop(invocation_id, None)
+            # Kapanmamış span'ler (hata vb.) trace'e yazılmaz
+            for key in [key for key in self._open if key[0] == invocation_id]:
+                del self._open[key]
+        if run is None:
+            return None
+
+        run["total_ms"] = round((time.perf_counter() - run.pop("_started")) * 1000, 3)
+        run.update(metadata)
+        run["totals"] = self._summarize(run["spans"])
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"run_{invocation_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+        self.write_prometheus()
+        return path
+
+    @staticmethod
+    def _summarize(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        totals: Dict[str, Any] = {"input_tokens": 0, "output_tokens": 0, "cached_model_calls": 0, "by_stage_ms": {}}
+        for span in spans:
+            totals["cached_model_calls"] += 1 if span.get("cached") else 0
+            totals["input_tokens"] += span.get("input_tokens", 0)
+            totals["output_tokens"] += span.get("output_tokens", 0)
+            key = f"{span['kind']}:{span['name']}"
+            totals["by_stage_ms"][key] = round(totals["by_stage_ms"].get(key, 0) + span["duration_ms"], 3)
+        return totals
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP pipeline_stage_duration_seconds Wall time per agent run, model call and tool call.",
+            "# TYPE pipeline_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                # observe() already counts cumulatively
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    lines.append(f'pipeline_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'pipeline_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"pipeline_stage_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"pipeline_stage_duration_seconds_count{{{labels}}} {histogram.count}")
+
+            lines.append("# HELP pipeline_model_tokens_total Model tokens per agent and direction.")
+            lines.append("# TYPE pipeline_model_tokens_total counter")
+            for (agent, direction), count in sorted(self._tokens.items()):
+                lines.append(f'pipeline_model_tokens_total{{agent="{agent}",direction="{direction}"}} {count}')
+
+            lines.append("# HELP pipeline_model_cache_hits_total Model calls answered by the response cache.")
+            lines.append("# TYPE pipeline_model_cache_hits_total counter")
+            for agent, count in sorted(self._cache_hits.items()):
+                lines.append(f'pipeline_model_cache_hits_total{{agent="{agent}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, "metrics.prom")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+
+profiler = PipelineProfiler()
@@ -0,0 +1,218 @@
+"""
+Paged delivery of large MCPServer tool results.
+
+A tool result whose JSON is longer than `page_chars` is not sent in one
+piece: the client gets the first page plus a continuation cursor and reads
+the rest with the `read_result_page` tool. The JSON is produced lazily with
+JSONEncoder.iterencode, so the first page goes out as soon as it has been
+encoded and each later page is encoded when it is read. Strings (the usual
+large result, e.g. load_web_page text) are escaped one page-sized slice at a
+time instead of in one piece, so the pager keeps about one page of text per
+pending result. Reading the same cursor again returns the same page, so a
+retried read is safe.
+
+A result that is certainly longer than `max_chars` (its strings alone are)
+is rejected before anything is encoded; otherwise its JSON is cut at
+`max_chars` and the read that reaches the limit returns an error. Pending
+results expire after `ttl_seconds`; beyond `max_results` pending results
+the oldest are dropped.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+MCP_RESULT_PAGE_CHARS = int(os.getenv("MCP_RESULT_PAGE_CHARS", 32 * 1024))
+MCP_RESULT_MAX_CHARS = int(os.getenv("MCP_RESULT_MAX_CHARS", 16 * 1024 * 1024))
+MCP_RESULT_STORE_MAX_RESULTS = int(os.getenv("MCP_RESULT_STORE_MAX_RESULTS", 64))
+MCP_RESULT_TTL_SECONDS = float(os.getenv("MCP_RESULT_TTL_SECONDS", 600))
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class ResultTooLargeError(ValueError):
+    """The result's JSON is longer than the pager's `max_chars`."""
+
+
+def _iterencode(value: Any, slice_chars: int) -> Iterator[str]:
+    """Same text as _ENCODER.iterencode, but strings come out in slices of at most `slice_chars` characters."""
+    if isinstance(value, str):
+        yield '"'
+        for start in range(0, len(value), slice_chars):
+            # Escaping is per character, so escaped slices join to the escaped string
+            yield encode_basestring(value[start:start + slice_chars])[1:-1]
+        yield '"'
+    elif isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield f"{',' if index else ''}{encode_basestring(key)}:"
+            yield from _iterencode(item, slice_chars)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from _iterencode(item, slice_chars)
+        yield "]"
+    else:
+        yield from _ENCODER.iterencode(value)
+
+
+def _min_chars(value: Any) -> int:
+    """Lower bound of the JSON length of `value`, counted without encoding it."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(_min_chars(key) + 1 + _min_chars(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(_min_chars(item) for item in value)
+    return 1
+
+
+class _PendingResult:
+    """Encoder state of a result that is being read page by page."""
+
+    def __init__(self, chunks: Iterator[str], carry: str, offset: int):
+        self.chunks = chunks
+        self.carry = carry  # encoded text after `offset` that did not fit in the last page
+        self.offset = offset  # characters handed out so far
+        self.last_page: Optional[Tuple[int, str, bool]] = None  # (offset, text, is_last) for retried reads
+        self.touched = time.monotonic()
+
+
+class ResultPager:
+    """Encodes results page by page and serves the remaining pages by cursor."""
+
+    def __init__(
+        self,
+        page_chars: int = MCP_RESULT_PAGE_CHARS,
+        max_chars: int = MCP_RESULT_MAX_CHARS,
+        max_results: int = MCP_RESULT_STORE_MAX_RESULTS,
+        ttl_seconds: float = MCP_RESULT_TTL_SECONDS,
+    ):
+        self.page_chars = page_chars
+        self.max_chars = max_chars
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, _PendingResult]" = OrderedDict()
+        self.paged = 0
+        self.expired = 0
+        self.too_large = 0
+
+    def _cursor(self, result_id: str, offset: int) -> str:
+        return f"{result_id}:{offset}"
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._results:
+            result_id, pending = next(iter(self._results.items()))
+            if now - pending.touched <= self.ttl_seconds and len(self._results) <= self.max_results:
+                break
+            del self._results[result_id]
+            self.expired += 1
+
+    def _fill(self, chunks: Iterator[str], text: str, limit: int) -> Tuple[str, bool]:
+        """Encodes until `text` is longer than `limit` characters; returns (text, exhausted)."""
+        if len(text) > limit:
+            return text, False
+        parts = [text]
+        size = len(text)
+        for chunk in chunks:
+            parts.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return "".join(parts), False
+        return "".join(parts), True
+
+    def paginate(self, value: Any) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Returns (first page, continuation) for a JSON-serialisable result.
+
+        The continuation is None when the JSON fits in one page; otherwise it
+        holds `next_cursor`. `total_chars` is only known on the last page.
+        Raises ResultTooLargeError when the JSON is certainly longer than
+        `max_chars`.
+        """
+        if _min_chars(value) > self.max_chars:
+            with self._lock:
+                self.too_large += 1
+            raise ResultTooLargeError(self._too_large_message())
+        chunks = _iterencode(value, self.page_chars)
+        text, exhausted = self._fill(chunks, "", self.page_chars)
+        if exhausted and len(text) <= self.page_chars:
+            return text, None
+
+        result_id = uuid.uuid4().hex
+        page, carry = text[:self.page_chars], text[self.page_chars:]
+        with self._lock:
+            self._results[result_id] = _PendingResult(chunks, carry, len(page))
+            self.paged += 1
+            self._prune()
+        return page, self._continuation(result_id, len(page), done=False)
+
+    def _continuation(self, result_id: str, offset: int, done: bool) -> Dict[str, Any]:
+        return {
+            "next_cursor": None if done else self._cursor(result_id, offset),
+            "returned_chars": offset,
+            "total_chars": offset if done else None,
+        }
+
+    def read(self, cursor: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the page at `cursor` and the continuation after it.
+
+        Raises KeyError for an unknown, expired or out of order cursor and
+        ResultTooLargeError when the page would pass `max_chars`.
+        """
+        result_id, _, offset_text = cursor.partition(":")
+        offset = int(offset_text or 0)
+        with self._lock:
+            self._prune()
+            pending = self._results.get(result_id)
+            if pending is None:
+                raise KeyError(f"Unknown or expired cursor: {cursor}")
+            pending.touched = time.monotonic()
+            self._results.move_to_end(result_id)
+            if pending.last_page is not None and pending.last_page[0] == offset:
+                _, page, done = pending.last_page  # the same page again, e.g. a retried read
+                return page, self._continuation(result_id, offset + len(page), done)
+            if offset != pending.offset:
+                raise KeyError(f"Cursor out of order: {cursor}")
+
+            # Pages are encoded one at a time under the lock, so concurrent reads can't interleave the encoder
+            text, exhausted = self._fill(pending.chunks, pending.carry, self.page_chars)
+            page, pending.carry = text[:self.page_chars], text[self.page_chars:]
+            if offset + len(page) > self.max_chars:
+                del self._results[result_id]
+                self.too_large += 1
+                raise ResultTooLargeError(self._too_large_message())
+            done = exhausted and not pending.carry
+            pending.offset = offset + len(page)
+            pending.last_page = (offset, page, done)
+        return page, self._continuation(result_id, offset + len(page), done)
+
+    def _too_large_message(self) -> str:
+        return (
+            f"Result is longer than MCP_RESULT_MAX_CHARS ({self.max_chars}); "
+            "call the tool with a narrower request"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "paged_results": self.paged,
+                "pending_results": len(self._results),
+                "expired": self.expired,
+                "too_large": self.too_large,
+                "page_chars": self.page_chars,
+            }
+
+
+result_pager = ResultPager()
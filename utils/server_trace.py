@@ -0,0 +1,158 @@
+"""
+Structured, leveled tracing and per-tool latency statistics for MCPServer.
+
+Events are written as one JSON object per line to stderr (stdout is the MCP
+protocol stream on the stdio transport) or to MCP_LOG_FILE. The level check
+happens before any formatting, so events below MCP_LOG_LEVEL cost one
+comparison. Tool arguments are only rendered at DEBUG level and are cut to
+MCP_LOG_MAX_ARG_CHARS.
+
+Every tool call is recorded in a per-tool latency histogram with call and
+error counters; `stats()` returns them (with percentile estimates) for the
+`server_stats` tool.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+MCP_LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "INFO")
+MCP_LOG_FILE = os.getenv("MCP_LOG_FILE", "")  # empty -> stderr
+MCP_LOG_MAX_ARG_CHARS = int(os.getenv("MCP_LOG_MAX_ARG_CHARS", 200))
+
+# Histogram bucket upper bounds in seconds
+TOOL_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ToolStats:
+    def __init__(self):
+        self.buckets = [0] * len(TOOL_LATENCY_BUCKETS)
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool) -> None:
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+        for index, bound in enumerate(TOOL_LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th call (the max for the overflow bucket)."""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(TOOL_LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.calls * 1000, 3) if self.calls else None,
+            "p50_ms": _ms(self.percentile(0.50)),
+            "p95_ms": _ms(self.percentile(0.95)),
+            "p99_ms": _ms(self.percentile(0.99)),
+            "max_ms": _ms(self.max) if self.calls else None,
+            "buckets": {str(bound): count for bound, count in zip(TOOL_LATENCY_BUCKETS, self.buckets) if count},
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class ServerTracer:
+    """Leveled JSON-lines event log plus per-tool latency histograms and error counts."""
+
+    def __init__(
+        self,
+        level: str = MCP_LOG_LEVEL,
+        log_file: str = MCP_LOG_FILE,
+        max_arg_chars: int = MCP_LOG_MAX_ARG_CHARS,
+    ):
+        self.max_arg_chars = max_arg_chars
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._tools: Dict[str, _ToolStats] = {}
+
+        self.logger = logging.getLogger("mcp_server")
+        self.logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = logging.FileHandler(log_file, encoding="utf-8") if log_file else logging.StreamHandler(sys.stderr)
+            handler.setFormatter(_JsonLineFormatter())
+            self.logger.addHandler(handler)
+
+    # --- Events ---
+    def enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def event(self, level: int, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.event(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.event(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.event(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.event(logging.ERROR, event, **fields)
+
+    def preview(self, value: Any) -> str:
+        """Compact, truncated rendering of tool arguments for DEBUG events."""
+        text = json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+        if len(text) > self.max_arg_chars:
+            return f"{text[:self.max_arg_chars]}...(+{len(text) - self.max_arg_chars} chars)"
+        return text
+
+    # --- Tool statistics ---
+    def record_call(self, tool: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._tools.get(tool)
+            if stats is None:
+                stats = self._tools[tool] = _ToolStats()
+            stats.observe(seconds, error)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {name: stats.as_dict() for name, stats in sorted(self._tools.items())}
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "calls": sum(tool["calls"] for tool in tools.values()),
+            "errors": sum(tool["errors"] for tool in tools.values()),
+            "tools": tools,
+        }
+
+
+tracer = ServerTracer()
@@ -0,0 +1,66 @@
+"""
+Process-lifetime MCP toolset shared by every pipeline run.
+
+Building a CustomMCPToolset per run spawns a new MCP server subprocess and
+repeats the handshake and tool listing each time. `SharedMCPToolset` creates
+the toolset once and hands it out without connecting, so the server is only
+started when an agent first lists or calls its tools (a run stopped before
+the MCP step never pays for it). Concurrent first calls open a single
+session: CustomMcpSessionManager.create_session serialises pool creation.
+Health checks and reconnects are done by the session manager as well, which
+pings the session when it is handed out (at most once per
+MCP_HEALTH_CHECK_INTERVAL_SECONDS) and replaces it with backoff when the
+server no longer answers. `close` should be awaited by the application on
+shutdown.
+
+The toolset's sessions and connection tasks belong to the event loop they
+were opened on, so the toolset is tied to the loop it was created on. When
+it is used from another loop (e.g. a second asyncio.run), a new toolset is
+created; asyncio.run cancelled the old loop's connection tasks, which
+closed their sessions and stopped their servers, so the old toolset is only
+dropped.
+"""
+
+import asyncio
+import weakref
+from typing import Callable, Optional
+
+from utils.custom_adk_patches import CustomMCPToolset
+
+
+class SharedMCPToolset:
+    """
+    Owner of one long-lived CustomMCPToolset.
+
+    Args:
+        factory: Callable that creates the toolset (called again after `close`).
+    """
+
+    def __init__(self, factory: Callable[[], CustomMCPToolset]):
+        self._factory = factory
+        self._toolset: Optional[CustomMCPToolset] = None
+        self._loop: Optional[weakref.ref] = None  # loop the toolset was created on
+
+    @property
+    def toolset(self) -> CustomMCPToolset:
+        """The running loop's shared toolset, created on first access without opening a session."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None  # e.g. building agents at import time; the toolset is bound on its first use
+        if self._toolset is not None and loop is not None:
+            if self._loop is None:
+                self._loop = weakref.ref(loop)  # created outside a loop, first used on this one
+            elif self._loop() is not loop:
+                self._toolset = None  # the loop it was used on has finished (or was collected)
+        if self._toolset is None:
+            self._toolset = self._factory()
+            self._loop = weakref.ref(loop) if loop is not None else None
+        return self._toolset
+
+    async def close(self) -> None:
+        """Closes the session and stops the server subprocess; agents holding the toolset must be rebuilt."""
+        toolset, self._toolset = self._toolset, None
+        self._loop = None
+        if toolset is not None:
+            await toolset.close()
@@ -0,0 +1,153 @@
+"""
+Batched tool invocations for MCPServer's batch_call tool.
+
+A batch is an ordered list of calls:
+
+    [
+        {"tool": "get_current_datetime", "arguments": {"dummy": "now"}},
+        {"tool": "append_to_file",
+         "arguments": {"directory": "tmp", "file_path": "List1.txt",
+                       "text": "{{0.current_datetime}} Konu"}},
+    ]
+
+String arguments may reference an earlier call's result with `{{i}}` or
+`{{i.path.to.field}}`. A string that is only a reference is replaced by the
+value itself (keeping its type); references inside longer strings are
+replaced by their text. A call waits for the calls it references and for
+those listed in its optional "depends_on"; everything else runs
+concurrently. Results come back in the order of the calls.
+
+`BatchCall` only declares the shape of a call for the tool schema (Gemini
+rejects array items that are objects without properties); calls arrive as
+plain dicts and are validated by `run_batch`.
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+from pydantic import BaseModel, Field
+
+_REFERENCE_RE = re.compile(r"\{\{\s*(\d+)((?:\.[^{}\s.]+)*)\s*\}\}")
+
+
+class BatchCall(BaseModel):
+    """One call of a batch."""
+
+    tool: str = Field(description="Name of the tool to call.")
+    arguments: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="The tool's arguments; strings may contain {{i.field}} references to earlier results.",
+    )
+    depends_on: List[int] = Field(default_factory=list, description="Indexes of earlier calls to wait for.")
+
+
+class BatchError(ValueError):
+    """The batch itself is malformed (no call has been run)."""
+
+
+def is_error_result(result: Any) -> bool:
+    """True for the error dicts our tools (and FunctionTool's argument check) return."""
+    return isinstance(result, dict) and ("error" in result or result.get("status") == "error")
+
+
+def _references(value: Any) -> Set[int]:
+    if isinstance(value, str):
+        return {int(match.group(1)) for match in _REFERENCE_RE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(_references(v) for v in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(_references(v) for v in value)) if value else set()
+    return set()
+
+
+def _lookup(result: Any, path: str) -> Any:
+    value = result
+    for key in filter(None, path.split(".")):
+        if isinstance(value, list):
+            value = value[int(key)]
+        elif isinstance(value, dict):
+            value = value[key]
+        else:
+            raise KeyError(key)
+    return value
+
+
+def _render(value: Any, results: List[Any]) -> Any:
+    if isinstance(value, str):
+        match = _REFERENCE_RE.fullmatch(value.strip())
+        if match:
+            return _lookup(results[int(match.group(1))], match.group(2))
+        return _REFERENCE_RE.sub(
+            lambda m: str(_lookup(results[int(m.group(1))], m.group(2))), value
+        )
+    if isinstance(value, dict):
+        return {k: _render(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_render(v, results) for v in value]
+    return value
+
+
+def _validate(calls: List[Dict[str, Any]], is_known: Callable[[str], bool]) -> List[Set[int]]:
+    if not isinstance(calls, list) or not calls:
+        raise BatchError("'calls' must be a non-empty list.")
+    dependencies = []
+    for index, call in enumerate(calls):
+        if not isinstance(call, dict) or not isinstance(call.get("tool"), str):
+            raise BatchError(f"Call {index} must be an object with a 'tool' name.")
+        if not is_known(call["tool"]):
+            raise BatchError(f"Call {index}: tool '{call['tool']}' is not available in a batch.")
+        if not isinstance(call.get("arguments", {}), dict):
+            raise BatchError(f"Call {index}: 'arguments' must be an object.")
+        depends_on = call.get("depends_on") or []
+        if not isinstance(depends_on, list) or not all(isinstance(dep, int) for dep in depends_on):
+            raise BatchError(f"Call {index}: 'depends_on' must be a list of call indexes.")
+        depends_on = set(depends_on) | _references(call.get("arguments", {}))
+        # Yalnızca önceki çağrılara bağımlılık: döngü oluşamaz
+        invalid = sorted(dep for dep in depends_on if not 0 <= dep < index)
+        if invalid:
+            raise BatchError(f"Call {index} can only depend on earlier calls, got {invalid}.")
+        dependencies.append(depends_on)
+    return dependencies
+
+
+async def run_batch(
+    calls: List[Dict[str, Any]],
+    run_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    is_known: Callable[[str], bool],
+) -> List[Dict[str, Any]]:
+    """
+    Runs the calls with `run_tool(name, arguments)`, independent calls concurrently.
+
+    A call whose dependency failed is skipped. Raises BatchError for a
+    malformed batch; tool failures are reported per call.
+    """
+    dependencies = _validate(calls, is_known)
+    results: List[Any] = [None] * len(calls)
+    outcomes: List[Dict[str, Any]] = [{} for _ in calls]
+    tasks: List[asyncio.Task] = []
+
+    async def run_one(index: int) -> None:
+        call = calls[index]
+        if dependencies[index]:
+            await asyncio.gather(*(tasks[dep] for dep in dependencies[index]))
+        failed = sorted(dep for dep in dependencies[index] if outcomes[dep]["status"] != "success")
+        if failed:
+            outcomes[index] = {"tool": call["tool"], "status": "skipped", "error": f"Dependencies failed: {failed}"}
+            return
+        try:
+            arguments = _render(call.get("arguments", {}), results)
+        except (KeyError, IndexError, ValueError) as e:
+            outcomes[index] = {"tool": call["tool"], "status": "error", "error": f"Unresolved reference: {e}"}
+            return
+        try:
+            results[index] = await run_tool(call["tool"], arguments)
+            status = "error" if is_error_result(results[index]) else "success"
+            outcomes[index] = {"tool": call["tool"], "status": status, "result": results[index]}
+        except Exception as e:
+            outcomes[index] = {"tool": call["tool"], "status": "error", "error": str(e)}
+
+    for index in range(len(calls)):
+        tasks.append(asyncio.ensure_future(run_one(index)))
+    await asyncio.gather(*tasks)
+    return outcomes
@@ -0,0 +1,127 @@
+"""
+Request coalescing and memoization for MCP tool calls.
+
+`ToolCallCache.call(name, arguments, fetch)` sits in front of a tool call:
+
+1. Tools listed in MCP_CACHEABLE_TOOLS ("add_numbers=3600,get_current_datetime=minute")
+   are memoized per (tool, arguments). The TTL is a number of seconds, or
+   "minute"/"hour" to keep the result until the next wall-clock boundary,
+   which matches tools that answer at that resolution.
+2. Identical calls (same tool and arguments) of coalescable tools that are
+   already in flight are not sent again; the callers await the one request.
+   Only tools that are safe to run once for many callers should coalesce, so
+   the session manager passes its idempotent tools plus the cacheable ones.
+
+Error results and paged results (whose continuation cursor is single-use)
+are never memoized. `stats()` reports hits, misses and coalesced calls per tool.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from utils.tool_batch import is_error_result
+
+MCP_CACHEABLE_TOOLS = os.getenv("MCP_CACHEABLE_TOOLS", "add_numbers=3600,get_current_datetime=minute")
+MCP_TOOL_CACHE_MAX_ENTRIES = int(os.getenv("MCP_TOOL_CACHE_MAX_ENTRIES", 1024))
+
+_BOUNDARIES = {"minute": 60, "hour": 3600}
+
+Ttl = Union[float, str]
+
+
+def parse_ttls(text: str) -> Dict[str, Ttl]:
+    """Parses "tool=seconds,tool=minute" into a dict."""
+    ttls: Dict[str, Ttl] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, ttl = item.partition("=")
+        ttl = ttl.strip()
+        ttls[name.strip()] = ttl if ttl in _BOUNDARIES else float(ttl)
+    return ttls
+
+
+def _is_cacheable_result(result: Any) -> bool:
+    if getattr(result, "isError", False) or len(result.content) != 1:
+        return False
+    try:
+        return not is_error_result(json.loads(result.content[0].text))
+    except (AttributeError, ValueError):
+        return False
+
+
+class ToolCallCache:
+    """Memoizes cacheable tools and coalesces identical in-flight calls."""
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, Ttl]] = None,
+        coalesce: Iterable[str] = (),
+        max_entries: int = MCP_TOOL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttls = parse_ttls(MCP_CACHEABLE_TOOLS) if ttls is None else ttls
+        self.coalesce = set(coalesce) | set(self.ttls)
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _expires(self, tool: str) -> float:
+        ttl = self.ttls[tool]
+        now = time.time()
+        if isinstance(ttl, str):
+            step = _BOUNDARIES[ttl]
+            return (math.floor(now / step) + 1) * step
+        return now + ttl
+
+    def _count(self, tool: str, counter: str) -> None:
+        counters = self._counters.setdefault(tool, {"hits": 0, "misses": 0, "coalesced": 0})
+        counters[counter] += 1
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]],
+                   fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if name not in self.coalesce:
+            return await fetch()
+        key = (name, json.dumps(arguments or {}, sort_keys=True, default=str))
+
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[1] > time.time():
+                self._results.move_to_end(key)
+                self._count(name, "hits")
+                return cached[0]
+            del self._results[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count(name, "coalesced")
+        else:
+            self._count(name, "misses")
+            task = self._in_flight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: one caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if key[0] in self.ttls and _is_cacheable_result(result):
+            self._results[key] = (result, self._expires(key[0]))
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        tools = {}
+        for tool, counters in sorted(self._counters.items()):
+            calls = sum(counters.values())
+            tools[tool] = {
+                **counters,
+                "hit_rate": round((counters["hits"] + counters["coalesced"]) / calls, 3) if calls else 0.0,
+                "ttl": self.ttls.get(tool),
+            }
+        return {"entries": len(self._results), "in_flight": len(self._in_flight), "tools": tools}
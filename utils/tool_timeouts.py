@@ -0,0 +1,108 @@
+"""
+Per-tool read timeouts for MCP tool calls.
+
+Instead of one read timeout for every call (CUSTOM_STDIO_TIMEOUT_SECONDS),
+`ToolTimeoutPolicy.deadline(tool)` picks the timeout for each call:
+
+1. an explicit override from MCP_TOOL_TIMEOUTS ("load_web_page=90,add_numbers=5"),
+2. otherwise, in adaptive mode, the tool's observed latency percentile
+   (MCP_ADAPTIVE_TIMEOUT_PERCENTILE) times MCP_ADAPTIVE_TIMEOUT_MULTIPLIER,
+   clamped to [MCP_ADAPTIVE_TIMEOUT_MIN_SECONDS, default], once at least
+   MCP_ADAPTIVE_TIMEOUT_MIN_SAMPLES calls have been seen,
+3. otherwise the default timeout.
+
+The default depends on the transport: stdio sessions use
+CUSTOM_STDIO_TIMEOUT_SECONDS, HTTP and SSE sessions have none (None), so
+there only overrides and adaptive deadlines (without an upper clamp) apply.
+
+A call that times out is recorded with the timeout that was in effect as its
+latency, so the adaptive deadline of a tool that has become slower grows
+again.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+MCP_TOOL_TIMEOUTS = os.getenv("MCP_TOOL_TIMEOUTS", "")
+MCP_ADAPTIVE_TIMEOUTS = os.getenv("MCP_ADAPTIVE_TIMEOUTS", "1") not in ("0", "false", "False")
+MCP_ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv("MCP_ADAPTIVE_TIMEOUT_PERCENTILE", 0.99))
+MCP_ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("MCP_ADAPTIVE_TIMEOUT_MULTIPLIER", 3))
+MCP_ADAPTIVE_TIMEOUT_MIN_SECONDS = float(os.getenv("MCP_ADAPTIVE_TIMEOUT_MIN_SECONDS", 2))
+MCP_ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv("MCP_ADAPTIVE_TIMEOUT_MIN_SAMPLES", 20))
+MCP_ADAPTIVE_TIMEOUT_WINDOW = int(os.getenv("MCP_ADAPTIVE_TIMEOUT_WINDOW", 200))
+
+
+def parse_overrides(text: str) -> Dict[str, float]:
+    """Parses "tool=seconds,tool=seconds" into a dict."""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, seconds = item.partition("=")
+        overrides[name.strip()] = float(seconds)
+    return overrides
+
+
+class ToolTimeoutPolicy:
+    """Explicit per-tool timeouts plus adaptive deadlines from a sliding latency window."""
+
+    def __init__(
+        self,
+        default: Optional[float],
+        overrides: Optional[Dict[str, float]] = None,
+        adaptive: bool = MCP_ADAPTIVE_TIMEOUTS,
+        percentile: float = MCP_ADAPTIVE_TIMEOUT_PERCENTILE,
+        multiplier: float = MCP_ADAPTIVE_TIMEOUT_MULTIPLIER,
+        min_seconds: float = MCP_ADAPTIVE_TIMEOUT_MIN_SECONDS,
+        min_samples: int = MCP_ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+        window: int = MCP_ADAPTIVE_TIMEOUT_WINDOW,
+    ):
+        self.default = default
+        self.overrides = parse_overrides(MCP_TOOL_TIMEOUTS) if overrides is None else overrides
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_seconds = min_seconds
+        self.min_samples = min_samples
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def deadline(self, tool: str) -> Optional[float]:
+        """Read timeout in seconds for the next call of `tool`; None for no timeout."""
+        if tool in self.overrides:
+            return self.overrides[tool]
+        if not self.adaptive:
+            return self.default
+        with self._lock:
+            samples = self._latencies.get(tool)
+            if samples is None or len(samples) < self.min_samples:
+                return self.default
+            ordered = sorted(samples)
+        observed = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        deadline = max(self.min_seconds, observed * self.multiplier)
+        return deadline if self.default is None else min(self.default, deadline)
+
+    def record(self, tool: str, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            samples = self._latencies.get(tool)
+            if samples is None:
+                samples = self._latencies[tool] = deque(maxlen=self.window)
+            samples.append(seconds)
+            if timed_out:
+                self.timeouts[tool] = self.timeouts.get(tool, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            tools = set(self._latencies) | set(self.overrides)
+        deadlines = {tool: self.deadline(tool) for tool in tools}
+        return {
+            tool: {
+                "deadline_seconds": None if deadlines[tool] is None else round(deadlines[tool], 3),
+                "samples": len(self._latencies.get(tool, ())),
+                "timeouts": self.timeouts.get(tool, 0),
+                "override": tool in self.overrides,
+            }
+            for tool in sorted(tools)
+        }
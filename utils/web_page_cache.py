@@ -0,0 +1,249 @@
+"""
+Caching fetch layer for MCPServer's load_web_page tool.
+
+`load_web_page` keeps ADK's signature and text extraction, but the extracted
+text is stored on disk together with the response's ETag / Last-Modified
+validators. While an entry is fresh (Cache-Control max-age, otherwise
+WEB_CACHE_FRESH_SECONDS; never with no-cache) it is returned straight from
+disk. After that the page is revalidated with a conditional request
+(If-None-Match / If-Modified-Since), so an unchanged page costs a 304 and no
+re-parse. If the revalidation fails, the stale text is returned; a 404 or 410
+drops the entry instead.
+
+Each URL has a small JSON metadata file and a text file under WEB_CACHE_DIR,
+so a 304 only rewrites the metadata. The directory is bounded to
+WEB_CACHE_MAX_BYTES; the least recently used entries (by the text file's
+modification time, bumped on every hit) are evicted first (see utils.disk_lru).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from utils.disk_lru import DiskLRUStore
+
+WEB_CACHE_DIR = os.getenv("WEB_CACHE_DIR", ".web_cache")
+WEB_CACHE_MAX_BYTES = int(os.getenv("WEB_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+WEB_CACHE_FRESH_SECONDS = float(os.getenv("WEB_CACHE_FRESH_SECONDS", 300))
+WEB_FETCH_TIMEOUT_SECONDS = float(os.getenv("WEB_FETCH_TIMEOUT_SECONDS", 30))
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "1") not in ("0", "false", "False")
+
+_GONE_STATUSES = (404, 410)
+
+
+def extract_text(content: bytes) -> str:
+    """Same extraction as ADK's load_web_page: page text without very short lines."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "lxml")
+    text = soup.get_text(separator="\n", strip=True)
+    # Split the text into lines, filtering out very short lines
+    # (e.g., single words or short subtitles)
+    return "\n".join(line for line in text.splitlines() if len(line.split()) > 3)
+
+
+def cache_control(response: requests.Response) -> Dict[str, Optional[str]]:
+    """Parses the Cache-Control header into {directive: value or None}."""
+    directives = {}
+    for part in response.headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class WebPageCache:
+    """Disk backed, size bounded cache of extracted page text with HTTP revalidation."""
+
+    def __init__(
+        self,
+        directory: str = WEB_CACHE_DIR,
+        max_bytes: int = WEB_CACHE_MAX_BYTES,
+        fresh_seconds: float = WEB_CACHE_FRESH_SECONDS,
+        timeout: float = WEB_FETCH_TIMEOUT_SECONDS,
+        enabled: bool = WEB_CACHE_ENABLED,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.timeout = timeout
+        self.enabled = enabled
+        self.hits = 0  # served from disk without a request
+        self.revalidated = 0  # 304 Not Modified
+        self.fetches = 0  # full download + parse
+        self.stale = 0  # revalidation failed, stale text returned
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._store = DiskLRUStore(directory, suffixes=(".txt", ".json"))
+        self._total_bytes: Optional[int] = None
+
+    # --- HTTP ---
+    def _session(self) -> requests.Session:
+        # requests.Session is not guaranteed to be thread-safe; one per worker thread
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    # --- Low level storage ---
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        """(metadata path, text path) of `url`'s entry."""
+        key = self._key(url)
+        return self._store.path(key, ".json"), self._store.path(key, ".txt")
+
+    def _read(self, url: str) -> Optional[Dict[str, Any]]:
+        key = self._key(url)
+        entry = self._store.read_json(key, ".json")
+        text = self._store.read_text(key, ".txt") if entry is not None else None
+        if text is None:
+            return None
+        entry["text"] = text
+        return entry
+
+    def _write(self, url: str, meta: Dict[str, Any], text: Optional[str] = None) -> None:
+        """Writes the metadata and, unless `text` is None, the page text."""
+        key = self._key(url)
+        delta = 0
+        if text is not None:
+            # Text first: an entry is only read when its metadata exists
+            delta += self._store.write(key, text, ".txt")
+        delta += self._store.write_json(key, meta, ".json")
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += delta
+        self._evict()
+
+    def _drop(self, url: str) -> None:
+        freed = self._store.remove(self._key(url)) or 0
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes -= freed
+
+    def _touch(self, url: str) -> None:
+        self._store.touch(self._key(url))
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+            entries = self._store.scan()
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._store.remove(key) is None:
+                    continue
+                total -= size
+                self.evictions += 1
+            self._total_bytes = total
+
+    def _freshness(self, response: requests.Response) -> float:
+        directives = cache_control(response)
+        if "no-cache" in directives:
+            return 0.0  # may be stored, but must be revalidated before every use
+        try:
+            return float(directives["max-age"])
+        except (KeyError, TypeError, ValueError):
+            return self.fresh_seconds
+
+    # --- Public API ---
+    def fetch_text(self, url: str) -> str:
+        """Returns the extracted text of `url`, from disk when possible."""
+        if not self.enabled:
+            self.fetches += 1
+            response = self._session().get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                return f"Failed to fetch url: {url}"
+            return extract_text(response.content)
+
+        entry = self._read(url)
+        now = time.time()
+        if entry is not None and now - entry["checked"] < entry["fresh_seconds"]:
+            self._touch(url)
+            self.hits += 1
+            return entry["text"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = self._session().get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            self._touch(url)
+            self.stale += 1
+            return entry["text"]
+
+        if response.status_code == 304 and entry is not None:
+            text = entry.pop("text")
+            entry["checked"] = now
+            entry["fresh_seconds"] = self._freshness(response)
+            self._write(url, entry)  # metadata only, the text is unchanged
+            self._touch(url)
+            self.revalidated += 1
+            return text
+
+        if response.status_code != 200:
+            if response.status_code in _GONE_STATUSES:
+                # The page is gone; serving the old text would hide that
+                if entry is not None:
+                    self._drop(url)
+            elif entry is not None:
+                self._touch(url)
+                self.stale += 1
+                return entry["text"]
+            return f"Failed to fetch url: {url}"
+
+        self.fetches += 1
+        text = extract_text(response.content)
+        if "no-store" in cache_control(response):
+            if entry is not None:
+                self._drop(url)
+        else:
+            self._write(url, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "checked": now,
+                "fresh_seconds": self._freshness(response),
+            }, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "fetches": self.fetches,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "bytes": self._total_bytes,
+            "directory": self.directory,
+        }
+
+
+web_page_cache = WebPageCache()
+
+
+def load_web_page(url: str) -> str:
+    """Fetches the content in the url and returns the text in it.
+
+    Args:
+        url (str): The url to browse.
+
+    Returns:
+        str: The text content of the url.
+    """
+    return web_page_cache.fetch_text(url)